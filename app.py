@@ -1,12 +1,24 @@
-from flask import Flask, jsonify, render_template, request, url_for, send_from_directory
+from flask import Flask, jsonify, render_template, request, url_for, send_from_directory, Response, stream_with_context
 from flask_cors import CORS
 from flask_caching import Cache
 import requests
+from requests.adapters import HTTPAdapter
 import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta, timezone
 from dateutil import parser as date_parser
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from functools import lru_cache
+from functools import wraps
+from collections import OrderedDict
+from collections import deque
+from contextlib import contextmanager
+import contextvars
+import threading
+import queue
+import sqlite3
+import hashlib
+from types import MappingProxyType
+import gzip
+import click
 import secrets
 import os
 import sys
@@ -21,7 +33,10 @@ if sys.platform == 'win32':
 from werkzeug.utils import secure_filename
 import gspread
 from google.oauth2.service_account import Credentials
-from shapely.geometry import Point, Polygon, MultiPolygon
+import numpy as np
+import shapely
+from shapely.geometry import Polygon, MultiPolygon
+from shapely.strtree import STRtree
 
 app = Flask(__name__)
 CORS(app)
@@ -44,6 +59,316 @@ print("Cache initialized successfully")
 
 OSM_API_URL = 'https://api.openstreetmap.org/api/0.6'
 
+# ============================================
+# OSM API Client
+# ============================================
+
+# User-Agent sent with every OSM API request
+OSM_USER_AGENT = 'ATLAS-Singapore/1.0'
+
+# Keep-alive connection pool size for api.openstreetmap.org
+# Must cover the largest number of threads calling the API at the same time
+OSM_POOL_MAXSIZE = int(os.environ.get('OSM_POOL_MAXSIZE', '20'))
+
+# Per-call timeout policy (seconds) by kind of request
+OSM_TIMEOUTS = {
+    'default': 10,      # single elements, users, changeset metadata
+    'node': 5,          # per-node lookups while rebuilding deleted way geometry
+    'list': 15,         # /changesets list queries
+    'download': 30,     # /changeset/{id}/download for analysis and Atlas AI
+    'comparison': 120,  # /changeset/{id}/download for the comparison tool (can be huge)
+}
+
+# Process-wide OSM API budget shared by every thread and every dashboard user
+OSM_REQUESTS_PER_SECOND = float(os.environ.get('OSM_REQUESTS_PER_SECOND', '10'))  # 0 disables throttling
+OSM_REQUEST_BURST = int(os.environ.get('OSM_REQUEST_BURST', '10'))
+
+# Threads used to fan out per-changeset/per-element fetches
+# Actual request rate is capped by the scheduler, not by the number of threads
+OSM_WORKER_THREADS = int(os.environ.get('OSM_WORKER_THREADS', '8'))
+
+# How many times to retry a request the API rejected for rate limiting (429/509)
+OSM_RATE_LIMIT_RETRIES = 3
+
+# Scheduler priority classes (lower value is served first)
+OSM_PRIORITY_INTERACTIVE = 0  # comparison tool, profiles, Atlas AI
+OSM_PRIORITY_REFRESH = 1      # dashboard changeset refresh, comparison prebuilding
+OSM_PRIORITY_BACKFILL = 2     # analytics history backfill
+
+class OSMRequestScheduler:
+    """
+    Process-wide token bucket for OSM API requests
+    Tokens refill at `rate` per second up to `burst`. Waiting requests are granted in
+    priority order (interactive > refresh > backfill). Within a class every caller
+    (request thread or named background task) has its own queue and the queues are
+    served round-robin, so one caller's burst cannot starve the others in its class
+    """
+    
+    def __init__(self, rate, burst, priority_classes=3):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        # One OrderedDict per class: caller -> deque of tickets, in round-robin order
+        self.queues = [OrderedDict() for _ in range(priority_classes)]
+        self.condition = threading.Condition()
+        self.granted = 0
+        self.rate_limited = 0
+    
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+    
+    def _next_ticket(self):
+        for callers in self.queues:
+            for waiting in callers.values():
+                return waiting[0]
+        return None
+    
+    def acquire(self, priority=OSM_PRIORITY_REFRESH, caller=None):
+        """Block until this request may be sent"""
+        if self.rate <= 0:
+            return
+        
+        priority = min(max(priority, 0), len(self.queues) - 1)
+        callers = self.queues[priority]
+        ticket = object()
+        with self.condition:
+            callers.setdefault(caller, deque()).append(ticket)
+            try:
+                while True:
+                    # Only the head of the next caller's queue in the highest non-empty class may take a token
+                    if self._next_ticket() is not ticket:
+                        self.condition.wait()
+                        continue
+                    
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now >= self.paused_until and self.tokens >= 1:
+                        self.tokens -= 1
+                        self.granted += 1
+                        # This caller goes to the back of the round
+                        callers.move_to_end(caller)
+                        return
+                    
+                    delay = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+                    self.condition.wait(timeout=delay)
+            finally:
+                waiting = callers[caller]
+                waiting.remove(ticket)
+                if not waiting:
+                    del callers[caller]
+                # Wake the waiters so the next head can claim a token
+                self.condition.notify_all()
+    
+    def back_off(self, seconds):
+        """Pause all requests after the API told us to slow down"""
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.rate_limited += 1
+    
+    def stats(self):
+        with self.condition:
+            return {
+                'requests_per_second': self.rate,
+                'burst': self.burst,
+                'granted': self.granted,
+                'rate_limited': self.rate_limited,
+                'waiting': sum(len(waiting) for callers in self.queues for waiting in callers.values()),
+                'waiting_callers': sum(len(callers) for callers in self.queues)
+            }
+
+osm_scheduler = OSMRequestScheduler(OSM_REQUESTS_PER_SECOND, OSM_REQUEST_BURST)
+
+# Priority of OSM requests made in the current context (request handler or worker task)
+osm_request_priority = contextvars.ContextVar('osm_request_priority', default=OSM_PRIORITY_REFRESH)
+
+# Fair-queuing key of the current context; unset means the current thread is the caller
+osm_request_caller = contextvars.ContextVar('osm_request_caller', default=None)
+
+def current_osm_caller():
+    return osm_request_caller.get() or threading.current_thread().name
+
+@contextmanager
+def osm_priority(priority, caller=None):
+    """
+    Run OSM requests in this block (or decorated function) at the given priority class
+    caller names a background task so all of its threads share one fair queue
+    """
+    token = osm_request_priority.set(priority)
+    caller_token = osm_request_caller.set(caller) if caller else None
+    try:
+        yield
+    finally:
+        if caller_token is not None:
+            osm_request_caller.reset(caller_token)
+        osm_request_priority.reset(token)
+
+def submit_osm_task(executor, fn, *args):
+    """Submit fn to a thread pool, carrying over the caller's OSM request priority and queue"""
+    context = contextvars.copy_context()
+    context.run(osm_request_caller.set, current_osm_caller())
+    return executor.submit(context.run, fn, *args)
+
+def create_osm_session():
+    """Create the pooled requests session shared by all OSM API calls"""
+    session = requests.Session()
+    session.headers.update({'User-Agent': OSM_USER_AGENT})
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=OSM_POOL_MAXSIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+osm_session = create_osm_session()
+
+def osm_get(path, params=None, timeout='default', stream=False):
+    """
+    GET an OSM API path (e.g. '/changeset/123/download') through the shared session
+    Every call waits for a token from osm_scheduler at the current osm_priority, and
+    rate-limit responses (429/509) pause the whole process before retrying
+    
+    Args:
+        path: Path relative to OSM_API_URL
+        params: Optional query parameters
+        timeout: Key of OSM_TIMEOUTS or a number of seconds
+        stream: Pass True to read the body incrementally (use as a context manager)
+    """
+    if isinstance(timeout, str):
+        timeout = OSM_TIMEOUTS[timeout]
+    
+    for attempt in range(OSM_RATE_LIMIT_RETRIES + 1):
+        osm_scheduler.acquire(osm_request_priority.get(), current_osm_caller())
+        response = osm_session.get(f"{OSM_API_URL}{path}", params=params, timeout=timeout, stream=stream)
+        if response.status_code not in (429, 509) or attempt == OSM_RATE_LIMIT_RETRIES:
+            return response
+        
+        try:
+            retry_after = float(response.headers.get('Retry-After', ''))
+        except ValueError:
+            retry_after = 2 ** attempt
+        response.close()
+        print(f"WARNING: OSM API rate limit hit ({response.status_code}), pausing requests for {retry_after:.0f}s")
+        osm_scheduler.back_off(retry_after)
+
+# ============================================
+# Caching
+# ============================================
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry TTLs and hit/miss/eviction counters
+    Bounded by entry count and optionally by approximate size (JSON length of values).
+    None results are kept only for negative_ttl seconds, so a transient OSM error
+    doesn't stick; ttl=None means entries only leave by eviction
+    """
+    
+    def __init__(self, name, max_entries=1000, max_bytes=None, ttl=None, negative_ttl=60):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.entries = OrderedDict()  # key -> (value, expires_at or None, size)
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        CACHES[name] = self
+    
+    def lookup(self, key):
+        """Returns (found, value) - found distinguishes a cached None from a miss"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return False, None
+    
+    def get(self, key, default=None):
+        found, value = self.lookup(key)
+        return value if found else default
+    
+    def set(self, key, value, ttl=None):
+        """Store a value (ttl overrides the cache default; None values use negative_ttl)"""
+        ttl = self.negative_ttl if value is None else (ttl if ttl is not None else self.ttl)
+        if ttl is not None and ttl <= 0:
+            return
+        size = len(json.dumps(value, default=str)) if self.max_bytes else 0
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (value, expires_at, size)
+            self.total_bytes += size
+            while self.entries and (len(self.entries) > self.max_entries or
+                                    (self.max_bytes and self.total_bytes > self.max_bytes)):
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+    
+    def update(self, mapping):
+        for key, value in mapping.items():
+            self.set(key, value)
+    
+    def _remove(self, key):
+        _, _, size = self.entries.pop(key)
+        self.total_bytes -= size
+    
+    def __contains__(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry is not None and (entry[1] is None or entry[1] > time.monotonic())
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'bytes': self.total_bytes if self.max_bytes else None,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+# All caches by name, for the metrics endpoint
+CACHES = {}
+
+def ttl_cached(cache):
+    """Memoize a function's results in a TTLCache, keyed by its positional arguments"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args):
+            found, value = cache.lookup(args)
+            if found:
+                return value
+            value = fn(*args)
+            cache.set(args, value)
+            return value
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
 # ============================================
 # Multi-Region Configuration
 # ============================================
@@ -52,11 +377,14 @@ OSM_API_URL = 'https://api.openstreetmap.org/api/0.6'
 REGIONS_CONFIG_FILE = 'static/regions.json'
 REGIONS = {}
 REGION_POLYGONS = {}
+# STRtree over all region polygons and the region id of each tree geometry
+REGION_TREE = None
+REGION_TREE_IDS = []
 CURRENT_REGION = 'singapore'  # Default region
 
 def load_regions_config():
     """Load region configurations from JSON file"""
-    global REGIONS, REGION_POLYGONS
+    global REGIONS, REGION_POLYGONS, REGION_TREE, REGION_TREE_IDS
     try:
         with open(REGIONS_CONFIG_FILE, 'r', encoding='utf-8') as f:
             config = json.load(f)
@@ -95,6 +423,15 @@ def load_regions_config():
                     REGION_POLYGONS[region_id] = None
                     print(f"WARNING: {region_data['name']} has no polygon coordinates")
             
+            # Build the spatial index once so every membership test is a fast lookup
+            for polygon in REGION_POLYGONS.values():
+                if polygon is not None:
+                    shapely.prepare(polygon)
+            
+            # One tree over all regions, so a changeset is matched to every region in one query
+            REGION_TREE_IDS = [region_id for region_id, polygon in REGION_POLYGONS.items() if polygon is not None]
+            REGION_TREE = STRtree([REGION_POLYGONS[region_id] for region_id in REGION_TREE_IDS]) if REGION_TREE_IDS else None
+            
             return config.get('defaultRegion', 'singapore')
     except Exception as e:
         print(f"WARNING: Could not load regions config: {e}")
@@ -129,9 +466,6 @@ SINGAPORE_BBOX = get_region_bbox('singapore') or "103.56,1.13,104.14,1.48"
 # Time range for fetching changesets (in hours)
 CHANGESET_TIME_RANGE_HOURS = int(os.environ.get('CHANGESET_TIME_RANGE_HOURS', '24'))
 
-# Cache for changeset details to avoid repeated API calls
-changeset_details_cache = {}
-
 # ============================================
 # Slack Configuration
 # ============================================
@@ -171,10 +505,645 @@ alerted_changesets = load_alerted_changesets()
 if alerted_changesets:
     print(f"Loaded {len(alerted_changesets)} previously alerted changesets")
 
+# ============================================
+# Changeset Store (SQLite)
+# ============================================
+
+# Closed changesets never change, so their metadata and analysis are stored once
+# and survive restarts/deploys instead of being re-downloaded on the next request
+CHANGESET_DB_FILE = os.environ.get('ATLAS_DB_FILE', '.atlas_changesets.db')
+
+# SQLite limits bound parameters per statement, so IN (...) lookups are chunked
+CHANGESET_DB_BATCH = 500
+
+_db_local = threading.local()
+
+# Analytics read hour/day buckets per region instead of re-aggregating raw changesets.
+# Each changeset adds 1 to 'changesets', its edit counts per action and element type,
+# and 1 to needs_review and to each charted criteria flag it was given
+ROLLUP_ACTIONS = ('created', 'modified', 'deleted')
+ROLLUP_ELEMENT_TYPES = ('node', 'way', 'relation')
+ROLLUP_FLAGS = ('mass_changes', 'erp', 'oneway', 'access')
+ROLLUP_COLUMNS = (
+    ('changesets',) + ROLLUP_ACTIONS +
+    tuple(f'{action}_{elem_type}s' for action in ROLLUP_ACTIONS for elem_type in ROLLUP_ELEMENT_TYPES) +
+    ('needs_review',) + ROLLUP_FLAGS
+)
+
+def get_db():
+    """
+    Get this thread's connection to the changeset store (created on first use)
+    SQLite connections can't be shared across threads; WAL mode lets request
+    threads read while the worker pool writes
+    """
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(CHANGESET_DB_FILE, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        init_changeset_store(conn)
+        _db_local.conn = conn
+    return conn
+
+def init_changeset_store(conn):
+    """Create the changeset store tables if they don't exist"""
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS changesets (
+                id INTEGER PRIMARY KEY,
+                created_at TEXT,
+                closed_at TEXT,
+                user TEXT,
+                metadata TEXT,
+                analysis TEXT,
+                validation TEXT,
+                analyzed_at TEXT
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_changesets_created_at ON changesets (created_at)')
+        # rollup holds the counts each membership last added to the rollups (see update_changeset_rollups)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS region_changesets (
+                region TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                created_at TEXT,
+                rollup TEXT,
+                PRIMARY KEY (region, id)
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_region_changesets_created_at ON region_changesets (region, created_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_region_changesets_id ON region_changesets (id)')
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS changeset_rollups (
+                region TEXT NOT NULL,
+                period TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                {', '.join(f'{column} INTEGER NOT NULL DEFAULT 0' for column in ROLLUP_COLUMNS)},
+                PRIMARY KEY (region, period, bucket)
+            )
+        ''')
+        # Past days whose changesets have all been fetched into the store (see backfill_history_day)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS history_days (
+                region TEXT NOT NULL,
+                day TEXT NOT NULL,
+                changesets INTEGER,
+                completed_at TEXT,
+                PRIMARY KEY (region, day)
+            )
+        ''')
+        # Newest sequence ingested from each feed (changeset files, diffs) of a replication
+        # directory, and the diff analyses of changesets that hadn't closed yet (see ingest_replication)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS replication_state (
+                directory TEXT NOT NULL,
+                feed TEXT NOT NULL,
+                sequence INTEGER NOT NULL,
+                timestamp TEXT,
+                ingested_at TEXT,
+                PRIMARY KEY (directory, feed)
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS replication_pending (
+                id INTEGER PRIMARY KEY,
+                analysis TEXT NOT NULL
+            )
+        ''')
+        # Before/after comparisons built ahead of time for flagged (closed) changesets
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS comparison_bundles (
+                id INTEGER PRIMARY KEY,
+                comparison TEXT NOT NULL,
+                built_at TEXT
+            )
+        ''')
+        # Resumable comparisons of large changesets: one row per job, one per routing element
+        # ('resolved' once its old version or geometry has been fetched or is known to be gone,
+        # 'attempts' counts transient fetch failures), see run_comparison_job
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS comparison_jobs (
+                id INTEGER PRIMARY KEY,
+                status TEXT NOT NULL,
+                total INTEGER,
+                resolved INTEGER NOT NULL DEFAULT 0,
+                node_coords TEXT,
+                metadata TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS comparison_job_elements (
+                job INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                action TEXT NOT NULL,
+                element TEXT NOT NULL,
+                resolved INTEGER NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (job, seq)
+            )
+        ''')
+        # Element versions never change once written, so every version seen is kept
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS element_versions (
+                type TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                version INTEGER NOT NULL,
+                changeset INTEGER,
+                visible INTEGER NOT NULL,
+                lat REAL,
+                lon REAL,
+                tags TEXT,
+                nodes TEXT,
+                members TEXT,
+                PRIMARY KEY (type, id, version)
+            )
+        ''')
+
+def changeset_rollup_counts(cs):
+    """A changeset's contribution to its rollup buckets (list aligned with ROLLUP_COLUMNS)"""
+    details = cs.get('details') or {}
+    validation = cs.get('validation') or {}
+    flags = validation.get('flags') or []
+    counts = [1] + [details.get(f'total_{action}', 0) for action in ROLLUP_ACTIONS]
+    for action in ROLLUP_ACTIONS:
+        action_counts = details.get(action) or {}
+        counts.extend(action_counts.get(elem_type, 0) for elem_type in ROLLUP_ELEMENT_TYPES)
+    counts.append(1 if validation.get('status') == 'needs_review' else 0)
+    counts.extend(1 if flag in flags else 0 for flag in ROLLUP_FLAGS)
+    return counts
+
+def rollup_buckets(created_at):
+    """Hour and day bucket keys for an OSM timestamp ('YYYY-MM-DDTHH:MM:SSZ')"""
+    return [('hour', f'{created_at[:10]} {created_at[11:13]}:00'), ('day', created_at[:10])]
+
+def update_changeset_rollups(conn, changesets):
+    """
+    Apply the change in each changeset's counts to the hour/day buckets of every region
+    it belongs to. Must run in the transaction that stored the changesets or memberships
+    (after its first write, so concurrent updates are serialized). Counts are applied as
+    deltas against the ones last added, so a re-scored changeset moves between flags
+    instead of being counted twice
+    """
+    by_id = {int(cs['id']): cs for cs in changesets if cs.get('created_at')}
+    ids = list(by_id)
+    memberships = []
+    for i in range(0, len(ids), CHANGESET_DB_BATCH):
+        batch = ids[i:i + CHANGESET_DB_BATCH]
+        placeholders = ','.join('?' * len(batch))
+        memberships.extend(conn.execute(
+            f'SELECT region, id, rollup FROM region_changesets WHERE id IN ({placeholders})', batch
+        ).fetchall())
+    
+    deltas = {}
+    applied = []
+    for row in memberships:
+        cs = by_id[row['id']]
+        counts = changeset_rollup_counts(cs)
+        previous = json.loads(row['rollup']) if row['rollup'] else [0] * len(ROLLUP_COLUMNS)
+        if counts == previous:
+            continue
+        for period, bucket in rollup_buckets(cs['created_at']):
+            total = deltas.setdefault((row['region'], period, bucket), [0] * len(ROLLUP_COLUMNS))
+            for i, (new, old) in enumerate(zip(counts, previous)):
+                total[i] += new - old
+        applied.append((json.dumps(counts), row['region'], row['id']))
+    
+    if deltas:
+        conn.executemany(
+            f'''INSERT INTO changeset_rollups (region, period, bucket, {', '.join(ROLLUP_COLUMNS)})
+               VALUES (?, ?, ?, {', '.join('?' * len(ROLLUP_COLUMNS))})
+               ON CONFLICT(region, period, bucket) DO UPDATE SET
+               {', '.join(f'{column} = {column} + excluded.{column}' for column in ROLLUP_COLUMNS)}''',
+            [key + tuple(total) for key, total in deltas.items()]
+        )
+        conn.executemany('UPDATE region_changesets SET rollup = ? WHERE region = ? AND id = ?', applied)
+
+def load_stored_analyses(changeset_ids):
+    """
+    Read stored analyses (see analyze_osmchange) for many changesets with indexed lookups
+    Returns dict mapping changeset id (str) -> analysis for the ids that have one
+    """
+    ids = [int(cs_id) for cs_id in changeset_ids]
+    analyses = {}
+    try:
+        conn = get_db()
+        for i in range(0, len(ids), CHANGESET_DB_BATCH):
+            batch = ids[i:i + CHANGESET_DB_BATCH]
+            placeholders = ','.join('?' * len(batch))
+            rows = conn.execute(
+                f'SELECT id, analysis FROM changesets WHERE analysis IS NOT NULL AND id IN ({placeholders})',
+                batch
+            )
+            for row in rows:
+                analyses[str(row['id'])] = json.loads(row['analysis'])
+    except Exception as e:
+        print(f"WARNING: Error reading changeset store: {e}")
+    return analyses
+
+def store_changeset_analysis(changeset_id, analysis):
+    """Persist the analysis of a closed changeset"""
+    store_changeset_analyses({changeset_id: analysis})
+
+def store_changeset_analyses(analyses):
+    """Persist many analyses in one transaction (dict of changeset id -> analysis)"""
+    analyzed_at = datetime.now(timezone.utc).isoformat()
+    try:
+        conn = get_db()
+        with conn:
+            conn.executemany(
+                '''INSERT INTO changesets (id, analysis, analyzed_at) VALUES (?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET analysis = excluded.analysis, analyzed_at = excluded.analyzed_at''',
+                [(int(cs_id), json.dumps(analysis), analyzed_at) for cs_id, analysis in analyses.items()]
+            )
+    except Exception as e:
+        print(f"WARNING: Error storing analyses for {len(analyses)} changesets: {e}")
+
+def store_changesets(changesets):
+    """
+    Persist changeset metadata and validation results (as returned by fetch_osm_changesets)
+    The validation is refreshed on every store since it depends on the current settings
+    """
+    rows = []
+    for cs in changesets:
+        metadata = {key: value for key, value in cs.items() if key not in ('details', 'validation')}
+        rows.append((
+            int(cs['id']), cs.get('created_at'), cs.get('closed_at'), cs.get('user'),
+            json.dumps(metadata), json.dumps(cs.get('validation'))
+        ))
+    try:
+        conn = get_db()
+        with conn:
+            conn.executemany(
+                '''INSERT INTO changesets (id, created_at, closed_at, user, metadata, validation) VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET created_at = excluded.created_at, closed_at = excluded.closed_at,
+                   user = excluded.user, metadata = excluded.metadata, validation = excluded.validation''',
+                rows
+            )
+            update_changeset_rollups(conn, changesets)
+    except Exception as e:
+        print(f"WARNING: Error storing changesets: {e}")
+
+def store_region_changesets(region, changesets):
+    """
+    Record which changesets belong to a region (changesets must already be in store_changesets)
+    and add new members to the region's rollups
+    Membership is kept as history - the live window is bounded when it's loaded
+    """
+    try:
+        conn = get_db()
+        with conn:
+            conn.executemany(
+                '''INSERT INTO region_changesets (region, id, created_at) VALUES (?, ?, ?)
+                   ON CONFLICT(region, id) DO UPDATE SET created_at = excluded.created_at''',
+                [(region, int(cs['id']), cs.get('created_at')) for cs in changesets]
+            )
+            update_changeset_rollups(conn, changesets)
+    except Exception as e:
+        print(f"WARNING: Error storing changesets for region {region}: {e}")
+
+def load_region_changesets(region, since=None, limit=None):
+    """
+    Rebuild a region's stored changeset list (same shape as fetch_osm_changesets, newest first)
+    since: only changesets created at/after this OSM timestamp string; limit: max changesets
+    Returns an empty list if the region hasn't been ingested yet
+    """
+    try:
+        rows = get_db().execute(
+            '''SELECT c.metadata, c.analysis, c.validation FROM region_changesets r
+               JOIN changesets c ON c.id = r.id
+               WHERE r.region = ? AND r.created_at >= ? AND c.metadata IS NOT NULL
+               ORDER BY r.created_at DESC LIMIT ?''',
+            (region, since or '', limit if limit is not None else -1)
+        ).fetchall()
+    except Exception as e:
+        print(f"WARNING: Error loading changesets for region {region}: {e}")
+        return []
+    
+    changesets = []
+    for row in rows:
+        cs = json.loads(row['metadata'])
+        if 'created_ts' not in cs:
+            add_changeset_timestamps(cs)
+        if row['analysis']:
+            cs['details'] = json.loads(row['analysis'])['details']
+        cs['validation'] = json.loads(row['validation']) if row['validation'] else {'status': 'valid', 'reasons': [], 'flags': []}
+        changesets.append(cs)
+    return changesets
+
+def load_changeset_rollups(region, period, since=''):
+    """
+    Read a region's rollup buckets (period 'hour' or 'day') from the since bucket key on
+    Returns list of dicts with 'bucket' and the ROLLUP_COLUMNS counts, oldest first
+    """
+    try:
+        rows = get_db().execute(
+            f'''SELECT bucket, {', '.join(ROLLUP_COLUMNS)} FROM changeset_rollups
+               WHERE region = ? AND period = ? AND bucket >= ? AND changesets > 0
+               ORDER BY bucket''',
+            (region, period, since)
+        ).fetchall()
+    except Exception as e:
+        print(f"WARNING: Error loading {period} rollups for region {region}: {e}")
+        return []
+    return [dict(row) for row in rows]
+
+def load_history_days(region, since=''):
+    """Set of days ('YYYY-MM-DD') from the since day on that have been backfilled for a region"""
+    try:
+        rows = get_db().execute('SELECT day FROM history_days WHERE region = ? AND day >= ?', (region, since))
+        return {row['day'] for row in rows}
+    except Exception as e:
+        print(f"WARNING: Error loading history days for region {region}: {e}")
+        return set()
+
+def store_history_day(region, day, changeset_count):
+    """Record that a day's changesets have been backfilled for a region"""
+    try:
+        conn = get_db()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO history_days (region, day, changesets, completed_at) VALUES (?, ?, ?, ?)',
+                (region, day, changeset_count, datetime.now(timezone.utc).isoformat())
+            )
+    except Exception as e:
+        print(f"WARNING: Error storing history day {day} for region {region}: {e}")
+
+def load_replication_state(directory, feed):
+    """Cursor {'sequence', 'timestamp'} of one feed of a replication directory, or None if never ingested"""
+    try:
+        row = get_db().execute(
+            'SELECT sequence, timestamp FROM replication_state WHERE directory = ? AND feed = ?',
+            (os.path.abspath(directory), feed)
+        ).fetchone()
+    except Exception as e:
+        print(f"WARNING: Error loading replication state for {directory}: {e}")
+        return None
+    return dict(row) if row else None
+
+def store_replication_state(directory, feed, sequence, timestamp):
+    """Record the newest sequence ingested from one feed of a replication directory"""
+    try:
+        conn = get_db()
+        with conn:
+            conn.execute(
+                '''INSERT OR REPLACE INTO replication_state (directory, feed, sequence, timestamp, ingested_at)
+                   VALUES (?, ?, ?, ?, ?)''',
+                (os.path.abspath(directory), feed, sequence, timestamp, datetime.now(timezone.utc).isoformat())
+            )
+    except Exception as e:
+        print(f"WARNING: Error storing replication state for {directory}: {e}")
+
+def load_replication_pending():
+    """Diff analyses of changesets not closed in the changeset files yet (changeset id -> analysis)"""
+    try:
+        rows = get_db().execute('SELECT id, analysis FROM replication_pending').fetchall()
+    except Exception as e:
+        print(f"WARNING: Error loading pending replication analyses: {e}")
+        return {}
+    return {str(row['id']): json.loads(row['analysis']) for row in rows}
+
+def store_replication_pending(analyses, closed_ids):
+    """Save the analyses of still-open changesets and drop the ones that have closed"""
+    try:
+        conn = get_db()
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO replication_pending (id, analysis) VALUES (?, ?)',
+                [(int(cs_id), json.dumps(analysis)) for cs_id, analysis in analyses.items() if cs_id not in closed_ids]
+            )
+            conn.executemany('DELETE FROM replication_pending WHERE id = ?', [(int(cs_id),) for cs_id in closed_ids])
+    except Exception as e:
+        print(f"WARNING: Error storing pending replication analyses: {e}")
+
+def load_element_versions(element_type, refs):
+    """
+    Read stored element versions
+    refs: (element_id, version) string tuples
+    Returns dict mapping each stored ref to its element (parse_osm_element shape plus 'visible')
+    """
+    refs = list(refs)
+    records = {}
+    try:
+        conn = get_db()
+        for i in range(0, len(refs), CHANGESET_DB_BATCH // 2):
+            batch = refs[i:i + CHANGESET_DB_BATCH // 2]
+            conditions = ' OR '.join('(id = ? AND version = ?)' for _ in batch)
+            rows = conn.execute(
+                f'SELECT * FROM element_versions WHERE type = ? AND ({conditions})',
+                [element_type] + [int(value) for ref in batch for value in ref]
+            )
+            for row in rows:
+                records[(str(row['id']), str(row['version']))] = {
+                    'type': row['type'],
+                    'id': str(row['id']),
+                    'action': None,
+                    'version': str(row['version']),
+                    'changeset': str(row['changeset']) if row['changeset'] is not None else None,
+                    'lat': row['lat'],
+                    'lon': row['lon'],
+                    'tags': json.loads(row['tags']),
+                    'nodes': json.loads(row['nodes']),
+                    'members': json.loads(row['members']),
+                    'visible': bool(row['visible'])
+                }
+    except Exception as e:
+        print(f"WARNING: Error reading element versions: {e}")
+    return records
+
+def store_element_versions(records):
+    """Persist parsed elements (parse_osm_element shape; 'visible' defaults to true) by type, id and version"""
+    rows = [
+        (record['type'], int(record['id']), int(record['version']),
+         int(record['changeset']) if record.get('changeset') else None, int(record.get('visible', True)),
+         record['lat'], record['lon'], json.dumps(record['tags']), json.dumps(record['nodes']), json.dumps(record['members']))
+        for record in records if record.get('version')
+    ]
+    if not rows:
+        return
+    try:
+        conn = get_db()
+        with conn:
+            conn.executemany(
+                '''INSERT OR IGNORE INTO element_versions (type, id, version, changeset, visible, lat, lon, tags, nodes, members)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                rows
+            )
+    except Exception as e:
+        print(f"WARNING: Error storing {len(rows)} element versions: {e}")
+
+def load_comparison_bundle(changeset_id):
+    """Stored comparison (see build_changeset_comparison) for a changeset, or None"""
+    try:
+        row = get_db().execute('SELECT comparison FROM comparison_bundles WHERE id = ?', (int(changeset_id),)).fetchone()
+    except Exception as e:
+        print(f"WARNING: Error loading comparison for changeset {changeset_id}: {e}")
+        return None
+    return json.loads(row['comparison']) if row else None
+
+def load_comparison_bundle_ids(changeset_ids):
+    """Set of the given changeset ids (str) that have a stored comparison"""
+    ids = [int(cs_id) for cs_id in changeset_ids]
+    found = set()
+    try:
+        conn = get_db()
+        for i in range(0, len(ids), CHANGESET_DB_BATCH):
+            batch = ids[i:i + CHANGESET_DB_BATCH]
+            placeholders = ','.join('?' * len(batch))
+            rows = conn.execute(f'SELECT id FROM comparison_bundles WHERE id IN ({placeholders})', batch)
+            found.update(str(row['id']) for row in rows)
+    except Exception as e:
+        print(f"WARNING: Error reading comparison bundles: {e}")
+    return found
+
+def store_comparison_bundle(changeset_id, comparison):
+    """Persist the comparison of a closed changeset"""
+    try:
+        conn = get_db()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO comparison_bundles (id, comparison, built_at) VALUES (?, ?, ?)',
+                (int(changeset_id), json.dumps(comparison), datetime.now(timezone.utc).isoformat())
+            )
+    except Exception as e:
+        print(f"WARNING: Error storing comparison for changeset {changeset_id}: {e}")
+
+def load_comparison_job(changeset_id):
+    """Comparison job row for a changeset (node_coords decoded as 'node_table', metadata decoded), or None"""
+    try:
+        row = get_db().execute('SELECT * FROM comparison_jobs WHERE id = ?', (int(changeset_id),)).fetchone()
+    except Exception as e:
+        print(f"WARNING: Error loading comparison job for changeset {changeset_id}: {e}")
+        return None
+    if row is None:
+        return None
+    job = dict(row)
+    job['node_table'] = NodeTable.from_rows(json.loads(job.pop('node_coords') or '[]'))
+    job['metadata'] = json.loads(job['metadata']) if job['metadata'] else None
+    return job
+
+def load_comparison_job_ids(status):
+    """Ids (str) of the comparison jobs with a status"""
+    try:
+        rows = get_db().execute('SELECT id FROM comparison_jobs WHERE status = ?', (status,))
+        return [str(row['id']) for row in rows]
+    except Exception as e:
+        print(f"WARNING: Error reading comparison jobs: {e}")
+        return []
+
+def load_comparison_job_elements(changeset_id, cursor=0, limit=None, resolved=None):
+    """
+    Elements of a comparison job from seq `cursor` on, in download order, as
+    (seq, action, element) tuples. resolved=True stops at the first unresolved element,
+    resolved=False returns only unresolved ones
+    """
+    query = 'SELECT seq, action, element FROM comparison_job_elements WHERE job = ? AND seq >= ?'
+    params = [int(changeset_id), cursor]
+    if resolved is False:
+        query += ' AND resolved = 0'
+    elif resolved is True:
+        query += ' AND seq < COALESCE((SELECT MIN(seq) FROM comparison_job_elements WHERE job = ? AND resolved = 0), ?)'
+        params += [int(changeset_id), 1 << 62]
+    query += ' ORDER BY seq'
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(limit)
+    rows = get_db().execute(query, params)
+    return [(row['seq'], row['action'], json.loads(row['element'])) for row in rows]
+
+def create_comparison_job(changeset_id, records, node_table):
+    """Persist a new running job with its (action, element, resolved) records in download order"""
+    now = datetime.now(timezone.utc).isoformat()
+    conn = get_db()
+    with conn:
+        conn.execute('DELETE FROM comparison_job_elements WHERE job = ?', (int(changeset_id),))
+        conn.executemany(
+            'INSERT INTO comparison_job_elements (job, seq, action, element, resolved) VALUES (?, ?, ?, ?, ?)',
+            [(int(changeset_id), seq, action, json.dumps(element), int(resolved)) for seq, (action, element, resolved) in enumerate(records)]
+        )
+        conn.execute(
+            '''INSERT INTO comparison_jobs (id, status, total, resolved, node_coords, updated_at)
+               VALUES (?, 'running', ?, ?, ?, ?)
+               ON CONFLICT (id) DO UPDATE SET status = 'running', total = excluded.total, resolved = excluded.resolved,
+                   node_coords = excluded.node_coords, metadata = NULL, error = NULL, updated_at = excluded.updated_at''',
+            (int(changeset_id), len(records), sum(1 for record in records if record[2]), json.dumps(node_table.to_rows()), now)
+        )
+
+def start_comparison_job_attempt(changeset_id):
+    """Mark a comparison job running and count the attempt (see COMPARISON_JOB_MAX_ATTEMPTS)"""
+    try:
+        conn = get_db()
+        with conn:
+            conn.execute(
+                '''INSERT INTO comparison_jobs (id, status, attempts, updated_at) VALUES (?, 'running', 1, ?)
+                   ON CONFLICT (id) DO UPDATE SET status = 'running', error = NULL, attempts = attempts + 1,
+                       updated_at = excluded.updated_at''',
+                (int(changeset_id), datetime.now(timezone.utc).isoformat())
+            )
+    except Exception as e:
+        print(f"WARNING: Error storing comparison job status for changeset {changeset_id}: {e}")
+
+def store_comparison_job_progress(changeset_id, elements, retry_seqs=()):
+    """
+    Mark (seq, action, element) tuples of a job as resolved, saving their enriched elements,
+    and count a failed attempt for the elements in retry_seqs (left unresolved)
+    """
+    conn = get_db()
+    with conn:
+        conn.executemany(
+            'UPDATE comparison_job_elements SET element = ?, resolved = 1 WHERE job = ? AND seq = ?',
+            [(json.dumps(element), int(changeset_id), seq) for seq, action, element in elements]
+        )
+        conn.executemany(
+            'UPDATE comparison_job_elements SET attempts = attempts + 1 WHERE job = ? AND seq = ?',
+            [(int(changeset_id), seq) for seq in retry_seqs]
+        )
+        conn.execute(
+            '''UPDATE comparison_jobs SET updated_at = ?,
+                   resolved = (SELECT COUNT(*) FROM comparison_job_elements WHERE job = ? AND resolved = 1)
+               WHERE id = ?''',
+            (datetime.now(timezone.utc).isoformat(), int(changeset_id), int(changeset_id))
+        )
+
+def count_exhausted_comparison_job_elements(changeset_id, max_attempts):
+    """Unresolved elements of a job that have failed max_attempts times or more"""
+    return get_db().execute(
+        'SELECT COUNT(*) FROM comparison_job_elements WHERE job = ? AND resolved = 0 AND attempts >= ?',
+        (int(changeset_id), max_attempts)
+    ).fetchone()[0]
+
+def finish_comparison_job(changeset_id, status, metadata=None, error=None):
+    """Record the end of a comparison job ('complete' with metadata, or 'failed' with an error)"""
+    try:
+        conn = get_db()
+        with conn:
+            conn.execute(
+                '''INSERT INTO comparison_jobs (id, status, metadata, error, updated_at) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (id) DO UPDATE SET status = excluded.status, metadata = excluded.metadata,
+                       error = excluded.error, updated_at = excluded.updated_at''',
+                (int(changeset_id), status, json.dumps(metadata) if metadata is not None else None, error,
+                 datetime.now(timezone.utc).isoformat())
+            )
+    except Exception as e:
+        print(f"WARNING: Error storing comparison job status for changeset {changeset_id}: {e}")
+
+def clear_stored_analyses():
+    """Drop stored analyses so changesets are downloaded and analyzed again. Returns the count"""
+    try:
+        conn = get_db()
+        with conn:
+            return conn.execute('UPDATE changesets SET analysis = NULL, analyzed_at = NULL WHERE analysis IS NOT NULL').rowcount
+    except Exception as e:
+        print(f"WARNING: Error clearing changeset store: {e}")
+        return 0
+
 def send_slack_notification(changeset):
     """Send Slack notification for needs_review changesets"""
     # Get Slack settings from saved settings (preferred) or environment variables (fallback)
-    settings = load_settings()
+    settings = get_settings_snapshot()
     slack_settings = settings.get('slack', {})
     
     # Get webhook URL from settings first, then fall back to environment variable
@@ -639,12 +1608,11 @@ else:
 
 @app.route('/api/cache/clear')
 def clear_cache():
-    """Clear the changeset details cache"""
-    global changeset_details_cache, erp_cache
-    count = len(changeset_details_cache)
-    changeset_details_cache.clear()
-    erp_cache.clear()
-    return jsonify({'success': True, 'message': f'Cleared {count} cached changesets'})
+    """Clear the changeset analysis cache (in memory and in the changeset store)"""
+    count = len(changeset_analysis_cache)
+    changeset_analysis_cache.clear()
+    stored_count = clear_stored_analyses()
+    return jsonify({'success': True, 'message': f'Cleared {count} cached changesets ({stored_count} stored analyses)'})
 
 @app.route('/api/test/slack', methods=['POST'])
 def test_slack_notification():
@@ -815,227 +1783,403 @@ VALIDATION_THRESHOLDS = {
     'mass_changes_threshold': 50,  # Default: 50+ total changes (created + modified + deleted) triggers "needs review"
 }
 
-def is_changeset_in_region(changeset, region_id=None):
+def changeset_centers(changesets):
     """
-    Check if a changeset is primarily within a region using polygon-based filtering.
-    Returns True if the changeset's center point is within the region's actual boundaries.
-    This is more accurate than rectangular bounding box.
-    
-    Args:
-        changeset: The changeset data dict
-        region_id: The region to check against (defaults to current region)
+    Bounding-box centers of changesets as NumPy arrays (lons, lats)
+    Changesets without a complete bbox get NaN, which never falls inside a polygon
+    """
+    lons = np.full(len(changesets), np.nan)
+    lats = np.full(len(changesets), np.nan)
+    for i, cs in enumerate(changesets):
+        bbox = cs.get('bbox')
+        if bbox and None not in (bbox.get('min_lat'), bbox.get('max_lat'), bbox.get('min_lon'), bbox.get('max_lon')):
+            lons[i] = (bbox['min_lon'] + bbox['max_lon']) / 2
+            lats[i] = (bbox['min_lat'] + bbox['max_lat']) / 2
+    return lons, lats
+
+def changesets_in_region_mask(changesets, region_id=None):
+    """
+    Boolean NumPy array: is each changeset primarily within the region?
+    A changeset is in the region when its bbox center is inside the region's polygon.
+    Regions without a polygon include everything; changesets without a bbox are excluded
     """
     region_id = region_id or CURRENT_REGION
     polygon = get_region_polygon(region_id)
     
     # If no polygon for this region, we can't filter - include all
     if polygon is None:
-        return True
+        return np.ones(len(changesets), dtype=bool)
     
-    bbox = changeset.get('bbox')
+    lons, lats = changeset_centers(changesets)
+    # Note: Shapely uses (longitude, latitude) order
+    return shapely.contains_xy(polygon, lons, lats)
+
+def filter_changesets_in_region(changesets, region_id=None):
+    """Changesets that are primarily within a region (see changesets_in_region_mask)"""
+    mask = changesets_in_region_mask(changesets, region_id)
+    return [cs for cs, inside in zip(changesets, mask) if inside]
+
+def assign_changesets_to_regions(changesets, regions=None):
+    """
+    Assign changesets to every region they are primarily within, in one spatial-index query
+    Same rule as changesets_in_region_mask, for all regions at once
+    Returns dict mapping region id -> list of changesets (input order)
+    """
+    regions = list(regions) if regions is not None else list(REGIONS)
+    assigned = {region_id: [] for region_id in regions}
     
-    # If no bbox, we can't determine location - exclude it
-    if not bbox or not all([bbox.get('min_lat'), bbox.get('max_lat'), 
-                            bbox.get('min_lon'), bbox.get('max_lon')]):
-        return False
+    # Regions without a polygon can't filter - they include everything
+    for region_id in regions:
+        if get_region_polygon(region_id) is None:
+            assigned[region_id] = list(changesets)
     
-    # Calculate the center point of the changeset
-    center_lat = (bbox['min_lat'] + bbox['max_lat']) / 2
-    center_lon = (bbox['min_lon'] + bbox['max_lon']) / 2
+    if REGION_TREE is None or not changesets:
+        return assigned
     
-    # Create a Shapely Point and check if it's within region polygon
-    # Note: Shapely uses (longitude, latitude) order
-    point = Point(center_lon, center_lat)
-    is_within = polygon.contains(point)
+    lons, lats = changeset_centers(changesets)
+    # Pairs of (changeset index, tree index) where the center lies within the region polygon
+    cs_indexes, tree_indexes = REGION_TREE.query(shapely.points(lons, lats), predicate='within')
+    for cs_idx, tree_idx in sorted(zip(cs_indexes.tolist(), tree_indexes.tolist())):
+        region_id = REGION_TREE_IDS[tree_idx]
+        if region_id in assigned and get_region_polygon(region_id) is not None:
+            assigned[region_id].append(changesets[cs_idx])
+    return assigned
+
+def is_changeset_in_region(changeset, region_id=None):
+    """
+    Check if a changeset is primarily within a region using polygon-based filtering.
+    Returns True if the changeset's center point is within the region's actual boundaries.
+    This is more accurate than rectangular bounding box.
+    Use changesets_in_region_mask/filter_changesets_in_region for many changesets.
     
-    return is_within
+    Args:
+        changeset: The changeset data dict
+        region_id: The region to check against (defaults to current region)
+    """
+    return bool(changesets_in_region_mask([changeset], region_id)[0])
 
 # Legacy function for backward compatibility
 def is_changeset_in_singapore(changeset):
     """Legacy wrapper - checks if changeset is in Singapore region"""
     return is_changeset_in_region(changeset, 'singapore')
 
-# Cache for ERP (name=ERP) checks
-erp_cache = {}
+# Tag keys that count as access restrictions when edited on a road
+ACCESS_TAG_KEYS = {
+    'access', 'vehicle', 'motor_vehicle', 'motorcar', 'motorcycle', 'moped',
+    'bicycle', 'foot', 'pedestrian', 'horse', 'bus', 'taxi', 'hgv', 'psv',
+    'emergency', 'delivery', 'agricultural', 'forestry', 'destination',
+    'hov', 'caravan', 'car', 'truck', 'mofa',
+    'motorcycle:sidecar', 'motor_vehicle:conditional', 'vehicle:conditional',
+    'bicycle:conditional', 'foot:conditional', 'access:conditional'
+}
 
-def check_changeset_has_erp(changeset_id):
+# oneway values that mean the road is actually one-way ('no', 'reversible', etc. are ignored)
+ONEWAY_VALUES = {'yes', '1', '-1', 'true'}
+
+# osmChange block tag -> action key used throughout the dashboard
+OSMCHANGE_ACTIONS = {'create': 'created', 'modify': 'modified', 'delete': 'deleted'}
+
+# Tag-based validation rules. Each rule declares what it looks at:
+#   tag_keys: tag keys that trigger the rule
+#   values: accepted tag values (None = any value)
+#   element_types: node/way/relation (None = any type)
+#   routing_only: only count roads (see is_routing_element)
+#   match_case: compare keys and values exactly instead of case-insensitively
+# An element counts once per rule however many of its tags match
+BUILTIN_VALIDATION_RULES = [
+    {
+        # ERP gantries can be nodes, ways or relations
+        'name': 'erp', 'tag_keys': ['name'], 'values': ['ERP'], 'element_types': None,
+        'routing_only': False, 'match_case': True,
+        'reason': 'ERP modification detected: {count} ERP element(s) modified'
+    },
+    {
+        'name': 'oneway', 'tag_keys': ['oneway'], 'values': sorted(ONEWAY_VALUES), 'element_types': None,
+        'routing_only': True, 'match_case': False,
+        'reason': 'One-way edit detected: {count} one-way element(s)'
+    },
+    {
+        'name': 'access', 'tag_keys': sorted(ACCESS_TAG_KEYS), 'values': None, 'element_types': None,
+        'routing_only': True, 'match_case': False,
+        'reason': 'Access tag edit detected: {count} element(s) with access tags'
+    }
+]
+
+# Criteria that aren't tag rules (evaluated from the changeset details)
+NON_TAG_CRITERIA = {'mass_changes'}
+
+# Names custom rules can't use
+RESERVED_RULE_NAMES = NON_TAG_CRITERIA | {rule['name'] for rule in BUILTIN_VALIDATION_RULES}
+
+# Compiled rule set for the current settings snapshot: (snapshot, compiled)
+compiled_rules_cache = None
+
+def custom_rule_error(rule, used_names):
+    """Why a custom rule definition is invalid (see BUILTIN_VALIDATION_RULES for the fields), or None"""
+    if not isinstance(rule, dict) or not isinstance(rule.get('name'), str) or not rule['name']:
+        return 'Each custom rule needs a name'
+    if rule['name'] in used_names:
+        return f'Custom rule name {rule["name"]} is already in use'
+    tag_keys = rule.get('tag_keys')
+    if not isinstance(tag_keys, list) or not tag_keys or not all(isinstance(key, str) and key for key in tag_keys):
+        return f'Custom rule {rule["name"]} needs a list of tag_keys'
+    for field in ('values', 'element_types'):
+        if rule.get(field) is not None and not isinstance(rule[field], list):
+            return f'Custom rule {rule["name"]}: {field} must be a list'
+    if rule.get('element_types') and not set(rule['element_types']) <= {'node', 'way', 'relation'}:
+        return f'Custom rule {rule["name"]}: element_types must be node, way or relation'
+    for field in ('reason', 'label'):
+        if rule.get(field) is not None and not isinstance(rule[field], str):
+            return f'Custom rule {rule["name"]}: {field} must be a string'
+    # {count} is the only placeholder filled in when the rule's reason is reported
+    if rule.get('reason') and ('{' in rule['reason'].replace('{count}', '') or '}' in rule['reason'].replace('{count}', '')):
+        return f'Custom rule {rule["name"]}: reason can only contain the {{count}} placeholder'
+    return None
+
+def load_custom_rules(settings):
     """
-    Check if a changeset modifies any elements with name=ERP tag
-    Returns: tuple (has_erp, count) where count is number of ERP elements modified
-    Uses cache to avoid repeated API calls
+    Valid custom rules of a settings snapshot (validation.custom_rules), as plain dicts
+    Hand-edited or older-format entries are skipped with a warning instead of breaking validation
+    """
+    custom_rules = settings.get('validation', {}).get('custom_rules', ())
+    if not isinstance(custom_rules, (list, tuple)):
+        print("WARNING: Ignoring custom_rules in settings: not a list")
+        return []
+    rules = []
+    used_names = set(RESERVED_RULE_NAMES)
+    for rule in custom_rules:
+        rule = thaw_settings(rule)
+        error = custom_rule_error(rule, used_names)
+        if error:
+            print(f"WARNING: Ignoring custom rule in settings: {error}")
+            continue
+        used_names.add(rule['name'])
+        rules.append(rule)
+    return rules
+
+def normalize_validation_rule(rule):
+    """Fill in defaults for a rule definition (built-in or custom from settings)"""
+    match_case = bool(rule.get('match_case', False))
+    fold = (lambda text: text) if match_case else (lambda text: text.lower())
+    values = rule.get('values')
+    element_types = rule.get('element_types')
+    return {
+        'name': rule['name'],
+        'tag_keys': sorted({fold(key) for key in rule['tag_keys']}),
+        'values': sorted({fold(str(value)) for value in values}) if values else None,
+        'element_types': sorted(element_types) if element_types else None,
+        'routing_only': bool(rule.get('routing_only', False)),
+        'match_case': match_case,
+        'reason': str(rule['reason']) if rule.get('reason') else f"{rule.get('label') or rule['name']} detected: {{count}} element(s)"
+    }
+
+def compile_validation_rules(rules):
     """
-    # Check cache first
-    if changeset_id in erp_cache:
-        cached_result = erp_cache[changeset_id]
-        return cached_result[0], cached_result[1]
+    Compile rules into a dispatch table (tag key -> rules) so every element is checked
+    against all rules in a single pass over its tags
+    Returns dict with 'rules' (normalized, in order), 'by_key' and 'signature'. The signature
+    identifies the rule set an analysis was computed with
+    """
+    normalized = [normalize_validation_rule(rule) for rule in rules]
+    by_key = {}
+    for rule in normalized:
+        for key in rule['tag_keys']:
+            by_key.setdefault(key.lower(), []).append(rule)
     
-    try:
-        url = f"https://api.openstreetmap.org/api/0.6/changeset/{changeset_id}/download"
-        headers = {'User-Agent': 'ATLAS-Singapore/1.0'}
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # Parse XML to check for name=ERP tags
-        root = ET.fromstring(response.content)
-        
-        erp_count = 0
-        
-        # Check all actions (create, modify, delete)
-        for action in ['create', 'modify', 'delete']:
-            action_elems = root.findall(action)
-            
-            for action_elem in action_elems:
-                # Check all element types (node, way, relation)
-                for elem_type in ['node', 'way', 'relation']:
-                    elements = action_elem.findall(elem_type)
-                    
-                    for elem in elements:
-                        # Check all tags for name=ERP
-                        tags = elem.findall('tag')
-                        for tag in tags:
-                            if tag.get('k') == 'name' and tag.get('v') == 'ERP':
-                                erp_count += 1
-                                break  # Count each element only once
+    definition = json.dumps([{k: v for k, v in rule.items() if k != 'reason'} for rule in normalized], sort_keys=True)
+    return {
+        'rules': normalized,
+        'by_key': by_key,
+        'signature': hashlib.sha1(definition.encode('utf-8')).hexdigest()[:12]
+    }
+
+BUILTIN_RULES_SIGNATURE = compile_validation_rules(BUILTIN_VALIDATION_RULES)['signature']
+
+def get_validation_rules(settings=None):
+    """
+    Compiled built-in + custom rules (settings validation.custom_rules) for a settings snapshot
+    Recompiled only when the snapshot changes; 'custom_rules' holds the valid custom rule definitions
+    """
+    global compiled_rules_cache
+    settings = settings or get_settings_snapshot()
+    cached = compiled_rules_cache
+    if cached is not None and cached[0] is settings:
+        return cached[1]
+    
+    custom_rules = load_custom_rules(settings)
+    compiled = compile_validation_rules(BUILTIN_VALIDATION_RULES + custom_rules)
+    compiled['custom_rules'] = custom_rules
+    compiled_rules_cache = (settings, compiled)
+    return compiled
+
+def match_validation_rules(element, compiled, is_routing):
+    """Names of the rules an element matches (one dispatch-table lookup per tag)"""
+    matched = set()
+    for key, value in element['tags'].items():
+        if not key:
+            continue
+        for rule in compiled['by_key'].get(key.lower(), ()):
+            if rule['name'] in matched:
+                continue
+            if rule['routing_only'] and not is_routing:
+                continue
+            if rule['element_types'] and element['type'] not in rule['element_types']:
+                continue
+            if rule['match_case']:
+                if key not in rule['tag_keys'] or (rule['values'] and str(value) not in rule['values']):
+                    continue
+            elif rule['values'] and str(value).lower() not in rule['values']:
+                continue
+            matched.add(rule['name'])
+    return matched
+
+# Cache for changeset analyses (details + validation findings) to avoid repeated downloads
+# Closed changesets never change, so entries only leave by eviction (the store keeps them all)
+changeset_analysis_cache = TTLCache('changeset_analysis', max_entries=5000, max_bytes=8 * 1024 * 1024)
+
+def analyze_osmchange(elements, compiled=None):
+    """
+    Walk the elements of an osmChange document once (as yielded by iter_osmchange_elements)
+    and collect everything the dashboard needs: routing element counts (same shape as
+    fetch_changeset_details) plus the number of elements matching each validation rule
+    ('rule_counts'; erp/oneway/access are also kept as erp_count etc.)
+    """
+    compiled = compiled or get_validation_rules()
+    stats = {
+        'created': {'node': 0, 'way': 0, 'relation': 0},
+        'modified': {'node': 0, 'way': 0, 'relation': 0},
+        'deleted': {'node': 0, 'way': 0, 'relation': 0}
+    }
+    rule_counts = {rule['name']: 0 for rule in compiled['rules']}
+    
+    for element in elements:
+        # FILTER: Only count elements that affect routing (roads - ways with highway tag)
+        is_routing = is_routing_element(element)
+        if is_routing:
+            stats[element['action']]['way'] += 1
         
-        # Cache the result
-        has_erp = erp_count > 0
-        erp_cache[changeset_id] = (has_erp, erp_count)
+        if element['tags']:
+            for name in match_validation_rules(element, compiled, is_routing):
+                rule_counts[name] += 1
+    
+    # Calculate totals
+    stats['total_created'] = sum(stats['created'].values())
+    stats['total_modified'] = sum(stats['modified'].values())
+    stats['total_deleted'] = sum(stats['deleted'].values())
+    
+    return {
+        'details': stats,
+        'rule_counts': rule_counts,
+        'rules_signature': compiled['signature'],
+        'erp_count': rule_counts.get('erp', 0),
+        'oneway_count': rule_counts.get('oneway', 0),
+        'access_count': rule_counts.get('access', 0)
+    }
+
+def is_analysis_current(analysis):
+    """Was the analysis computed with the current rule set? (older ones used the built-ins)"""
+    return analysis.get('rules_signature', BUILTIN_RULES_SIGNATURE) == get_validation_rules()['signature']
+
+def current_analysis_ids(changeset_ids):
+    """Ids (of those given) whose cached or stored analysis was made with the current rules"""
+    ids = list(changeset_ids)
+    missing = [cs_id for cs_id in ids if cs_id not in changeset_analysis_cache]
+    if missing:
+        changeset_analysis_cache.update(load_stored_analyses(missing))
+    current = set()
+    for cs_id in ids:
+        analysis = changeset_analysis_cache.get(cs_id)
+        if analysis and is_analysis_current(analysis):
+            current.add(cs_id)
+    return current
+
+def get_rule_counts(analysis):
+    """Rule match counts of an analysis, including analyses stored before rule_counts existed"""
+    if 'rule_counts' in analysis:
+        return analysis['rule_counts']
+    return {
+        'erp': analysis.get('erp_count', 0),
+        'oneway': analysis.get('oneway_count', 0),
+        'access': analysis.get('access_count', 0)
+    }
+
+def fetch_changeset_analysis(changeset_id):
+    """
+    Download a changeset's osmChange once and analyze it (see analyze_osmchange)
+    Shared by fetch_changeset_details and all validation checks so each changeset
+    costs a single download. Returns the analysis dict or None on failure
+    """
+    # Check cache first, then the persistent store (re-analyze if the rules changed since)
+    cached = changeset_analysis_cache.get(changeset_id)
+    if cached and is_analysis_current(cached):
+        return cached
+    
+    stored = load_stored_analyses([changeset_id])
+    if changeset_id in stored and is_analysis_current(stored[changeset_id]):
+        changeset_analysis_cache.set(changeset_id, stored[changeset_id])
+        return stored[changeset_id]
+    
+    try:
+        with osm_get(f"/changeset/{changeset_id}/download", timeout='download', stream=True) as response:
+            response.raise_for_status()
+            analysis = analyze_osmchange(iter_osmchange_elements(response))
         
-        return has_erp, erp_count
+        # Cache the result (changesets only reach here once closed, so only rule changes make it stale)
+        changeset_analysis_cache.set(changeset_id, analysis)
+        store_changeset_analysis(changeset_id, analysis)
+        return analysis
         
     except Exception as e:
-        print(f"Error checking name=ERP for changeset {changeset_id}: {e}")
-        # Cache negative result to avoid retrying failed requests
-        erp_cache[changeset_id] = (False, 0)
-        return False, 0
+        print(f"Error analyzing changeset {changeset_id}: {e}")
+        return None
+
+def check_changeset_has_erp(changeset_id):
+    """
+    Check if a changeset modifies any elements with name=ERP tag
+    Returns: tuple (has_erp, count) where count is number of ERP elements modified
+    """
+    analysis = fetch_changeset_analysis(changeset_id)
+    erp_count = analysis['erp_count'] if analysis else 0
+    return erp_count > 0, erp_count
 
 def check_changeset_has_oneway(changeset_id):
     """
     Check if a changeset contains any one-way edits
     Returns: (has_oneway: bool, count: int)
     """
-    # Check cache first
-    cache_key = f'oneway_{changeset_id}'
-    if cache_key in erp_cache:
-        cached_result = erp_cache[cache_key]
-        return cached_result
-    
-    try:
-        url = f"https://api.openstreetmap.org/api/0.6/changeset/{changeset_id}/download"
-        headers = {'User-Agent': 'ATLAS-Singapore/1.0'}
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        root = ET.fromstring(response.content)
-        oneway_count = 0
-        
-        # Check all actions (create, modify, delete)
-        for action in ['create', 'modify', 'delete']:
-            action_elems = root.findall(action)
-            for action_elem in action_elems:
-                # Check ways (roads) for oneway tags
-                ways = action_elem.findall('way')
-                for way in ways:
-                    # Only check routing elements (roads)
-                    if not is_routing_element(way):
-                        continue
-                    
-                    # Check for oneway tag
-                    for tag in way.findall('tag'):
-                        if tag.get('k') == 'oneway':
-                            oneway_value = tag.get('v', '').lower()
-                            # oneway can be 'yes', 'no', '1', '-1', 'reversible', etc.
-                            if oneway_value in ['yes', '1', '-1', 'true']:
-                                oneway_count += 1
-                                break
-        
-        has_oneway = oneway_count > 0
-        result = (has_oneway, oneway_count)
-        erp_cache[cache_key] = result
-        return result
-        
-    except Exception as e:
-        print(f"Error checking oneway for changeset {changeset_id}: {e}")
-        # Cache negative result to avoid retrying failed requests
-        erp_cache[cache_key] = (False, 0)
-        return False, 0
+    analysis = fetch_changeset_analysis(changeset_id)
+    oneway_count = analysis['oneway_count'] if analysis else 0
+    return oneway_count > 0, oneway_count
 
 def check_changeset_has_access_tags(changeset_id):
     """
     Check if a changeset contains any access tag edits
     Returns: (has_access_tags: bool, count: int)
     """
-    # Check cache first
-    cache_key = f'access_{changeset_id}'
-    if cache_key in erp_cache:
-        cached_result = erp_cache[cache_key]
-        return cached_result
-    
-    try:
-        url = f"https://api.openstreetmap.org/api/0.6/changeset/{changeset_id}/download"
-        headers = {'User-Agent': 'ATLAS-Singapore/1.0'}
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        root = ET.fromstring(response.content)
-        access_count = 0
-        
-        # List of access-related tags to check
-        access_tags = [
-            'access', 'vehicle', 'motor_vehicle', 'motorcar', 'motorcycle', 'moped',
-            'bicycle', 'foot', 'pedestrian', 'horse', 'bus', 'taxi', 'hgv', 'psv',
-            'emergency', 'delivery', 'agricultural', 'forestry', 'destination',
-            'hov', 'caravan', 'car', 'truck', 'motorcycle', 'moped', 'mofa',
-            'motorcycle:sidecar', 'motor_vehicle:conditional', 'vehicle:conditional',
-            'bicycle:conditional', 'foot:conditional', 'access:conditional'
-        ]
-        
-        # Check all actions (create, modify, delete)
-        for action in ['create', 'modify', 'delete']:
-            action_elems = root.findall(action)
-            for action_elem in action_elems:
-                # Check ways (roads) for access tags
-                ways = action_elem.findall('way')
-                for way in ways:
-                    # Only check routing elements (roads)
-                    if not is_routing_element(way):
-                        continue
-                    
-                    # Check for any access-related tags
-                    for tag in way.findall('tag'):
-                        tag_key = tag.get('k', '').lower()
-                        # Check if this is an access-related tag
-                        if tag_key in access_tags:
-                            access_count += 1
-                            break
-        
-        has_access_tags = access_count > 0
-        result = (has_access_tags, access_count)
-        erp_cache[cache_key] = result
-        return result
-        
-    except Exception as e:
-        print(f"Error checking access tags for changeset {changeset_id}: {e}")
-        # Cache negative result to avoid retrying failed requests
-        erp_cache[cache_key] = (False, 0)
-        return False, 0
-
-def get_validation_criteria():
-    """Get enabled validation criteria from settings"""
-    settings = load_settings()
+    analysis = fetch_changeset_analysis(changeset_id)
+    access_count = analysis['access_count'] if analysis else 0
+    return access_count > 0, access_count
+
+def get_validation_criteria(settings=None):
+    """Get enabled validation criteria from settings (a snapshot can be passed in)"""
+    settings = settings or get_settings_snapshot()
     criteria = settings.get('validation', {}).get('criteria', {})
     # Default to True if not specified (backward compatibility)
-    return {
+    enabled = {
         'mass_changes': criteria.get('mass_changes', True),
         'erp': criteria.get('erp', True),
         'oneway': criteria.get('oneway', True),
         'access': criteria.get('access', True)
     }
+    # Custom rules are enabled unless switched off in criteria or on the rule itself
+    for rule in get_validation_rules(settings)['custom_rules']:
+        enabled[rule['name']] = criteria.get(rule['name'], True) and rule.get('enabled', True)
+    return enabled
 
-def validate_changeset(changeset):
+def validate_changeset(changeset, analysis=None):
     """
     Validate a changeset to detect patterns needing review
+    analysis: precomputed analysis (see analyze_osmchange) - fetched when not given
     Returns: dict with 'status' (valid/needs_review) and 'reasons' list
     """
     validation = {
@@ -1044,11 +2188,13 @@ def validate_changeset(changeset):
         'flags': []
     }
     
+    # One settings snapshot for the whole validation
+    settings = get_settings_snapshot()
+    
     # Check if user is in trusted users list
     user = changeset.get('user', '')
     if user:
-        settings = load_settings()
-        trusted_users = settings.get('trusted_users', [])
+        trusted_users = settings.get('trusted_users', ())
         if user in trusted_users:
             # Return early with valid status - trusted users don't need review
             return validation
@@ -1059,7 +2205,7 @@ def validate_changeset(changeset):
         return validation
     
     # Get enabled criteria from settings
-    criteria = get_validation_criteria()
+    criteria = get_validation_criteria(settings)
     
     details = changeset.get('details', {})
     
@@ -1072,7 +2218,7 @@ def validate_changeset(changeset):
             total_changes = total_created + total_modified + total_deleted
             
             # Get current threshold from settings
-            threshold = get_validation_threshold()
+            threshold = get_validation_threshold(settings)
             
             # Check for mass changes (additions, modifications, or deletions)
             if total_changes >= threshold:
@@ -1088,32 +2234,22 @@ def validate_changeset(changeset):
                 validation['reasons'].append(f'Mass changes detected: {change_summary} (total: {total_changes} elements)')
                 validation['flags'].append('mass_changes')
     
-    # Check for various patterns that need review
+    # Check tag-based rules (built-in ERP/one-way/access plus custom rules from settings)
+    compiled = get_validation_rules(settings)
+    enabled_rules = [rule for rule in compiled['rules'] if criteria.get(rule['name'], True)]
     cs_id = changeset.get('id')
-    if cs_id:
-        # Check for name=ERP modifications (if enabled)
-        if criteria.get('erp', True):
-            has_erp, erp_count = check_changeset_has_erp(cs_id)
-            if has_erp:
-                validation['status'] = 'needs_review'
-                validation['reasons'].append(f'ERP modification detected: {erp_count} ERP element(s) modified')
-                validation['flags'].append('erp')
-        
-        # Check for one-way edits (if enabled)
-        if criteria.get('oneway', True):
-            has_oneway, oneway_count = check_changeset_has_oneway(cs_id)
-            if has_oneway:
-                validation['status'] = 'needs_review'
-                validation['reasons'].append(f'One-way edit detected: {oneway_count} one-way element(s)')
-                validation['flags'].append('oneway')
-        
-        # Check for access tag edits (if enabled)
-        if criteria.get('access', True):
-            has_access, access_count = check_changeset_has_access_tags(cs_id)
-            if has_access:
+    if cs_id and enabled_rules:
+        # All rules share one download/analysis of the changeset
+        if analysis is None:
+            analysis = fetch_changeset_analysis(cs_id) or {}
+        rule_counts = get_rule_counts(analysis)
+        
+        for rule in enabled_rules:
+            count = rule_counts.get(rule['name'], 0)
+            if count > 0:
                 validation['status'] = 'needs_review'
-                validation['reasons'].append(f'Access tag edit detected: {access_count} element(s) with access tags')
-                validation['flags'].append('access')
+                validation['reasons'].append(rule['reason'].replace('{count}', str(count)))
+                validation['flags'].append(rule['name'])
     
     return validation
 
@@ -1161,186 +2297,151 @@ def fetch_changeset_details(changeset_id):
     Fetch detailed statistics for a specific changeset
     Returns dict with created, modified, deleted counts for nodes, ways, relations
     """
-    # Check cache first
-    if changeset_id in changeset_details_cache:
-        return changeset_details_cache[changeset_id]
-    
+    analysis = fetch_changeset_analysis(changeset_id)
+    return analysis['details'] if analysis else None
+
+def parse_osm_timestamp(value):
+    """
+    Epoch seconds for an OSM timestamp ('YYYY-MM-DDTHH:MM:SSZ'), or None if empty/invalid
+    OSM always uses this fixed format, so fromisoformat is enough (and much faster than dateutil)
+    """
+    if not value:
+        return None
     try:
-        url = f"https://api.openstreetmap.org/api/0.6/changeset/{changeset_id}/download"
-        headers = {'User-Agent': 'ATLAS-Singapore/1.0'}
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # Parse XML to count different types of changes
-        root = ET.fromstring(response.content)
-        
-        stats = {
-            'created': {'node': 0, 'way': 0, 'relation': 0},
-            'modified': {'node': 0, 'way': 0, 'relation': 0},
-            'deleted': {'node': 0, 'way': 0, 'relation': 0}
-        }
-        
-        # Note: OSM API can return multiple <create>/<modify>/<delete> tags
-        # We need to use findall() to get ALL of them, not just find() which gets the first one
-        # FILTER: Only count elements that affect routing (roads - ways with highway tag)
-        for action in ['create', 'modify', 'delete']:
-            action_key = 'created' if action == 'create' else 'modified' if action == 'modify' else 'deleted'
-            
-            # Find ALL action elements (there can be multiple <create>, <modify>, <delete> tags)
-            action_elems = root.findall(action)
-            
-            for action_elem in action_elems:
-                # Only process ways (roads) - nodes and relations don't affect routing directly
-                ways = action_elem.findall('way')
-                for way in ways:
-                    # Only count if it's a routing element (has highway tag)
-                    if is_routing_element(way):
-                        stats[action_key]['way'] += 1
-        
-        # Calculate totals
-        stats['total_created'] = sum(stats['created'].values())
-        stats['total_modified'] = sum(stats['modified'].values())
-        stats['total_deleted'] = sum(stats['deleted'].values())
-        
-        # Cache the result
-        changeset_details_cache[changeset_id] = stats
-        return stats
-        
-    except Exception as e:
-        print(f"Error fetching details for changeset {changeset_id}: {e}")
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+    except ValueError:
         return None
 
-def fetch_osm_changesets(bbox=None, limit=200, region=None, time_range_hours=None):
-    """
-    Fetch changesets from OpenStreetMap API for a given bounding box.
-    Uses optimized parallel fetching for speed.
+def add_changeset_timestamps(cs):
+    """Set created_ts/closed_ts (epoch seconds) from the changeset's timestamp strings"""
+    cs['created_ts'] = parse_osm_timestamp(cs.get('created_at'))
+    cs['closed_ts'] = parse_osm_timestamp(cs.get('closed_at'))
+    return cs
+
+def parse_changeset_element(changeset):
+    """Parse a <changeset> element (changeset list API or changeset replication file) into dashboard format"""
+    cs_id = changeset.get('id')
+    user = changeset.get('user', 'Anonymous')
+    uid = changeset.get('uid', '')
+    created_at = changeset.get('created_at', '')
+    closed_at = changeset.get('closed_at', '')
+    num_changes = changeset.get('num_changes', '0')
+    min_lat = changeset.get('min_lat', '')
+    max_lat = changeset.get('max_lat', '')
+    min_lon = changeset.get('min_lon', '')
+    max_lon = changeset.get('max_lon', '')
     
-    Args:
-        bbox: Bounding box string (defaults to current region's bbox)
-        limit: Maximum number of changesets to return
-        region: Region ID to filter by (defaults to current region)
-        time_range_hours: Hours to look back (defaults to CHANGESET_TIME_RANGE_HOURS, use None for all history)
-    """
-    # Use provided region, or fall back to current region
-    region = region or CURRENT_REGION
+    # Get tags (comments, etc.)
+    tags = {}
+    for tag in changeset.findall('tag'):
+        tags[tag.get('k')] = tag.get('v')
     
-    # Use provided bbox, or get it from the region config
+    # Format the changeset data (timestamps are parsed once here - see add_changeset_timestamps)
+    return {
+        'id': cs_id,
+        'user': user,
+        'uid': uid,
+        'created_at': created_at,
+        'closed_at': closed_at,
+        'created_ts': parse_osm_timestamp(created_at),
+        'closed_ts': parse_osm_timestamp(closed_at),
+        'num_changes': int(num_changes),
+        'comment': tags.get('comment', 'No comment'),
+        'created_by': tags.get('created_by', 'Unknown'),
+        'bbox': {
+            'min_lat': float(min_lat) if min_lat else None,
+            'max_lat': float(max_lat) if max_lat else None,
+            'min_lon': float(min_lon) if min_lon else None,
+            'max_lon': float(max_lon) if max_lon else None,
+        } if min_lat and max_lat and min_lon and max_lon else None,
+        'tags': tags
+    }
+
+def fetch_changeset_list(region, bbox=None, limit=200, start_time=None, end_time=None, raise_errors=False):
+    """
+    Page backwards through the OSM changeset list for a bounding box
+    Returns changesets closed after start_time and created before end_time (default now)
+    that are primarily within the region, newest first, at most `limit`
+    Only changeset metadata is fetched - see enrich_changesets and apply_validation
+    """
+    return fetch_region_changesets([region], bbox=bbox, limit=limit, start_time=start_time, end_time=end_time,
+                                   raise_errors=raise_errors)[region]
+
+def fetch_region_changesets(regions, bbox=None, limit=200, start_time=None, end_time=None, raise_errors=False):
+    """
+    Page backwards through the OSM changeset list for several regions and assign each
+    changeset to every region it belongs to. Each region's own bbox is paged with its own
+    budget (a busy region can't use up the pages of a small one), and changesets already
+    seen in another region's pages are not assigned twice. Paging a bbox stops once its
+    region has `limit` changesets; pass bbox to page one box for all the regions instead
+    Returns dict mapping region id -> changesets (newest first, at most `limit`)
+    A failed request ends paging with what was fetched so far, or is re-raised with
+    raise_errors=True for callers that must tell a failure from an empty result
+    """
+    # Use provided bbox, or each region's bbox from the region config
     if bbox is None:
-        bbox = get_region_bbox(region)
+        pages = [(get_region_bbox(region), [region]) for region in regions]
+    else:
+        pages = [(bbox, list(regions))]
     
-    region_name = get_region_name(region)
-    try:
-        import time
-        start_time_overall = time.time()
-        
-        # OSM API endpoint for changesets
-        url = "https://api.openstreetmap.org/api/0.6/changesets"
-        
-        headers = {
-            'User-Agent': 'ATLAS-Singapore/1.0'
-        }
-        
-        all_changesets = []
-        seen_ids = set()
-        
-        # Start from now and go backwards (configurable time range)
-        current_end = datetime.now(timezone.utc)
-        # Use provided time_range_hours, or default to CHANGESET_TIME_RANGE_HOURS
-        # If time_range_hours is None, don't set a start_time (fetch all history)
-        hours_to_fetch = time_range_hours if time_range_hours is not None else CHANGESET_TIME_RANGE_HOURS
-        start_time = current_end - timedelta(hours=hours_to_fetch) if hours_to_fetch else None
-        
-        # We'll make multiple requests, each time using the oldest changeset from the previous batch
-        # as the end time for the next batch (pagination backwards in time)
-        max_requests = (limit + 99) // 100  # Max requests needed to reach desired limit
+    start_time_overall = time.time()
+    
+    total_fetched = 0
+    region_changesets = {region: [] for region in regions}
+    seen_ids = set()
+    
+    # We'll make multiple requests, each time using the oldest changeset from the previous batch
+    # as the end time for the next batch (pagination backwards in time)
+    max_requests = (limit + 99) // 100  # Max requests needed to reach desired limit
+    
+    for page_bbox, page_regions in pages:
+        region_name = ', '.join(get_region_name(region) for region in page_regions)
         
-        if hours_to_fetch:
-            print(f"Fetching up to {limit} changesets from last {hours_to_fetch} hours (max {max_requests} API calls)...")
-        else:
-            print(f"Fetching up to {limit} changesets from all history (max {max_requests} API calls)...")
+        # Start from the end of the range and go backwards
+        current_end = end_time or datetime.now(timezone.utc)
         
         for request_num in range(max_requests):
             # Stop if we already have enough changesets that pass the region filter
-            region_count = sum(1 for cs in all_changesets if is_changeset_in_region(cs, region))
-            if region_count >= limit:
-                print(f"  INFO: Already have {region_count} {region_name} changesets, stopping early")
+            if all(len(region_changesets[region]) >= limit for region in page_regions):
+                print(f"  INFO: Already have {limit} {region_name} changesets, stopping early")
                 break
         
             params = {
-                'bbox': bbox,
+                'bbox': page_bbox,
                 'closed': 'true',
                 'time': f"{start_time.isoformat()}Z,{current_end.isoformat()}Z"
             }
             
             
             try:
-                response = requests.get(url, params=params, headers=headers, timeout=15)
+                response = osm_get('/changesets', params=params, timeout='list')
                 
                 
                 # Parse XML response
                 root = ET.fromstring(response.content)
-                batch_changesets = []
-                
-                for changeset in root.findall('changeset'):
-                    cs_id = changeset.get('id')
-                    
-                    # Skip duplicates
-                    if cs_id in seen_ids:
-                        continue
-                    seen_ids.add(cs_id)
-                    
-                    user = changeset.get('user', 'Anonymous')
-                    uid = changeset.get('uid', '')
-                    created_at = changeset.get('created_at', '')
-                    closed_at = changeset.get('closed_at', '')
-                    num_changes = changeset.get('num_changes', '0')
-                    min_lat = changeset.get('min_lat', '')
-                    max_lat = changeset.get('max_lat', '')
-                    min_lon = changeset.get('min_lon', '')
-                    max_lon = changeset.get('max_lon', '')
-                    
-                    # Get tags (comments, etc.)
-                    tags = {}
-                    for tag in changeset.findall('tag'):
-                        tags[tag.get('k')] = tag.get('v')
-                    
-                    # Format the changeset data
-                    cs_data = {
-                        'id': cs_id,
-                        'user': user,
-                        'uid': uid,
-                        'created_at': created_at,
-                        'closed_at': closed_at,
-                        'num_changes': int(num_changes),
-                        'comment': tags.get('comment', 'No comment'),
-                        'created_by': tags.get('created_by', 'Unknown'),
-                        'bbox': {
-                            'min_lat': float(min_lat) if min_lat else None,
-                            'max_lat': float(max_lat) if max_lat else None,
-                            'min_lon': float(min_lon) if min_lon else None,
-                            'max_lon': float(max_lon) if max_lon else None,
-                        } if min_lat and max_lat and min_lon and max_lon else None,
-                        'tags': tags
-                    }
-                    
-                    batch_changesets.append(cs_data)
+                batch_changesets = [parse_changeset_element(changeset) for changeset in root.findall('changeset')]
                 
                 if not batch_changesets:
-                    print(f"  No more changesets found, stopping")
+                    print(f"  No more {region_name} changesets found, stopping")
                     break
                 
-                all_changesets.extend(batch_changesets)
+                # Skip duplicates (already assigned from an earlier page or another region's pages)
+                new_changesets = [cs for cs in batch_changesets if cs['id'] not in seen_ids]
+                seen_ids.update(cs['id'] for cs in new_changesets)
                 
-                # Sort batch by created_at to find the oldest
-                batch_changesets.sort(key=lambda x: x['created_at'])
-                oldest_in_batch = batch_changesets[0]['created_at']
+                # Filter each batch as it arrives so the in-region count stays incremental
+                total_fetched += len(new_changesets)
+                for region, changesets in assign_changesets_to_regions(new_changesets, regions).items():
+                    region_changesets[region].extend(changesets)
                 
-                print(f"  Request {request_num + 1}: fetched {len(batch_changesets)} changesets (oldest: {oldest_in_batch[:10]})")
+                # Find the oldest changeset in the batch
+                oldest_in_batch = min(batch_changesets, key=lambda x: x['created_ts'] or 0)
+                
+                print(f"  {region_name} request {request_num + 1}: fetched {len(batch_changesets)} changesets (oldest: {oldest_in_batch['created_at'][:10]})")
                 
                 # Update end time for next request to be 1 second before the oldest in this batch
                 # This ensures we continue backwards in time without gaps
-                current_end = date_parser.parse(oldest_in_batch) - timedelta(seconds=1)
+                current_end = datetime.fromtimestamp((oldest_in_batch['created_ts'] or 0) - 1, timezone.utc)
                 
                 # If we've gone back too far, stop (unless fetching all history)
                 if start_time and current_end <= start_time:
@@ -1348,154 +2449,222 @@ def fetch_osm_changesets(bbox=None, limit=200, region=None, time_range_hours=Non
                     break
                 
             except Exception as e:
-                print(f"  Request {request_num + 1} failed: {e}")
+                print(f"  {region_name} request {request_num + 1} failed: {e}")
+                if raise_errors:
+                    raise
                 break
-        fetch_time = time.time() - start_time_overall
-        
-        # Filter to only include changesets that are primarily within the region
-        total_fetched = len(all_changesets)
-        changesets = [cs for cs in all_changesets if is_changeset_in_region(cs, region)]
+    fetch_time = time.time() - start_time_overall
+    
+    for region, changesets in region_changesets.items():
         filtered_count = len(changesets)
         
         # Sort by created_at descending (most recent first)
-        changesets.sort(key=lambda x: x['created_at'], reverse=True)
-        changesets = changesets[:limit]
+        changesets.sort(key=lambda x: x['created_ts'] or 0, reverse=True)
+        changesets = region_changesets[region] = changesets[:limit]
         
         # Debug: Log some changeset info
-        print(f"Total: {total_fetched} fetched, {filtered_count} in {region_name}, {len(changesets)} after limit ({fetch_time:.1f}s)")
+        print(f"Total: {total_fetched} fetched, {filtered_count} in {get_region_name(region)}, {len(changesets)} after limit ({fetch_time:.1f}s)")
         if changesets:
-            oldest = changesets[-1]['created_at'][:10] if len(changesets) > 0 else 'N/A'
-            newest = changesets[0]['created_at'][:10] if len(changesets) > 0 else 'N/A'
+            oldest = changesets[-1]['created_at'][:10]
+            newest = changesets[0]['created_at'][:10]
             print(f"   Date range: {newest} to {oldest}")
-        
-        # Fetch detailed statistics for each changeset in parallel with reduced workers to avoid rate limiting
-        print(f"Fetching detailed statistics for {len(changesets)} changesets...")
-        details_start = time.time()
-        
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_cs = {executor.submit(fetch_changeset_details, cs['id']): cs for cs in changesets}
+    
+    return region_changesets
+
+def enrich_changesets(changesets):
+    """
+    Attach analysis details to changesets in place: stored analyses are read in one
+    query, the rest are downloaded in parallel (throughput capped by osm_scheduler)
+    """
+    # Load analyses already in the store in one query so only new changesets are downloaded
+    stored = load_stored_analyses(cs['id'] for cs in changesets if cs['id'] not in changeset_analysis_cache)
+    stored = {cs_id: analysis for cs_id, analysis in stored.items() if is_analysis_current(analysis)}
+    changeset_analysis_cache.update(stored)
+    
+    # Fetch detailed statistics for each changeset in parallel (throughput capped by osm_scheduler)
+    print(f"Fetching detailed statistics for {len(changesets)} changesets ({len(stored)} from store)...")
+    details_start = time.time()
+    
+    with ThreadPoolExecutor(max_workers=OSM_WORKER_THREADS) as executor:
+        future_to_cs = {submit_osm_task(executor, fetch_changeset_details, cs['id']): cs for cs in changesets}
+        
+        completed = 0
+        errors = 0
+        for future in as_completed(future_to_cs):
+            cs = future_to_cs[future]
+            completed += 1
             
-            completed = 0
-            errors = 0
-            for future in as_completed(future_to_cs):
-                cs = future_to_cs[future]
-                completed += 1
-                
-                # Show progress every 100 changesets
-                if completed % 100 == 0:
-                    print(f"   Progress: {completed}/{len(changesets)} changesets processed...")
-                
-                try:
-                    details = future.result()
-                    if details:
-                        cs['details'] = details
-                        # Update num_changes from details if available
-                        total_from_details = details.get('total_created', 0) + details.get('total_modified', 0) + details.get('total_deleted', 0)
-                        if total_from_details > 0:
-                            cs['num_changes'] = total_from_details
-                    else:
-                        errors += 1
-                except Exception as e:
-                    errors += 1
-                    if errors <= 3:  # Show first 3 errors
-                        print(f"   WARNING: Error for changeset {cs['id']}: {str(e)[:50]}")
+            # Show progress every 100 changesets
+            if completed % 100 == 0:
+                print(f"   Progress: {completed}/{len(changesets)} changesets processed...")
             
-            if errors > 0:
-                print(f"   WARNING: {errors} changesets failed to fetch details")
+            try:
+                details = future.result()
+                if details:
+                    cs['details'] = details
+                    # Update num_changes from details if available
+                    total_from_details = details.get('total_created', 0) + details.get('total_modified', 0) + details.get('total_deleted', 0)
+                    if total_from_details > 0:
+                        cs['num_changes'] = total_from_details
+                else:
+                    errors += 1
+            except Exception as e:
+                errors += 1
+                if errors <= 3:  # Show first 3 errors
+                    print(f"   WARNING: Error for changeset {cs['id']}: {str(e)[:50]}")
         
-        details_time = time.time() - details_start
-        print(f"   Detailed statistics fetched in {details_time:.1f}s")
+        if errors > 0:
+            print(f"   WARNING: {errors} changesets failed to fetch details")
+    
+    details_time = time.time() - details_start
+    print(f"   Detailed statistics fetched in {details_time:.1f}s")
+    
+    # Debug: Show sample changeset details
+    if changesets and len(changesets) > 0:
+        sample = changesets[0]
+        if sample.get('details'):
+            print(f"   Sample details for changeset {sample['id']}: created={sample['details'].get('total_created', 'N/A')}, modified={sample['details'].get('total_modified', 'N/A')}, deleted={sample['details'].get('total_deleted', 'N/A')}")
+        else:
+            print(f"   WARNING: Sample changeset {sample['id']} has no details!")
+
+def add_mass_change_tags(cs):
+    """Add "mass_changes" tags to a validated needs_review changeset with threshold+ total changes"""
+    if cs['validation'].get('status') != 'needs_review':
+        return
+    
+    details = cs.get('details', {})
+    total_created = details.get('total_created', 0)
+    total_modified = details.get('total_modified', 0)
+    total_deleted = details.get('total_deleted', 0)
+    total_changes = total_created + total_modified + total_deleted
+    
+    threshold = get_validation_threshold()
+    if total_changes >= threshold:
+        # Ensure tags dictionary exists
+        if 'tags' not in cs:
+            cs['tags'] = {}
+        
+        # Add mass_changes tag
+        cs['tags']['mass_changes'] = 'yes'
+        cs['tags']['total_changes'] = str(total_changes)
+        cs['tags']['created_count'] = str(total_created)
+        cs['tags']['modified_count'] = str(total_modified)
+        cs['tags']['deleted_count'] = str(total_deleted)
+        print(f"Added mass_changes tag to changeset {cs.get('id')} ({total_changes} total changes: {total_created} created, {total_modified} modified, {total_deleted} deleted)")
+
+def clear_mass_change_tags(cs):
+    """Remove the tags added by add_mass_change_tags (before re-validating a changeset)"""
+    tags = cs.get('tags') or {}
+    if tags.get('mass_changes') == 'yes':
+        for key in ('mass_changes', 'total_changes', 'created_count', 'modified_count', 'deleted_count'):
+            tags.pop(key, None)
+
+def apply_validation(changesets):
+    """
+    Validate changesets in place, tag mass changes, persist them to the changeset store
+    and send notifications/sheet logs for needs_review changesets not alerted before
+    """
+    if not changesets:
+        return
+    
+    # Validate all changesets and add tags
+    for cs in changesets:
+        cs['validation'] = validate_changeset(cs)
+        add_mass_change_tags(cs)
+    
+    store_changesets(changesets)
+    enqueue_comparison_bundles(cs['id'] for cs in changesets if cs['validation'].get('status') == 'needs_review')
+    
+    # Check if this is the initial load (no previously alerted changesets)
+    initial_load = len(alerted_changesets) == 0
+    
+    if initial_load:
+        # First time loading - mark all existing changesets as seen WITHOUT sending notifications
+        print(f"Initial load: Marking {len(changesets)} existing changesets as seen (no notifications will be sent)")
+        for cs in changesets:
+            cs_id = cs.get('id')
+            if cs_id:
+                alerted_changesets.add(str(cs_id))
+        save_alerted_changesets(alerted_changesets)
+        print(f"SUCCESS: Marked {len(alerted_changesets)} changesets as seen. Future NEW changesets will trigger notifications.")
+    else:
+        # Subsequent loads - only notify for NEW needs_review changesets that haven't been seen before
+        new_count = 0
+        skipped_count = 0
+        for cs in changesets:
+            cs_id = cs.get('id')
+            if cs_id:
+                cs_id_str = str(cs_id)
+                # Only send notifications for needs_review changesets
+                if cs['validation'].get('status') == 'needs_review' and cs_id_str not in alerted_changesets:
+                    # This is a NEW needs_review changeset - send notification
+                    print(f"🆕 Detected NEW needs_review changeset: {cs_id_str} (User: {cs.get('user', 'Unknown')})")
+                    result = send_slack_notification(cs)
+                    if result:
+                        new_count += 1
+                    else:
+                        print(f"WARNING: Failed to send notification for changeset {cs_id_str}")
+                else:
+                    skipped_count += 1
         
-        # Debug: Show sample changeset details
-        if changesets and len(changesets) > 0:
-            sample = changesets[0]
-            if sample.get('details'):
-                print(f"   Sample details for changeset {sample['id']}: created={sample['details'].get('total_created', 'N/A')}, modified={sample['details'].get('total_modified', 'N/A')}, deleted={sample['details'].get('total_deleted', 'N/A')}")
-            else:
-                print(f"   WARNING: Sample changeset {sample['id']} has no details!")
+        if new_count > 0:
+            print(f"Sent notifications for {new_count} new needs_review changeset(s)")
+        if skipped_count > 0:
+            print(f"Skipped {skipped_count} already-notified or non-needs_review changeset(s)")
         
-        # Validate all changesets and add tags
-        for cs in changesets:
-            cs['validation'] = validate_changeset(cs)
+        # Also log to Google Sheets if validation status is 'needs_review' and Google Sheets enabled
+        if cs['validation'].get('status') == 'needs_review' and GOOGLE_SHEETS_ENABLED:
+            # Transform changeset data to match expected format for logging
+            details = cs.get('details', {})
+            log_data = {
+                'id': cs['id'],
+                'user': cs['user'],
+                'created': details.get('total_created', 0),
+                'modified': details.get('total_modified', 0),
+                'deleted': details.get('total_deleted', 0),
+                'tags': cs.get('tags', {}),
+                'created_at': cs.get('created_at', 'Unknown')
+            }
             
-            # Add "mass_changes" tag for needs_review changesets with threshold+ total changes
-            if cs['validation'].get('status') == 'needs_review':
-                details = cs.get('details', {})
-                total_created = details.get('total_created', 0)
-                total_modified = details.get('total_modified', 0)
-                total_deleted = details.get('total_deleted', 0)
-                total_changes = total_created + total_modified + total_deleted
-                
-                threshold = get_validation_threshold()
-                if total_changes >= threshold:
-                    # Ensure tags dictionary exists
-                    if 'tags' not in cs:
-                        cs['tags'] = {}
-                    
-                    # Add mass_changes tag
-                    cs['tags']['mass_changes'] = 'yes'
-                    cs['tags']['total_changes'] = str(total_changes)
-                    cs['tags']['created_count'] = str(total_created)
-                    cs['tags']['modified_count'] = str(total_modified)
-                    cs['tags']['deleted_count'] = str(total_deleted)
-                    print(f"Added mass_changes tag to changeset {cs.get('id')} ({total_changes} total changes: {total_created} created, {total_modified} modified, {total_deleted} deleted)")
+            # Get validation reasons as flags
+            validation_flags = cs['validation'].get('reasons', [])
+            
+            # Log to Google Sheets
+            log_changeset_needing_review(log_data, validation_flags, 'Auto-detected during fetch')
+
+def fetch_osm_changesets(bbox=None, limit=200, region=None, time_range_hours=None):
+    """
+    Fetch changesets from OpenStreetMap API for a given bounding box.
+    Uses optimized parallel fetching for speed.
+    
+    Args:
+        bbox: Bounding box string (defaults to current region's bbox)
+        limit: Maximum number of changesets to return
+        region: Region ID to filter by (defaults to current region)
+        time_range_hours: Hours to look back (defaults to CHANGESET_TIME_RANGE_HOURS, use None for all history)
+    """
+    # Use provided region, or fall back to current region
+    region = region or CURRENT_REGION
+    
+    try:
+        start_time_overall = time.time()
         
-        # Check if this is the initial load (no previously alerted changesets)
-        initial_load = len(alerted_changesets) == 0
+        # Start from now and go backwards (configurable time range)
+        current_end = datetime.now(timezone.utc)
+        # Use provided time_range_hours, or default to CHANGESET_TIME_RANGE_HOURS
+        # If time_range_hours is None, don't set a start_time (fetch all history)
+        hours_to_fetch = time_range_hours if time_range_hours is not None else CHANGESET_TIME_RANGE_HOURS
+        start_time = current_end - timedelta(hours=hours_to_fetch) if hours_to_fetch else None
         
-        if initial_load:
-            # First time loading - mark all existing changesets as seen WITHOUT sending notifications
-            print(f"Initial load: Marking {len(changesets)} existing changesets as seen (no notifications will be sent)")
-            for cs in changesets:
-                cs_id = cs.get('id')
-                if cs_id:
-                    alerted_changesets.add(str(cs_id))
-            save_alerted_changesets(alerted_changesets)
-            print(f"SUCCESS: Marked {len(alerted_changesets)} changesets as seen. Future NEW changesets will trigger notifications.")
+        max_requests = (limit + 99) // 100
+        if hours_to_fetch:
+            print(f"Fetching up to {limit} changesets from last {hours_to_fetch} hours (max {max_requests} API calls)...")
         else:
-            # Subsequent loads - only notify for NEW needs_review changesets that haven't been seen before
-            new_count = 0
-            skipped_count = 0
-            for cs in changesets:
-                cs_id = cs.get('id')
-                if cs_id:
-                    cs_id_str = str(cs_id)
-                    # Only send notifications for needs_review changesets
-                    if cs['validation'].get('status') == 'needs_review' and cs_id_str not in alerted_changesets:
-                        # This is a NEW needs_review changeset - send notification
-                        print(f"🆕 Detected NEW needs_review changeset: {cs_id_str} (User: {cs.get('user', 'Unknown')})")
-                        result = send_slack_notification(cs)
-                        if result:
-                            new_count += 1
-                        else:
-                            print(f"WARNING: Failed to send notification for changeset {cs_id_str}")
-                    else:
-                        skipped_count += 1
-            
-            if new_count > 0:
-                print(f"Sent notifications for {new_count} new needs_review changeset(s)")
-            if skipped_count > 0:
-                print(f"Skipped {skipped_count} already-notified or non-needs_review changeset(s)")
-            
-            # Also log to Google Sheets if validation status is 'needs_review' and Google Sheets enabled
-            if cs['validation'].get('status') == 'needs_review' and GOOGLE_SHEETS_ENABLED:
-                # Transform changeset data to match expected format for logging
-                details = cs.get('details', {})
-                log_data = {
-                    'id': cs['id'],
-                    'user': cs['user'],
-                    'created': details.get('total_created', 0),
-                    'modified': details.get('total_modified', 0),
-                    'deleted': details.get('total_deleted', 0),
-                    'tags': cs.get('tags', {}),
-                    'created_at': cs.get('created_at', 'Unknown')
-                }
-                
-                # Get validation reasons as flags
-                validation_flags = cs['validation'].get('reasons', [])
-                
-                # Log to Google Sheets
-                log_changeset_needing_review(log_data, validation_flags, 'Auto-detected during fetch')
+            print(f"Fetching up to {limit} changesets from all history (max {max_requests} API calls)...")
+        
+        changesets = fetch_changeset_list(region, bbox=bbox, limit=limit, start_time=start_time, end_time=current_end)
+        enrich_changesets(changesets)
+        apply_validation(changesets)
         
         total_time = time.time() - start_time_overall
         print(f"SUCCESS: Loaded {len(changesets)} changesets successfully in {total_time:.1f}s")
@@ -1505,9 +2674,10 @@ def fetch_osm_changesets(bbox=None, limit=200, region=None, time_range_hours=Non
         print(f"ERROR: Error fetching changesets: {e}")
         return []
 
-def get_statistics(changesets):
+def get_statistics(changesets, columns=None):
     """
     Calculate statistics from changesets
+    columns: the changesets' ChangesetColumns if already built
     """
     if not changesets:
         return {
@@ -1517,41 +2687,32 @@ def get_statistics(changesets):
             'top_contributors': []
         }
     
-    total_changes = sum(cs['num_changes'] for cs in changesets)
-    unique_users = len(set(cs['user'] for cs in changesets))
+    if columns is None:
+        columns = ChangesetColumns.from_changesets(changesets)
+    
+    total_changes = int(columns.num_changes.sum())
+    unique_users = count_unique_users(columns)
     
     # Count validation statuses
+    needs_review = int(columns.column('needs_review').sum())
     validation_counts = {
-        'valid': 0,
-        'needs_review': 0
+        'valid': len(columns) - needs_review,
+        'needs_review': needs_review
     }
-    for cs in changesets:
-        validation_status = cs.get('validation', {}).get('status', 'valid')
-        validation_counts[validation_status] = validation_counts.get(validation_status, 0) + 1
     
     # Debug logging
     print(f"Statistics: {len(changesets)} changesets, {total_changes} total changes, {unique_users} users")
     print(f"Validation: {validation_counts['valid']} valid, {validation_counts['needs_review']} needs review")
     
     # Count contributions per user
-    user_contributions = {}
-    for cs in changesets:
-        user = cs['user']
-        if user not in user_contributions:
-            user_contributions[user] = {
-                'user': user,
-                'changesets': 0,
-                'total_changes': 0
-            }
-        user_contributions[user]['changesets'] += 1
-        user_contributions[user]['total_changes'] += cs['num_changes']
+    user_changesets = count_by_user(columns)
+    user_changes = count_by_user(columns, weights=columns.num_changes)
     
     # Get top 10 contributors (sorted by number of changesets)
-    top_contributors = sorted(
-        user_contributions.values(),
-        key=lambda x: x['changesets'],
-        reverse=True
-    )[:10]
+    top_contributors = [
+        {'user': columns.user_names[code], 'changesets': int(user_changesets[code]), 'total_changes': int(user_changes[code])}
+        for code in top_k_indices(user_changesets, 10) if user_changesets[code] > 0
+    ]
     
     return {
         'total_changesets': len(changesets),
@@ -1562,6 +2723,707 @@ def get_statistics(changesets):
         'time_range_hours': CHANGESET_TIME_RANGE_HOURS
     }
 
+# ============================================
+# Changeset Columns
+# ============================================
+
+ROLLUP_INDEX = {column: i for i, column in enumerate(ROLLUP_COLUMNS)}
+
+class ChangesetColumns:
+    """
+    Column arrays for a list of changesets, row i being changesets[i]
+    Aggregations (statistics, analytics) read these instead of walking the nested
+    dicts; the dicts stay the records that API responses serialize
+    counts holds each changeset's changeset_rollup_counts (see ROLLUP_COLUMNS), users
+    are codes into user_names, missing timestamps are 0 and missing bboxes NaN
+    """
+    __slots__ = ('ids', 'created_ts', 'closed_ts', 'num_changes', 'counts', 'user_codes', 'user_names', 'bboxes')
+    
+    def __init__(self, ids, created_ts, closed_ts, num_changes, counts, user_codes, user_names, bboxes):
+        self.ids = ids
+        self.created_ts = created_ts
+        self.closed_ts = closed_ts
+        self.num_changes = num_changes
+        self.counts = counts
+        self.user_codes = user_codes
+        self.user_names = user_names
+        self.bboxes = bboxes
+    
+    @classmethod
+    def from_changesets(cls, changesets):
+        user_index = {}
+        user_codes = [user_index.setdefault(cs.get('user', 'Unknown'), len(user_index)) for cs in changesets]
+        bboxes = [
+            (bbox['min_lon'], bbox['min_lat'], bbox['max_lon'], bbox['max_lat']) if bbox else (np.nan,) * 4
+            for bbox in (cs.get('bbox') for cs in changesets)
+        ]
+        return cls(
+            ids=np.array([int(cs['id']) for cs in changesets], dtype=np.int64),
+            created_ts=np.array([cs.get('created_ts') or 0 for cs in changesets], dtype=np.int64),
+            closed_ts=np.array([cs.get('closed_ts') or 0 for cs in changesets], dtype=np.int64),
+            num_changes=np.array([cs.get('num_changes', 0) for cs in changesets], dtype=np.int64),
+            counts=np.array([changeset_rollup_counts(cs) for cs in changesets], dtype=np.int32).reshape(len(changesets), len(ROLLUP_COLUMNS)),
+            user_codes=np.array(user_codes, dtype=np.int32),
+            user_names=list(user_index),
+            bboxes=np.array(bboxes, dtype=np.float64).reshape(len(changesets), 4)
+        )
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def column(self, name):
+        """Per-changeset values of one of ROLLUP_COLUMNS"""
+        return self.counts[:, ROLLUP_INDEX[name]]
+    
+    def take(self, index):
+        """Subset of rows by slice or boolean mask (user codes keep pointing into user_names)"""
+        return ChangesetColumns(
+            self.ids[index], self.created_ts[index], self.closed_ts[index], self.num_changes[index],
+            self.counts[index], self.user_codes[index], self.user_names, self.bboxes[index]
+        )
+
+def count_by_user(columns, weights=None):
+    """Per-user totals (indexed by user code) of weights, or of changesets if weights is None"""
+    return np.bincount(columns.user_codes, weights=weights, minlength=len(columns.user_names))
+
+def top_k_indices(values, k, ties=None):
+    """
+    Indices of the k largest values, largest first; ties are ordered by ascending ties
+    values (default: index order, like a stable sort)
+    argpartition finds the k-th largest value without sorting everything
+    """
+    if len(values) > k:
+        kth = values[np.argpartition(values, len(values) - k)[len(values) - k]]
+        candidates = np.flatnonzero(values >= kth)
+    else:
+        candidates = np.arange(len(values))
+    order = np.lexsort((candidates if ties is None else ties[candidates], -values[candidates]))
+    return candidates[order][:k]
+
+def first_seen_by_user(columns, mask):
+    """Row of each user's first masked changeset (indexed by user code; users with none sort last)"""
+    first_seen = np.full(len(columns.user_names), len(columns), dtype=np.int64)
+    codes, first = np.unique(columns.user_codes[mask], return_index=True)
+    first_seen[codes] = np.flatnonzero(mask)[first]
+    return first_seen
+
+def sum_by_hour(columns):
+    """
+    Per-hour sums of the rollup counts, same shape as load_changeset_rollups rows (oldest
+    first), skipping changesets without a timestamp
+    """
+    has_ts = columns.created_ts > 0
+    hours, inverse = np.unique(columns.created_ts[has_ts] // 3600, return_inverse=True)
+    sums = np.zeros((len(hours), len(ROLLUP_COLUMNS)), dtype=np.int64)
+    np.add.at(sums, inverse, columns.counts[has_ts])
+    return [
+        {'bucket': datetime.fromtimestamp(int(hour) * 3600, timezone.utc).strftime('%Y-%m-%d %H:00'),
+         **{column: int(value) for column, value in zip(ROLLUP_COLUMNS, row)}}
+        for hour, row in zip(hours, sums)
+    ]
+
+def count_unique_users(columns):
+    return int(np.unique(columns.user_codes).size)
+
+def count_by_month(columns):
+    """Changesets per month ('YYYY-MM') of created_ts, skipping changesets without a timestamp"""
+    months = columns.created_ts[columns.created_ts > 0].astype('datetime64[s]').astype('datetime64[M]')
+    values, counts = np.unique(months, return_counts=True)
+    return {str(month): int(count) for month, count in zip(values, counts)}
+
+# ============================================
+# Background Ingestion
+# ============================================
+
+# Poll each region's changeset list on a schedule so dashboard endpoints serve from
+# memory/the changeset store instead of waiting on OSM round-trips
+ATLAS_INGEST_ENABLED = os.environ.get('ATLAS_INGEST_ENABLED', 'true').lower() == 'true'
+ATLAS_INGEST_INTERVAL_SECONDS = int(os.environ.get('ATLAS_INGEST_INTERVAL_SECONDS', '300'))
+
+# Same limit the dashboard and analytics endpoints have always requested
+INGEST_CHANGESET_LIMIT = 1000
+
+# Incremental polls look back this far before the high-water mark so changesets closed
+# in the same second as the newest one seen are not missed (duplicates are skipped by id)
+INGEST_OVERLAP_SECONDS = 60
+
+# Polls that retry a window changeset without a current analysis (download failed, or
+# analyzed with other rules) before it is left as is
+INGEST_ANALYSIS_MAX_ATTEMPTS = 3
+
+# Latest changesets per region:
+# region -> {'changesets': [...], 'high_water': newest closed_ts or None, 'updated_at': datetime or None}
+region_windows = {}
+# Changeset id -> failed analysis attempts, for changesets still in a window
+analysis_attempts = {}
+ingest_lock = threading.Lock()
+ingest_thread = None
+ingest_thread_lock = threading.Lock()
+rescore_thread = None
+rescore_thread_lock = threading.Lock()
+rescore_requested = threading.Event()
+
+def make_region_window(changesets, updated_at=None):
+    """
+    Region window entry; the high-water mark is the newest closed_ts (epoch seconds) in the list
+    columns are the changesets' ChangesetColumns, rebuilt whenever the list or validation changes
+    """
+    return {
+        'changesets': changesets,
+        'columns': ChangesetColumns.from_changesets(changesets),
+        'high_water': max((cs['closed_ts'] for cs in changesets if cs.get('closed_ts')), default=None),
+        'updated_at': updated_at
+    }
+
+def ingest_regions(regions):
+    """
+    Fetch, analyze and validate changesets for several regions in one pass, then publish
+    them to the store and memory. Each region's bbox is paged (see fetch_region_changesets)
+    and changesets are assigned to regions with the spatial index, so each changeset is
+    downloaded and validated once however many regions it belongs to
+    The first poll pages the whole time window; once every region has a recent
+    high-water mark, polls only request changesets closed after the oldest of them
+    Returns dict mapping region id -> changesets
+    """
+    now = datetime.now(timezone.utc)
+    window_start = now - timedelta(hours=CHANGESET_TIME_RANGE_HOURS)
+    windows = {region: region_windows.get(region) for region in regions}
+    
+    window_start_ts = int(window_start.timestamp())
+    high_waters = [window['high_water'] if window else None for window in windows.values()]
+    if all(high_water and high_water > window_start_ts for high_water in high_waters):
+        # Incremental: a quiet poll costs a single list request and no downloads
+        since = datetime.fromtimestamp(min(high_waters) - INGEST_OVERLAP_SECONDS, timezone.utc)
+        print(f"Polling {len(regions)} region(s) for changesets closed since {since.isoformat()}")
+    else:
+        since = window_start
+    
+    fetched = fetch_region_changesets(regions, limit=INGEST_CHANGESET_LIMIT, start_time=since, end_time=now)
+    
+    # Changesets already in a window are skipped once they have a current analysis (or ran
+    # out of attempts); the others are analyzed again in place
+    window_changesets = {cs['id']: cs for window in windows.values() if window for cs in window['changesets']}
+    known_ids = current_analysis_ids(window_changesets)
+    known_ids.update(cs_id for cs_id in window_changesets if analysis_attempts.get(cs_id, 0) >= INGEST_ANALYSIS_MAX_ATTEMPTS)
+    retry_changesets = {cs_id: cs for cs_id, cs in window_changesets.items() if cs_id not in known_ids}
+    
+    # New changesets are analyzed and validated once, across regions
+    new_changesets = {}
+    for changesets in fetched.values():
+        for cs in changesets:
+            if cs['id'] not in window_changesets:
+                new_changesets[cs['id']] = cs
+    
+    pending = list(new_changesets.values()) + list(retry_changesets.values())
+    if pending:
+        print(f"{len(new_changesets)} new and {len(retry_changesets)} retried changesets for {', '.join(get_region_name(r) for r in regions)}")
+        for cs in retry_changesets.values():
+            clear_mass_change_tags(cs)
+        enrich_changesets(pending)
+        apply_validation(pending)
+        analyzed_ids = current_analysis_ids(cs['id'] for cs in pending)
+        for cs in pending:
+            if cs['id'] in analyzed_ids:
+                analysis_attempts.pop(cs['id'], None)
+            else:
+                analysis_attempts[cs['id']] = analysis_attempts.get(cs['id'], 0) + 1
+    
+    for region in regions:
+        # Merge into the window and evict changesets that closed before the start of the
+        # time window (evicted changesets stay in the store as history)
+        added = [cs for cs in fetched[region] if cs['id'] in new_changesets]
+        previous = windows[region]['changesets'] if windows[region] else []
+        merged = added + previous
+        merged.sort(key=lambda x: x['created_ts'] or 0, reverse=True)
+        changesets = [cs for cs in merged if (cs['closed_ts'] or 0) >= window_start_ts][:INGEST_CHANGESET_LIMIT]
+        
+        store_region_changesets(region, added)
+        region_windows[region] = make_region_window(changesets, now)
+    
+    # Forget attempts for changesets that have left every window
+    window_ids = {cs['id'] for window in region_windows.values() for cs in window['changesets']}
+    for cs_id in [cs_id for cs_id in analysis_attempts if cs_id not in window_ids]:
+        del analysis_attempts[cs_id]
+    
+    return {region: region_windows[region]['changesets'] for region in regions}
+
+def is_region_window_fresh(window):
+    """A window is fresh while the ingestion worker is running or it was fetched within one interval"""
+    if ingest_thread is not None and ingest_thread.is_alive():
+        return True
+    updated_at = window.get('updated_at')
+    return updated_at is not None and datetime.now(timezone.utc) - updated_at < timedelta(seconds=ATLAS_INGEST_INTERVAL_SECONDS)
+
+def refresh_region_windows(regions, only_if_stale=False):
+    """Ingest regions, serialized so parallel requests and the worker don't poll OSM twice"""
+    with ingest_lock:
+        if only_if_stale:
+            windows = [region_windows.get(region) for region in regions]
+            if all(window and window['updated_at'] and is_region_window_fresh(window) for window in windows):
+                return {region: region_windows[region]['changesets'] for region in regions}
+        return ingest_regions(regions)
+
+def get_region_changesets(region):
+    """
+    Changesets for a region (newest first, same shape as fetch_osm_changesets)
+    Served from memory, then from the changeset store after a restart; only fetched
+    synchronously when the region hasn't been ingested yet or ingestion isn't running
+    The returned list is shared - callers must not modify it
+    """
+    return get_region_window(region)['changesets']
+
+def get_region_window(region):
+    """
+    A region's window (see make_region_window) - loaded, fetched and kept fresh as
+    described in get_region_changesets
+    Raises ValueError for regions that aren't configured
+    """
+    if region not in REGIONS:
+        raise ValueError(f"Region {region} not found")
+    window = region_windows.get(region)
+    
+    if window is None:
+        window_start = datetime.now(timezone.utc) - timedelta(hours=CHANGESET_TIME_RANGE_HOURS)
+        stored = load_region_changesets(region, since=window_start.strftime('%Y-%m-%dT%H:%M:%SZ'), limit=INGEST_CHANGESET_LIMIT)
+        if stored:
+            print(f"Loaded {len(stored)} stored changesets for {get_region_name(region)}")
+            window = region_windows.setdefault(region, make_region_window(stored))
+    
+    if window and is_region_window_fresh(window):
+        return window
+    
+    refresh_region_windows([region], only_if_stale=True)
+    return region_windows[region]
+
+def rescore_region_windows(skip_ids=()):
+    """
+    Re-validate every changeset in the region windows against the current settings
+    Validation only needs each changeset's analysis (routing counts and rule counts) and
+    user, which are already in memory or the store, so nothing is downloaded
+    Returns dict with the number of changesets re-scored and now needing review, and
+    'stale_ids': changesets (not in skip_ids) whose analysis was computed with a different
+    rule set (custom rules changed) and needs re-analyzing
+    Holds the ingest lock so an ingestion pass never sees a half re-scored window
+    """
+    with ingest_lock:
+        changesets = list({cs['id']: cs for window in list(region_windows.values()) for cs in window['changesets']}.values())
+        start_time_rescore = time.time()
+        
+        missing = [cs['id'] for cs in changesets if cs['id'] not in changeset_analysis_cache]
+        if missing:
+            changeset_analysis_cache.update(load_stored_analyses(missing))
+        
+        stale_ids = []
+        for cs in changesets:
+            analysis = changeset_analysis_cache.get(cs['id'])
+            if analysis and not is_analysis_current(analysis) and cs['id'] not in skip_ids:
+                stale_ids.append(cs['id'])
+            clear_mass_change_tags(cs)
+            # Never download here - changesets without an analysis are validated on their details only
+            cs['validation'] = validate_changeset(cs, analysis=analysis or {})
+            add_mass_change_tags(cs)
+        
+        store_changesets(changesets)
+        for window in list(region_windows.values()):
+            window['columns'] = ChangesetColumns.from_changesets(window['changesets'])
+    
+    enqueue_comparison_bundles(cs['id'] for cs in changesets if cs['validation']['status'] == 'needs_review')
+    needs_review = sum(1 for cs in changesets if cs['validation']['status'] == 'needs_review')
+    print(f"Re-scored {len(changesets)} changesets in {(time.time() - start_time_rescore) * 1000:.0f}ms ({needs_review} need review)")
+    
+    return {'changesets': len(changesets), 'needs_review': needs_review, 'stale_ids': stale_ids}
+
+def reanalyze_changesets(changeset_ids):
+    """
+    Re-download and analyze changesets with the current rules
+    Returns the ids that still have no current analysis (download failed)
+    """
+    print(f"Re-analyzing {len(changeset_ids)} changesets for changed validation rules...")
+    failed = set()
+    with ThreadPoolExecutor(max_workers=OSM_WORKER_THREADS) as executor:
+        futures = {submit_osm_task(executor, fetch_changeset_analysis, cs_id): cs_id for cs_id in changeset_ids}
+        for future in as_completed(futures):
+            if future.result() is None:
+                failed.add(futures[future])
+    if failed:
+        print(f"WARNING: {len(failed)} changesets could not be re-analyzed")
+    return failed
+
+@osm_priority(OSM_PRIORITY_BACKFILL, caller='reanalyze')
+def rescore_pass():
+    """
+    Re-score the windows, re-analyze changesets whose analysis used other rules, then
+    re-score again. Changesets that fail to re-analyze are not requeued in the same pass
+    """
+    result = rescore_region_windows()
+    failed = set()
+    while result['stale_ids']:
+        failed |= reanalyze_changesets(result['stale_ids'])
+        result = rescore_region_windows(skip_ids=failed)
+
+def rescore_loop():
+    """Background worker: run re-score passes until no more were requested"""
+    global rescore_thread
+    while True:
+        with rescore_thread_lock:
+            if not rescore_requested.is_set():
+                rescore_thread = None
+                return
+            rescore_requested.clear()
+        try:
+            rescore_pass()
+        except Exception as e:
+            print(f"ERROR: Re-scoring failed: {e}")
+
+def request_rescore():
+    """
+    Re-score the region windows with the current settings in the background (see rescore_pass)
+    Saves made while a pass runs are picked up by one more pass
+    """
+    global rescore_thread
+    with rescore_thread_lock:
+        rescore_requested.set()
+        if rescore_thread is None:
+            rescore_thread = threading.Thread(target=rescore_loop, name='atlas-rescore', daemon=True)
+            rescore_thread.start()
+
+def ingestion_loop():
+    """Background worker: refresh all configured regions in one pass, then sleep for the ingest interval"""
+    while True:
+        try:
+            with osm_priority(OSM_PRIORITY_REFRESH):
+                refresh_region_windows(list(REGIONS))
+            start_history_backfill(list(REGIONS))
+        except Exception as e:
+            print(f"ERROR: Ingestion failed: {e}")
+        time.sleep(ATLAS_INGEST_INTERVAL_SECONDS)
+
+def start_ingestion_worker():
+    """Start the background ingestion thread once per process (no-op if disabled)"""
+    global ingest_thread
+    if not ATLAS_INGEST_ENABLED or ingest_thread is not None:
+        return
+    with ingest_thread_lock:
+        if ingest_thread is not None:
+            return
+        ingest_thread = threading.Thread(target=ingestion_loop, name='atlas-ingest', daemon=True)
+        ingest_thread.start()
+    print(f"Background ingestion: ENABLED ({len(REGIONS)} regions every {ATLAS_INGEST_INTERVAL_SECONDS}s)")
+
+@app.before_request
+def ensure_ingestion_worker():
+    """
+    Start ingestion and resume comparison jobs in whichever process serves requests
+    (gunicorn worker, app.run or the debug reloader's child) - but not for CLI commands
+    such as ingest-replication
+    """
+    start_ingestion_worker()
+    resume_comparison_jobs()
+
+# ============================================
+# Replication Ingestion
+# ============================================
+
+# Directory with OSM replication files, in any layout (e.g. an rsync'd planet mirror):
+# changeset replication files (*.osm.gz) and minutely/hourly/daily diffs (*.osc.gz)
+ATLAS_REPLICATION_DIR = os.environ.get('ATLAS_REPLICATION_DIR', 'replication')
+
+REPLICATION_CHANGESET_SUFFIXES = ('.osm.gz', '.osm')
+REPLICATION_DIFF_SUFFIXES = ('.osc.gz', '.osc')
+
+# The two feeds have separate sequence numbers, so each has its own cursor in replication_state
+REPLICATION_FEED_CHANGESETS = 'changesets'
+REPLICATION_FEED_DIFFS = 'diffs'
+
+def find_replication_files(directory, suffixes):
+    """Replication files under `directory` ending in one of `suffixes`, in sequence order"""
+    paths = []
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if filename.endswith(suffixes):
+                paths.append(os.path.join(dirpath, filename))
+    # Sequence paths are zero-padded (000/123/456), so name order is sequence order
+    return sorted(paths)
+
+def replication_sequence(directory, path):
+    """Sequence number of a replication file from its path (000/123/456.osc.gz -> 123456), or None"""
+    digits = ''.join(char for char in os.path.relpath(path, directory).split('.')[0] if char.isdigit())
+    return int(digits) if digits else None
+
+def read_replication_state(directory):
+    """
+    The state.txt of a replication directory's diff feed as {'sequence', 'timestamp'}, or None
+    state.txt is a Java properties file: sequenceNumber=123 and timestamp=2024-01-01T00\\:00\\:00Z
+    """
+    path = os.path.join(directory, 'state.txt')
+    if not os.path.isfile(path):
+        return None
+    properties = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#') and '=' in line:
+                key, value = line.split('=', 1)
+                properties[key.strip()] = value.strip().replace('\\', '')
+    try:
+        return {'sequence': int(properties['sequenceNumber']), 'timestamp': properties.get('timestamp')}
+    except (KeyError, ValueError):
+        print(f"WARNING: Ignoring malformed replication state {path}")
+        return None
+
+def open_replication_file(path):
+    """Open a replication file for binary reading, gunzipping .gz files"""
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+def iter_replication_file_chunks(path, chunk_size=64 * 1024):
+    """Yield the decompressed content of a replication file in chunks"""
+    with open_replication_file(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+def iter_replication_changesets(path):
+    """Yield the closed changesets of a changeset replication file (parse_changeset_element format)"""
+    with open_replication_file(path) as f:
+        for _, elem in ET.iterparse(f):
+            if elem.tag != 'changeset':
+                continue
+            if elem.get('open') != 'true' and elem.get('closed_at'):
+                yield parse_changeset_element(elem)
+            elem.clear()
+
+def merge_analyses(total, analysis):
+    """Add the counts of one analysis into another (a changeset can span several diff files)"""
+    for action in ('created', 'modified', 'deleted'):
+        for elem_type, count in analysis['details'][action].items():
+            total['details'][action][elem_type] += count
+        total['details'][f'total_{action}'] += analysis['details'][f'total_{action}']
+    for key in ('erp_count', 'oneway_count', 'access_count'):
+        total[key] += analysis[key]
+    for name, count in analysis['rule_counts'].items():
+        total['rule_counts'][name] = total['rule_counts'].get(name, 0) + count
+    return total
+
+def analyze_replication_diff(path):
+    """
+    Stream one osmChange diff and analyze the elements of each changeset in it
+    Returns dict mapping changeset id -> analysis for the changesets present in the diff
+    """
+    elements_by_changeset = {}
+    for element in iter_osmchange_chunks(iter_replication_file_chunks(path)):
+        elements_by_changeset.setdefault(element['changeset'], []).append(element)
+    return {cs_id: analyze_osmchange(elements) for cs_id, elements in elements_by_changeset.items()}
+
+def new_replication_files(directory, suffixes, cursor, last_sequence=None):
+    """
+    Files of one replication feed after its cursor (sequence <= last_sequence when given)
+    Returns (paths, newest sequence among them or the cursor)
+    """
+    paths = []
+    newest = cursor
+    for path in find_replication_files(directory, suffixes):
+        seq = replication_sequence(directory, path)
+        if seq is None or (cursor is not None and seq <= cursor) or (last_sequence is not None and seq > last_sequence):
+            continue
+        paths.append(path)
+        newest = seq if newest is None else max(newest, seq)
+    return paths, newest
+
+def ingest_replication(directory, regions=None):
+    """
+    Backfill the changeset store from replication files instead of the API
+    Each feed is read from its cursor + 1 (see replication_state): new diffs are analyzed
+    per changeset first, then new changeset files give the changesets that closed. Those
+    are clipped to the region polygons (assign_changesets_to_regions, same as the API path),
+    validated and stored with their region membership and the analysis of all their diffs.
+    Diff analyses of changesets that haven't closed yet are kept for a later run
+    Diffs after the sequence in state.txt may still be being written and are left for later
+    Changesets without any diff are validated on their metadata only; the API path
+    analyzes them on demand
+    Returns dict mapping region id -> number of changesets ingested
+    """
+    regions = regions or list(REGIONS)
+    start_time_overall = time.time()
+    
+    changeset_cursor = load_replication_state(directory, REPLICATION_FEED_CHANGESETS)
+    diff_cursor = load_replication_state(directory, REPLICATION_FEED_DIFFS)
+    diff_state = read_replication_state(directory)
+    
+    diff_files, diff_sequence = new_replication_files(
+        directory, REPLICATION_DIFF_SUFFIXES, diff_cursor and diff_cursor['sequence'],
+        diff_state and diff_state['sequence']
+    )
+    changeset_files, changeset_sequence = new_replication_files(
+        directory, REPLICATION_CHANGESET_SUFFIXES, changeset_cursor and changeset_cursor['sequence']
+    )
+    print(f"Reading {len(diff_files)} diff and {len(changeset_files)} changeset replication files from {directory}...")
+    
+    # Diff analyses accumulate per changeset until the changeset shows up closed
+    analyses = load_replication_pending()
+    for file_idx, path in enumerate(diff_files):
+        try:
+            diff_analyses = analyze_replication_diff(path)
+        except Exception as e:
+            print(f"   WARNING: Skipping unreadable diff {path}: {e}")
+            continue
+        
+        for cs_id, analysis in diff_analyses.items():
+            if cs_id in analyses:
+                merge_analyses(analyses[cs_id], analysis)
+            else:
+                analyses[cs_id] = analysis
+        
+        if (file_idx + 1) % 100 == 0:
+            print(f"   Progress: {file_idx + 1}/{len(diff_files)} diff files processed...")
+    
+    changesets = {}
+    closed_ids = set()
+    region_members = {region: [] for region in regions}
+    for path in changeset_files:
+        file_changesets = list(iter_replication_changesets(path))
+        closed_ids.update(cs['id'] for cs in file_changesets)
+        for region, members in assign_changesets_to_regions(file_changesets, regions).items():
+            for cs in members:
+                changesets[cs['id']] = cs
+            region_members[region].extend(members)
+    
+    print(f"   {len(changesets)} closed changesets in {', '.join(get_region_name(r) for r in regions)}")
+    region_analyses = {cs_id: analyses[cs_id] for cs_id in changesets if cs_id in analyses}
+    print(f"   Analyzed {len(region_analyses)}/{len(changesets)} changesets from diffs")
+    store_changeset_analyses(region_analyses)
+    
+    for cs_id, cs in changesets.items():
+        analysis = region_analyses.get(cs_id)
+        if analysis:
+            cs['details'] = analysis['details']
+            total_from_details = analysis['details']['total_created'] + analysis['details']['total_modified'] + analysis['details']['total_deleted']
+            if total_from_details > 0:
+                cs['num_changes'] = total_from_details
+        # Never fall back to the API here - a backfill can cover many thousands of changesets
+        cs['validation'] = validate_changeset(cs, analysis=analysis or {})
+        add_mass_change_tags(cs)
+    
+    if changesets:
+        store_changesets(list(changesets.values()))
+        for region, members in region_members.items():
+            store_region_changesets(region, members)
+    
+    # Cursors move last, so a run that fails part way is read again from the same files
+    store_replication_pending(analyses, closed_ids)
+    if diff_sequence is not None:
+        timestamp = diff_state['timestamp'] if diff_state and diff_state['sequence'] == diff_sequence else None
+        store_replication_state(directory, REPLICATION_FEED_DIFFS, diff_sequence, timestamp)
+    if changeset_sequence is not None:
+        closed_at = max((cs['closed_at'] for cs in changesets.values()), default=None)
+        store_replication_state(directory, REPLICATION_FEED_CHANGESETS, changeset_sequence,
+                                closed_at or (changeset_cursor and changeset_cursor['timestamp']))
+    
+    total_time = time.time() - start_time_overall
+    print(f"SUCCESS: Ingested {len(changesets)} changesets from replication files in {total_time:.1f}s")
+    return {region: len(members) for region, members in region_members.items()}
+
+@app.cli.command('ingest-replication')
+@click.argument('directory', default=ATLAS_REPLICATION_DIR)
+@click.option('--region', 'regions', multiple=True, help='Region id to ingest (repeatable, default: all regions)')
+def ingest_replication_command(directory, regions):
+    """Backfill the changeset store from OSM replication files in DIRECTORY"""
+    for region in regions:
+        if region not in REGIONS:
+            raise click.BadParameter(f'Region {region} not found', param_hint='--region')
+    if not os.path.isdir(directory):
+        raise click.BadParameter(f'{directory} is not a directory', param_hint='DIRECTORY')
+    
+    counts = ingest_replication(directory, list(regions) or None)
+    for region, count in counts.items():
+        click.echo(f"{get_region_name(region)}: {count} changesets")
+
+# ============================================
+# Analytics History
+# ============================================
+
+# Criteria trends cover this many days. The series is the day rollups; past days not in
+# the store yet are backfilled one day at a time in the background, so each day is
+# fetched from OSM once and analytics requests only read the rollups
+ANALYTICS_HISTORY_DAYS = int(os.environ.get('ATLAS_ANALYTICS_HISTORY_DAYS', '90'))
+
+# Most changesets fetched for one region-day (10 list requests)
+HISTORY_DAY_CHANGESET_LIMIT = 1000
+
+history_thread = None
+history_thread_lock = threading.Lock()
+
+def get_history_start():
+    """First day ('YYYY-MM-DD') of the analytics history horizon"""
+    return (datetime.now(timezone.utc) - timedelta(days=ANALYTICS_HISTORY_DAYS - 1)).strftime('%Y-%m-%d')
+
+def get_missing_history_days(region):
+    """Past days within the horizon that haven't been backfilled for a region (newest first)"""
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    done = load_history_days(region, since=get_history_start())
+    days = [(today - timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(1, ANALYTICS_HISTORY_DAYS)]
+    return [day for day in days if day not in done]
+
+def backfill_history_day(region, day):
+    """
+    Fetch, analyze and validate one past day of a region's changesets into the store,
+    which adds them to the rollups. No alerts are sent for historical changesets
+    The day is only marked done if the list was fetched and every changeset could be analyzed
+    """
+    day_start = datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    try:
+        changesets = fetch_changeset_list(region, limit=HISTORY_DAY_CHANGESET_LIMIT, start_time=day_start,
+                                          end_time=day_start + timedelta(days=1), raise_errors=True)
+    except Exception as e:
+        print(f"WARNING: Couldn't fetch history for {get_region_name(region)} on {day}, will retry: {e}")
+        return False
+    if changesets:
+        enrich_changesets(changesets)
+        for cs in changesets:
+            cs['validation'] = validate_changeset(cs)
+            add_mass_change_tags(cs)
+        store_changesets(changesets)
+        store_region_changesets(region, changesets)
+    
+    if any('details' not in cs for cs in changesets):
+        print(f"WARNING: History for {get_region_name(region)} on {day} is incomplete, will retry")
+        return False
+    store_history_day(region, day, len(changesets))
+    return True
+
+@osm_priority(OSM_PRIORITY_BACKFILL, caller='history-backfill')
+def backfill_analytics_history(regions):
+    """Backfill the missing history days of each region, newest first"""
+    for region in regions:
+        missing = get_missing_history_days(region)
+        if not missing:
+            continue
+        print(f"Backfilling {len(missing)} day(s) of analytics history for {get_region_name(region)}")
+        completed = sum(1 for day in missing if backfill_history_day(region, day))
+        print(f"SUCCESS: Backfilled {completed}/{len(missing)} history day(s) for {get_region_name(region)}")
+
+def start_history_backfill(regions):
+    """Start a background backfill for the regions unless one is already running"""
+    global history_thread
+    with history_thread_lock:
+        if history_thread is not None and history_thread.is_alive():
+            return False
+        if not any(get_missing_history_days(region) for region in regions):
+            return False
+        history_thread = threading.Thread(target=backfill_analytics_history, args=(list(regions),), name='atlas-history', daemon=True)
+        history_thread.start()
+    return True
+
+def get_criteria_trend(region):
+    """
+    Daily criteria flag counts for a region over the history horizon (oldest first), read
+    from the day rollups. Starts a backfill for missing past days without waiting for it
+    """
+    if start_history_backfill([region]):
+        print(f"Analytics history for {get_region_name(region)} is incomplete - backfilling in the background")
+    return load_changeset_rollups(region, 'day', since=get_history_start())
+
 @app.route('/')
 def index():
     """Serve the dashboard HTML page"""
@@ -1607,8 +3469,8 @@ def get_changesets():
             'error': f'Region {region} not found'
         }), 404
     
-    # Use limit=1000 to match analytics endpoint and ensure all changesets are included
-    changesets = fetch_osm_changesets(region=region, limit=1000)
+    # Served from the ingested region window (same 1000 limit the analytics endpoint uses)
+    changesets = get_region_changesets(region)
     return jsonify({
         'success': True,
         'count': len(changesets),
@@ -1624,275 +3486,468 @@ def debug_changeset(changeset_id):
         details = fetch_changeset_details(changeset_id)
         
         # Also fetch raw XML to see what's actually there
-        url = f"https://api.openstreetmap.org/api/0.6/changeset/{changeset_id}/download"
-        headers = {'User-Agent': 'ATLAS-Singapore/1.0'}
-        response = requests.get(url, headers=headers, timeout=10)
+        response = osm_get(f"/changeset/{changeset_id}/download", timeout='download')
         
         xml_preview = response.text[:1000]  # First 1000 chars
         
         return jsonify({
-            'success': True,
-            'changeset_id': changeset_id,
-            'details': details,
-            'xml_preview': xml_preview
-        })
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+            'success': True,
+            'changeset_id': changeset_id,
+            'details': details,
+            'xml_preview': xml_preview
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============================================
+# Comparison Bundles
+# ============================================
+
+# Reviewers almost always open the changesets validation flagged, so their comparisons
+# are built in the background as they're ingested and served from the changeset store
+ATLAS_PREBUILD_COMPARISONS = os.environ.get('ATLAS_PREBUILD_COMPARISONS', 'true').lower() == 'true'
+
+comparison_queue = queue.Queue()
+comparison_pending = set()
+comparison_thread = None
+comparison_lock = threading.Lock()
+
+# Largest number of modified elements whose old versions are fetched for one comparison
+# request - larger changesets get full coverage from a comparison job (see run_comparison_job)
+MAX_ELEMENTS_TO_FETCH = 500
+
+def download_comparison_elements(changeset_id):
+    """
+    Download a changeset once and return (routing_elements by action, node_table):
+    node coordinates are collected for way geometry, only routing elements (roads) are kept
+    Raises on download errors (requests exceptions)
+    """
+    node_rows = []
+    routing_elements = {
+        'created': [],
+        'modified': [],
+        'deleted': []
+    }
+    with osm_get(f"/changeset/{changeset_id}/download", timeout='comparison', stream=True) as response:
+        response.raise_for_status()
+        
+        for element in iter_osmchange_elements(response):
+            if element['type'] == 'node' and element['lat'] is not None and element['lon'] is not None:
+                node_rows.append((element['id'], element['lat'], element['lon']))
+            
+            # FILTER: Only process routing elements (roads)
+            if is_routing_element(element):
+                routing_elements[element['action']].append(element)
+    
+    # The new versions in the download are the previous versions of the next edits
+    store_element_versions(routing_elements['created'] + routing_elements['modified'])
+    
+    # Ways without coordinates get center and geometry from nodes in changeset
+    node_table = NodeTable.from_rows(node_rows)
+    apply_way_geometries(routing_elements['created'] + routing_elements['modified'], node_table)
+    
+    return routing_elements, node_table
+
+def apply_old_version(item, old_data):
+    """Merge a fetch_previous_versions_batch result into a modified element (old geometry: apply_old_way_geometries)"""
+    item['old_tags'] = old_data['old_tags']
+    item['old_lat'] = old_data['old_lat']
+    item['old_lon'] = old_data['old_lon']
+    item['old_nodes'] = old_data['old_nodes']
+
+def apply_deleted_geometry(item, geometry):
+    """Merge a fetch_deleted_geometries_batch result into a deleted element"""
+    item['lat'] = geometry['lat']
+    item['lon'] = geometry['lon']
+    item['geometry'] = geometry.get('geometry')
+
+def comparison_metadata(modified_items, deleted_items, limited):
+    """Coverage metadata of a comparison; limited when old versions were only fetched up to MAX_ELEMENTS_TO_FETCH"""
+    return {
+        'total_modified': len(modified_items),
+        'modified_with_old_data': sum(1 for m in modified_items if 'old_tags' in m),
+        'total_deleted': len(deleted_items),
+        'deleted_with_geometry': sum(1 for d in deleted_items if d.get('lat')),
+        'is_large_changeset': limited or len(deleted_items) > 200,
+        # The client pages through /comparison?cursor= for the rest
+        'comparison_job': limited
+    }
+
+def iter_changeset_comparison(changeset_id):
+    """
+    Build the before/after comparison for a changeset as a sequence of records, so
+    callers can use elements as soon as they are resolved:
+      {'type': 'summary', 'counts': {action: n}} once the download is parsed,
+      {'type': 'element', 'action': ..., 'element': ...} for every routing element -
+        created first, then modified (with old versions) and deleted (with geometry)
+        one multi-fetch chunk at a time, in download order,
+      {'type': 'done', 'metadata': {...}} last
+    Raises on download errors (requests exceptions)
+    """
+    routing_elements, node_table = download_comparison_elements(changeset_id)
+    
+    yield {'type': 'summary', 'counts': {action: len(items) for action, items in routing_elements.items()}}
+    
+    for created_item in routing_elements['created']:
+        yield {'type': 'element', 'action': 'created', 'element': created_item}
+    
+    # Old versions are resolved with multi-fetch requests (/ways?ways=1v2,...) instead of one call per element
+    modified_items = routing_elements['modified']
+    total_modified = len(modified_items)
+    
+    if total_modified > MAX_ELEMENTS_TO_FETCH:
+        print(f"📍 Large changeset detected: {total_modified} modified elements")
+        print(f"📍 Fetching old versions for first {MAX_ELEMENTS_TO_FETCH} elements...")
+        items_to_fetch = modified_items[:MAX_ELEMENTS_TO_FETCH]
+    else:
+        print(f"📍 Fetching old versions for {total_modified} modified elements...")
+        items_to_fetch = modified_items
+    
+    # Deleted elements - must fetch from API since changeset strips coordinates
+    deleted_items = routing_elements['deleted']
+    items_needing_geometry = [item for item in deleted_items if not item['lat']]
+    
+    # All chunks are resolved in parallel; each is emitted as soon as it and the ones
+    # before it are done, so the first elements arrive after one round-trip
+    modified_chunks = [items_to_fetch[i:i + OSM_MULTIFETCH_CHUNK] for i in range(0, len(items_to_fetch), OSM_MULTIFETCH_CHUNK)]
+    deleted_chunks = [items_needing_geometry[i:i + OSM_MULTIFETCH_CHUNK] for i in range(0, len(items_needing_geometry), OSM_MULTIFETCH_CHUNK)]
+    
+    with ThreadPoolExecutor(max_workers=OSM_WORKER_THREADS) as executor:
+        old_version_futures = [submit_osm_task(executor, fetch_previous_versions_batch, chunk) for chunk in modified_chunks]
+        geometry_futures = [submit_osm_task(executor, fetch_deleted_geometries_batch, chunk) for chunk in deleted_chunks]
+        
+        fetched_old_versions = 0
+        for chunk, future in zip(modified_chunks, old_version_futures):
+            old_versions = future.result()
+            fetched_old_versions += len(old_versions)
+            
+            for item in chunk:
+                old_data = old_versions.get((item['type'], item['id']))
+                if old_data:
+                    apply_old_version(item, old_data)
+            apply_old_way_geometries(chunk, node_table)
+            for item in chunk:
+                yield {'type': 'element', 'action': 'modified', 'element': item}
+        
+        if items_to_fetch:
+            print(f"  ✓ Fetched {fetched_old_versions}/{len(items_to_fetch)} old versions")
+        
+        # Elements beyond the fetch limit are sent without old versions
+        for item in modified_items[len(items_to_fetch):]:
+            yield {'type': 'element', 'action': 'modified', 'element': item}
+        
+        print(f"📍 Processing {len(deleted_items)} deleted elements...")
+        
+        # Deleted elements keep download order, waiting on their chunk's geometries as needed
+        rebuilt_geometries = 0
+        needing_seen = 0
+        geometries = {}
+        for item in deleted_items:
+            if not item['lat']:
+                if needing_seen % OSM_MULTIFETCH_CHUNK == 0:
+                    geometries = geometry_futures[needing_seen // OSM_MULTIFETCH_CHUNK].result()
+                    rebuilt_geometries += len(geometries)
+                needing_seen += 1
+                
+                geometry = geometries.get((item['type'], item['id']))
+                if geometry:
+                    apply_deleted_geometry(item, geometry)
+            yield {'type': 'element', 'action': 'deleted', 'element': item}
+        
+        if items_needing_geometry:
+            print(f"  ✓ Rebuilt geometry for {rebuilt_geometries}/{len(items_needing_geometry)} deleted elements")
+    
+    # Add metadata about processing
+    metadata = comparison_metadata(modified_items, deleted_items, total_modified > MAX_ELEMENTS_TO_FETCH)
+    
+    print(f"SUCCESS: Comparison complete: {len(routing_elements['created'])} created, {total_modified} modified, {len(deleted_items)} deleted")
+    if metadata['is_large_changeset']:
+        print(f"   Large changeset: {metadata['modified_with_old_data']}/{metadata['total_modified']} modified with old data, {metadata['deleted_with_geometry']}/{metadata['total_deleted']} deleted with geometry")
+    
+    yield {'type': 'done', 'metadata': metadata}
+
+def iter_comparison_records(comparison):
+    """The iter_changeset_comparison records of an already built comparison"""
+    yield {'type': 'summary', 'counts': {action: len(comparison[action]) for action in ('created', 'modified', 'deleted')}}
+    for action in ('created', 'modified', 'deleted'):
+        for item in comparison[action]:
+            yield {'type': 'element', 'action': action, 'element': item}
+    yield {'type': 'done', 'metadata': comparison['metadata']}
+
+def build_changeset_comparison(changeset_id):
+    """
+    Build the before/after comparison for a changeset: routing elements by action, with
+    old versions of modified elements and geometry of deleted ones, plus metadata
+    Raises on download errors (requests exceptions)
+    """
+    comparison_data = {
+        'created': [],
+        'modified': [],
+        'deleted': []
+    }
+    for record in iter_changeset_comparison(changeset_id):
+        if record['type'] == 'element':
+            comparison_data[record['action']].append(record['element'])
+        elif record['type'] == 'done':
+            comparison_data['metadata'] = record['metadata']
+    return comparison_data
+
+def enqueue_comparison_bundles(changeset_ids):
+    """
+    Queue closed changesets for background comparison building, skipping ones that are
+    already built or queued. Returns the number queued
+    """
+    global comparison_thread
+    if not ATLAS_PREBUILD_COMPARISONS:
+        return 0
+    ids = list(dict.fromkeys(str(cs_id) for cs_id in changeset_ids))
+    if not ids:
+        return 0
+    built = load_comparison_bundle_ids(ids)
+    with comparison_lock:
+        ids = [cs_id for cs_id in ids if cs_id not in built and cs_id not in comparison_pending]
+        for cs_id in ids:
+            comparison_pending.add(cs_id)
+            comparison_queue.put(cs_id)
+        if ids and comparison_thread is None:
+            comparison_thread = threading.Thread(target=comparison_worker, name='atlas-comparisons', daemon=True)
+            comparison_thread.start()
+    if ids:
+        print(f"Queued {len(ids)} comparison(s) for background building")
+    return len(ids)
+
+@osm_priority(OSM_PRIORITY_REFRESH, caller='comparison-prebuild')
+def comparison_worker():
+    """Background worker: build and store queued comparisons one at a time"""
+    while True:
+        changeset_id = comparison_queue.get()
+        try:
+            start_time_build = time.time()
+            store_comparison_bundle(changeset_id, build_changeset_comparison(changeset_id))
+            print(f"Prebuilt comparison for changeset #{changeset_id} in {time.time() - start_time_build:.1f}s")
+        except Exception as e:
+            print(f"WARNING: Couldn't prebuild comparison for changeset #{changeset_id}: {e}")
+        finally:
+            with comparison_lock:
+                comparison_pending.discard(changeset_id)
+
+# Comparison jobs fetch old versions for every element of a large changeset in the
+# background; progress is stored per element so a restarted worker picks up where it stopped
+COMPARISON_JOB_PAGE_SIZE = 500
+
+# A failed job (e.g. the download failed) is retried by the next page request after this long,
+# up to COMPARISON_JOB_MAX_ATTEMPTS runs in all (restarts included)
+COMPARISON_JOB_RETRY_SECONDS = 60
+COMPARISON_JOB_MAX_ATTEMPTS = 5
+
+# Elements whose old version or geometry failed to fetch for a transient reason (timeout,
+# 5xx, rate limit) stay pending and are retried after this long; the job fails once an
+# element has failed COMPARISON_ELEMENT_MAX_ATTEMPTS times. Redacted or deleted versions
+# (404/410) are resolved without old data straight away
+COMPARISON_ELEMENT_RETRY_SECONDS = 30
+COMPARISON_ELEMENT_MAX_ATTEMPTS = 3
+
+comparison_jobs = {}
+comparison_jobs_lock = threading.Lock()
+comparison_jobs_resumed = False
+
+def resolve_comparison_job_elements(changeset_id, node_table, executor):
+    """
+    One pass over the unresolved elements of a job: fetch old versions and deleted geometry
+    one multi-fetch chunk per worker thread at a time, committing after each step
+    Returns the number of elements left pending after a transient fetch failure
+    """
+    cursor = 0
+    retrying = 0
+    while True:
+        pending = load_comparison_job_elements(changeset_id, cursor, limit=OSM_MULTIFETCH_CHUNK * OSM_WORKER_THREADS, resolved=False)
+        if not pending:
+            return retrying
+        cursor = pending[-1][0] + 1
+        
+        failed = set()
+        modified_items = [element for seq, action, element in pending if action == 'modified']
+        deleted_items = [element for seq, action, element in pending if action == 'deleted']
+        old_version_futures = [
+            submit_osm_task(executor, fetch_previous_versions_batch, modified_items[i:i + OSM_MULTIFETCH_CHUNK], failed)
+            for i in range(0, len(modified_items), OSM_MULTIFETCH_CHUNK)
+        ]
+        geometry_futures = [
+            submit_osm_task(executor, fetch_deleted_geometries_batch, deleted_items[i:i + OSM_MULTIFETCH_CHUNK], failed)
+            for i in range(0, len(deleted_items), OSM_MULTIFETCH_CHUNK)
+        ]
+        old_versions = {}
+        for future in old_version_futures:
+            old_versions.update(future.result())
+        geometries = {}
+        for future in geometry_futures:
+            geometries.update(future.result())
+        
+        for item in modified_items:
+            old_data = old_versions.get((item['type'], item['id']))
+            if old_data:
+                apply_old_version(item, old_data)
+        apply_old_way_geometries(modified_items, node_table)
+        for item in deleted_items:
+            geometry = geometries.get((item['type'], item['id']))
+            if geometry:
+                apply_deleted_geometry(item, geometry)
+        
+        # Elements whose previous version is gone (redacted or deleted, 404/410) are resolved
+        # without old data or geometry, like in a one-shot comparison; the rest are retried
+        resolved = [(seq, action, element) for seq, action, element in pending if (element['type'], element['id']) not in failed]
+        retry_seqs = [seq for seq, action, element in pending if (element['type'], element['id']) in failed]
+        store_comparison_job_progress(changeset_id, resolved, retry_seqs)
+        retrying += len(retry_seqs)
+
+@osm_priority(OSM_PRIORITY_REFRESH, caller='comparison-job')
+def run_comparison_job(changeset_id):
+    """Download (first run only) and resolve every routing element of a changeset, then mark the job complete"""
+    try:
+        job = load_comparison_job(changeset_id)
+        if job is None or job['total'] is None:
+            print(f"Starting comparison job for changeset #{changeset_id}...")
+            routing_elements, node_table = download_comparison_elements(changeset_id)
+            records = (
+                [('created', item, True) for item in routing_elements['created']] +
+                [('modified', item, False) for item in routing_elements['modified']] +
+                [('deleted', item, bool(item['lat'])) for item in routing_elements['deleted']]
+            )
+            create_comparison_job(changeset_id, records, node_table)
+            job = load_comparison_job(changeset_id)
+        else:
+            print(f"Resuming comparison job for changeset #{changeset_id} ({job['resolved']}/{job['total']} resolved)")
+        node_table = job['node_table']
+        
+        with ThreadPoolExecutor(max_workers=OSM_WORKER_THREADS) as executor:
+            while True:
+                retrying = resolve_comparison_job_elements(changeset_id, node_table, executor)
+                if not retrying:
+                    break
+                exhausted = count_exhausted_comparison_job_elements(changeset_id, COMPARISON_ELEMENT_MAX_ATTEMPTS)
+                if exhausted:
+                    raise RuntimeError(f"{exhausted} element(s) could not be fetched after {COMPARISON_ELEMENT_MAX_ATTEMPTS} attempts")
+                print(f"Comparison job for changeset #{changeset_id}: retrying {retrying} element(s) in {COMPARISON_ELEMENT_RETRY_SECONDS}s")
+                time.sleep(COMPARISON_ELEMENT_RETRY_SECONDS)
+        
+        elements = load_comparison_job_elements(changeset_id)
+        metadata = comparison_metadata(
+            [element for seq, action, element in elements if action == 'modified'],
+            [element for seq, action, element in elements if action == 'deleted'],
+            False
+        )
+        finish_comparison_job(changeset_id, 'complete', metadata)
+        print(f"SUCCESS: Comparison job complete for changeset #{changeset_id}: {metadata['modified_with_old_data']}/{metadata['total_modified']} modified with old data")
+    except Exception as e:
+        print(f"WARNING: Comparison job for changeset #{changeset_id} failed: {e}")
+        finish_comparison_job(changeset_id, 'failed', error=str(e))
+    finally:
+        with comparison_jobs_lock:
+            comparison_jobs.pop(changeset_id, None)
+
+def start_comparison_job(changeset_id):
+    """
+    Start (or resume) the comparison job of a changeset unless it is complete, already
+    running in this process, or failed - less than COMPARISON_JOB_RETRY_SECONDS ago or
+    COMPARISON_JOB_MAX_ATTEMPTS times
+    Returns the job row, or None if it was only just started
+    """
+    changeset_id = str(changeset_id)
+    job = load_comparison_job(changeset_id)
+    if job is not None and job['status'] == 'complete':
+        return job
+    if job is not None and job['status'] == 'failed':
+        failed_at = datetime.fromisoformat(job['updated_at'])
+        if (job['attempts'] >= COMPARISON_JOB_MAX_ATTEMPTS or
+                (datetime.now(timezone.utc) - failed_at).total_seconds() < COMPARISON_JOB_RETRY_SECONDS):
+            return job
+    with comparison_jobs_lock:
+        if changeset_id not in comparison_jobs:
+            start_comparison_job_attempt(changeset_id)
+            if job is not None:
+                job = load_comparison_job(changeset_id)
+            comparison_jobs[changeset_id] = threading.Thread(
+                target=run_comparison_job, args=(changeset_id,), name=f'atlas-comparison-{changeset_id}', daemon=True
+            )
+            comparison_jobs[changeset_id].start()
+    return job
+
+def resume_comparison_jobs():
+    """Restart the comparison jobs a previous process left running (once per process)"""
+    global comparison_jobs_resumed
+    if comparison_jobs_resumed:
+        return
+    comparison_jobs_resumed = True
+    changeset_ids = load_comparison_job_ids('running')
+    for changeset_id in changeset_ids:
+        start_comparison_job(changeset_id)
+    if changeset_ids:
+        print(f"Resumed {len(changeset_ids)} comparison job(s)")
+
+def get_comparison_job_page(changeset_id, cursor):
+    """
+    One page of a comparison job for /comparison?cursor=: resolved elements from `cursor`
+    on (in download order) and the cursor for the next page - the same cursor while
+    the job is still resolving, None once everything has been returned
+    """
+    try:
+        cursor = int(cursor)
+        if cursor < 0:
+            raise ValueError(cursor)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': f'Invalid cursor: {cursor}',
+            'error_type': 'invalid_cursor'
+        }), 400
+    
+    job = start_comparison_job(changeset_id)
+    if job is not None and job['status'] == 'failed':
+        return jsonify({
+            'success': False,
+            'error': job['error'] or 'Comparison job failed',
+            'error_type': 'server_error'
+        }), 500
+    
+    elements = []
+    if job is not None and job['total'] is not None:
+        elements = load_comparison_job_elements(changeset_id, cursor, COMPARISON_JOB_PAGE_SIZE, resolved=True)
+    next_cursor = elements[-1][0] + 1 if elements else cursor
+    complete = job is not None and job['status'] == 'complete'
+    
+    return jsonify({
+        'success': True,
+        'changeset_id': changeset_id,
+        'status': 'complete' if complete else 'running',
+        'total': job['total'] if job else None,
+        'resolved': job['resolved'] if job else 0,
+        'elements': [{'action': action, 'element': element} for seq, action, element in elements],
+        'next_cursor': None if complete and next_cursor >= job['total'] else next_cursor,
+        'metadata': job['metadata'] if complete else None
+    })
 
 @app.route('/api/changeset/<changeset_id>/comparison')
-@cache.cached(timeout=3600, key_prefix='comparison_%s')
+@cache.cached(timeout=3600, key_prefix='comparison_%s', unless=lambda: 'cursor' in request.args)
+@osm_priority(OSM_PRIORITY_INTERACTIVE)
 def get_changeset_comparison(changeset_id):
     """
     Fetch detailed before/after comparison for a changeset
     Returns all changes with old and new values
-    CACHED: Results cached for 1 hour for performance
+    Flagged changesets are served from their prebuilt bundle, others are built on demand
+    With ?cursor= the comparison is paged from a background comparison job instead, with
+    old versions for every element (see get_comparison_job_page)
+    CACHED: Results cached for 1 hour for performance (not for job pages)
     """
+    if 'cursor' in request.args:
+        return get_comparison_job_page(changeset_id, request.args['cursor'])
+    
     try:
-        print(f"Fetching comparison for changeset #{changeset_id}...")
-        # Fetch changeset details from OSM API
-        url = f"https://api.openstreetmap.org/api/0.6/changeset/{changeset_id}/download"
-        headers = {'User-Agent': 'ATLAS-Singapore/1.0'}
-        response = requests.get(url, headers=headers, timeout=120)  # Increased initial timeout
-        response.raise_for_status()
-        
-        root = ET.fromstring(response.content)
-        
-        # Build a lookup table of all nodes in the changeset for calculating way centers
-        node_coords = {}
-        for node in root.findall('.//node'):
-            node_id = node.get('id')
-            lat = node.get('lat')
-            lon = node.get('lon')
-            if node_id and lat and lon:
-                node_coords[node_id] = {
-                    'lat': float(lat),
-                    'lon': float(lon)
-                }
-        
-        comparison_data = {
-            'created': [],
-            'modified': [],
-            'deleted': []
-        }
-        
-        # Parse created elements - FILTER: Only process routing elements (roads)
-        for create_elem in root.findall('create'):
-            for elem in create_elem:
-                # Only process roads (ways with highway tag)
-                if not is_routing_element(elem):
-                    continue
-                    
-                created_item = parse_osm_element(elem, 'created')
-                
-                # For ways without coordinates, calculate center and geometry from nodes in changeset
-                if not created_item['lat'] and created_item['type'] == 'way' and created_item['nodes']:
-                    # Build geometry array from node refs
-                    geometry_coords = []
-                    for node_id in created_item['nodes']:
-                        if node_id in node_coords:
-                            geometry_coords.append([node_coords[node_id]['lat'], node_coords[node_id]['lon']])
-                    
-                    if len(geometry_coords) > 0:
-                        # Calculate center
-                        lats = [coord[0] for coord in geometry_coords]
-                        lons = [coord[1] for coord in geometry_coords]
-                        created_item['lat'] = sum(lats) / len(lats)
-                        created_item['lon'] = sum(lons) / len(lons)
-                        created_item['geometry'] = geometry_coords if len(geometry_coords) > 1 else None
-                
-                comparison_data['created'].append(created_item)
-        
-        # Parse modified elements - FILTER: Only process routing elements (roads)
-        modified_items = []
-        for modify_elem in root.findall('modify'):
-            for elem in modify_elem:
-                # Only process roads (ways with highway tag)
-                if not is_routing_element(elem):
-                    continue
-                    
-                modified_item = parse_osm_element(elem, 'modified')
-                
-                # For ways without coordinates, calculate center and geometry from nodes in changeset
-                if not modified_item['lat'] and modified_item['type'] == 'way' and modified_item['nodes']:
-                    # Build geometry array from node refs
-                    geometry_coords = []
-                    for node_id in modified_item['nodes']:
-                        if node_id in node_coords:
-                            geometry_coords.append([node_coords[node_id]['lat'], node_coords[node_id]['lon']])
-                    
-                    if len(geometry_coords) > 0:
-                        # Calculate center
-                        lats = [coord[0] for coord in geometry_coords]
-                        lons = [coord[1] for coord in geometry_coords]
-                        modified_item['lat'] = sum(lats) / len(lats)
-                        modified_item['lon'] = sum(lons) / len(lons)
-                        modified_item['geometry'] = geometry_coords if len(geometry_coords) > 1 else None
-                
-                modified_items.append(modified_item)
-        
-        # IMPROVED: Process modified elements in chunks with dynamic timeout
-        total_modified = len(modified_items)
-        CHUNK_SIZE = 50  # Process 50 at a time
-        MAX_ELEMENTS_TO_FETCH = 500  # Increased from 100
-        
-        if total_modified > MAX_ELEMENTS_TO_FETCH:
-            print(f"📍 Large changeset detected: {total_modified} modified elements")
-            print(f"📍 Fetching old versions for first {MAX_ELEMENTS_TO_FETCH} elements...")
-            items_to_fetch = modified_items[:MAX_ELEMENTS_TO_FETCH]
+        comparison_data = load_comparison_bundle(changeset_id)
+        if comparison_data is not None:
+            print(f"Serving prebuilt comparison for changeset #{changeset_id}")
         else:
-            print(f"📍 Fetching old versions for {total_modified} modified elements...")
-            items_to_fetch = modified_items
-        
-        # Process in chunks to avoid overwhelming the API
-        if len(items_to_fetch) > 0:
-            chunks = [items_to_fetch[i:i + CHUNK_SIZE] for i in range(0, len(items_to_fetch), CHUNK_SIZE)]
-            total_chunks = len(chunks)
-            total_errors = 0
-            
-            for chunk_idx, chunk in enumerate(chunks):
-                print(f"  📦 Processing chunk {chunk_idx + 1}/{total_chunks} ({len(chunk)} elements)...")
-                
-                with ThreadPoolExecutor(max_workers=10) as executor:  # Reduced workers to avoid rate limits
-                    future_to_item = {}
-                    for item in chunk:
-                        future = executor.submit(fetch_previous_element_version, item['type'], item['id'], item['version'])
-                        future_to_item[future] = item
-                    
-                    completed = 0
-                    errors = 0
-                    chunk_timeout = min(90, 30 + len(chunk) * 2)  # Dynamic timeout based on chunk size
-                    
-                    try:
-                        for future in as_completed(future_to_item, timeout=chunk_timeout):
-                            item = future_to_item[future]
-                            completed += 1
-                            try:
-                                old_data = future.result(timeout=10)
-                                if old_data:
-                                    # Merge old data into item
-                                    item['old_tags'] = old_data['old_tags']
-                                    item['old_lat'] = old_data['old_lat']
-                                    item['old_lon'] = old_data['old_lon']
-                                    item['old_nodes'] = old_data['old_nodes']
-                                    
-                                    # Calculate old geometry if it's a way
-                                    if item['type'] == 'way' and old_data['old_nodes']:
-                                        old_geometry_coords = []
-                                        for node_id in old_data['old_nodes']:
-                                            if node_id in node_coords:
-                                                old_geometry_coords.append([node_coords[node_id]['lat'], node_coords[node_id]['lon']])
-                                        
-                                        if len(old_geometry_coords) > 1:
-                                            item['old_geometry'] = old_geometry_coords
-                                    
-                                    if completed % 10 == 0 or completed == len(future_to_item):
-                                        print(f"    ✓ [{completed}/{len(future_to_item)}] Fetched old versions...")
-                                else:
-                                    errors += 1
-                            except Exception as e:
-                                errors += 1
-                                total_errors += 1
-                                if errors <= 5:  # Only log first few errors per chunk
-                                    print(f"    WARNING: Error fetching {item['type']} #{item['id']}: {str(e)[:50]}")
-                    except TimeoutError:
-                        print(f"    WARNING: Chunk timeout after {completed}/{len(future_to_item)} completed")
-                        total_errors += (len(future_to_item) - completed)
-                    
-                    print(f"    Chunk {chunk_idx + 1}: {completed - errors} successful, {errors} failed")
-                    
-                    # Small delay between chunks to avoid rate limiting
-                    if chunk_idx < total_chunks - 1:
-                        time.sleep(0.5)
-            
-            if total_errors > 0:
-                print(f"  WARNING: Total errors across all chunks: {total_errors}")
-        
-        comparison_data['modified'] = modified_items
-        
-        # Parse deleted elements - FILTER: Only process routing elements (roads)
-        # Must fetch from API since changeset strips coordinates
-        deleted_items = []
-        for delete_elem in root.findall('delete'):
-            for elem in delete_elem:
-                # Only process roads (ways with highway tag)
-                if not is_routing_element(elem):
-                    continue
-                    
-                deleted_item = parse_osm_element(elem, 'deleted')
-                deleted_items.append(deleted_item)
-        
-        print(f"📍 Processing {len(deleted_items)} deleted elements...")
-        
-        # IMPROVED: Process deleted elements in chunks
-        if len(deleted_items) > 0:
-            CHUNK_SIZE_DELETED = 30  # Smaller chunks for deleted (more complex)
-            items_needing_geometry = [item for item in deleted_items if not item['lat']]
-            
-            if len(items_needing_geometry) > 0:
-                chunks = [items_needing_geometry[i:i + CHUNK_SIZE_DELETED] for i in range(0, len(items_needing_geometry), CHUNK_SIZE_DELETED)]
-                total_chunks = len(chunks)
-                total_deleted_errors = 0
-                
-                for chunk_idx, chunk in enumerate(chunks):
-                    print(f"  📦 Processing deleted chunk {chunk_idx + 1}/{total_chunks} ({len(chunk)} elements)...")
-                    
-                    with ThreadPoolExecutor(max_workers=8) as executor:
-                        future_to_item = {}
-                        for item in chunk:
-                            future = executor.submit(fetch_element_geometry, item['type'], item['id'], item['version'])
-                            future_to_item[future] = item
-                        
-                        completed = 0
-                        errors = 0
-                        chunk_timeout = min(120, 40 + len(chunk) * 3)  # Longer timeout for deleted elements
-                        
-                        try:
-                            for future in as_completed(future_to_item, timeout=chunk_timeout):
-                                item = future_to_item[future]
-                                completed += 1
-                                try:
-                                    geometry = future.result(timeout=20)
-                                    if geometry:
-                                        item['lat'] = geometry['lat']
-                                        item['lon'] = geometry['lon']
-                                        item['geometry'] = geometry.get('geometry')
-                                        geo_type = "line" if geometry.get('geometry') else "point"
-                                        if completed % 10 == 0 or (item['type'] == 'way' and completed <= 5):
-                                            print(f"    ✓ [{completed}/{len(future_to_item)}] {item['type']} #{item['id']}: {geometry['lat']:.4f}, {geometry['lon']:.4f} ({geo_type})")
-                                    else:
-                                        errors += 1
-                                except Exception as e:
-                                    errors += 1
-                                    total_deleted_errors += 1
-                                    if errors <= 5:
-                                        print(f"    ✗ [{completed}/{len(future_to_item)}] {item['type']} #{item['id']}: {str(e)[:50]}")
-                        except TimeoutError:
-                            print(f"    WARNING: Chunk timeout after {completed}/{len(future_to_item)} completed")
-                            total_deleted_errors += (len(future_to_item) - completed)
-                        
-                        print(f"    Deleted chunk {chunk_idx + 1}: {completed - errors} successful, {errors} failed")
-                        
-                        # Delay between chunks
-                        if chunk_idx < total_chunks - 1:
-                            time.sleep(0.5)
-                
-                if total_deleted_errors > 0:
-                    print(f"  WARNING: Total deleted element errors: {total_deleted_errors}")
-        
-        comparison_data['deleted'] = deleted_items
-        
-        # Add metadata about processing
-        comparison_data['metadata'] = {
-            'total_modified': total_modified,
-            'modified_with_old_data': sum(1 for m in modified_items if 'old_tags' in m),
-            'total_deleted': len(deleted_items),
-            'deleted_with_geometry': sum(1 for d in deleted_items if d.get('lat')),
-            'is_large_changeset': total_modified > MAX_ELEMENTS_TO_FETCH or len(deleted_items) > 200
-        }
-        
-        print(f"SUCCESS: Comparison complete: {len(comparison_data['created'])} created, {len(comparison_data['modified'])} modified, {len(comparison_data['deleted'])} deleted")
-        if comparison_data['metadata']['is_large_changeset']:
-            print(f"   Large changeset: {comparison_data['metadata']['modified_with_old_data']}/{comparison_data['metadata']['total_modified']} modified with old data, {comparison_data['metadata']['deleted_with_geometry']}/{comparison_data['metadata']['total_deleted']} deleted with geometry")
+            print(f"Fetching comparison for changeset #{changeset_id}...")
+            comparison_data = build_changeset_comparison(changeset_id)
         
         return jsonify({
             'success': True,
@@ -1917,6 +3972,37 @@ def get_changeset_comparison(changeset_id):
             'error_type': 'server_error'
         }), 500
 
+@app.route('/api/changeset/<changeset_id>/comparison/stream')
+def stream_changeset_comparison(changeset_id):
+    """
+    Streaming variant of the comparison endpoint: newline-delimited JSON, one
+    iter_changeset_comparison record per line, so the maps can render created elements
+    while old versions and deleted geometry are still being resolved
+    Errors after the response has started arrive as a {'type': 'error'} record
+    """
+    def generate():
+        with osm_priority(OSM_PRIORITY_INTERACTIVE):
+            try:
+                comparison = load_comparison_bundle(changeset_id)
+                if comparison is not None:
+                    print(f"Streaming prebuilt comparison for changeset #{changeset_id}")
+                    records = iter_comparison_records(comparison)
+                else:
+                    print(f"Streaming comparison for changeset #{changeset_id}...")
+                    records = iter_changeset_comparison(changeset_id)
+                for record in records:
+                    yield json.dumps(record) + '\n'
+            except requests.exceptions.Timeout:
+                print(f"TIMEOUT: Timeout fetching changeset #{changeset_id}")
+                yield json.dumps({'type': 'error', 'error': 'Request timeout - changeset is too large. Try again or contact support.', 'error_type': 'timeout'}) + '\n'
+            except Exception as e:
+                print(f"Error streaming comparison: {e}")
+                yield json.dumps({'type': 'error', 'error': str(e), 'error_type': 'server_error'}) + '\n'
+    
+    # Disable proxy buffering so each record reaches the browser as soon as it's written
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/changeset/<changeset_id>/analysis', methods=['POST'])
 def analyze_changeset_comparison(changeset_id):
     """
@@ -2140,28 +4226,90 @@ This changeset contains **{total_changes} total changes**:
     
     return analysis
 
-def calculate_way_center(node_refs, node_coords):
+class NodeTable:
     """
-    Calculate center point of a way from its node references
-    node_refs: list of node IDs
-    node_coords: dict mapping node ID to {lat, lon}
-    Returns dict with lat/lon or None
+    Node coordinates as arrays - sorted int64 ids and an (n, 2) float64 lat/lon table -
+    so the node refs of many ways are resolved with one searchsorted and fancy indexing
+    instead of a dict lookup per ref
     """
-    lats = []
-    lons = []
+    __slots__ = ('ids', 'coords')
     
-    for node_id in node_refs:
-        if node_id in node_coords:
-            lats.append(node_coords[node_id]['lat'])
-            lons.append(node_coords[node_id]['lon'])
+    def __init__(self, ids, coords):
+        self.ids = ids
+        self.coords = coords
     
-    if lats and lons:
-        return {
-            'lat': sum(lats) / len(lats),
-            'lon': sum(lons) / len(lons)
-        }
+    @classmethod
+    def from_rows(cls, rows):
+        """Table from (id, lat, lon) rows; a node listed more than once keeps its last coordinates"""
+        rows = list(rows)
+        ids = np.fromiter((int(row[0]) for row in rows), dtype=np.int64, count=len(rows))
+        coords = np.fromiter((value for row in rows for value in row[1:]), dtype=np.float64, count=2 * len(rows)).reshape(len(rows), 2)
+        order = np.argsort(ids, kind='stable')
+        ids, coords = ids[order], coords[order]
+        last = np.append(ids[1:] != ids[:-1], True) if len(ids) else np.zeros(0, dtype=bool)
+        return cls(ids[last], coords[last])
     
-    return None
+    def to_rows(self):
+        """[id, lat, lon] rows (JSON-serializable, see from_rows)"""
+        return [[node_id, lat, lon] for node_id, (lat, lon) in zip(self.ids.tolist(), self.coords.tolist())]
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def way_geometries(self, ways_refs):
+        """
+        Known node coordinates of each way, given a list of node refs per way
+        Returns (centers, geometries): centers is an (n, 2) lat/lon array (NaN for ways
+        with no known nodes), geometries[i] the [lat, lon] pairs of way i in ref order
+        """
+        if not ways_refs:
+            return np.zeros((0, 2)), []
+        lengths = np.fromiter((len(refs) for refs in ways_refs), dtype=np.int64, count=len(ways_refs))
+        refs = np.fromiter((int(ref) for way_refs in ways_refs for ref in way_refs), dtype=np.int64, count=int(lengths.sum()))
+        way_index = np.repeat(np.arange(len(ways_refs)), lengths)
+        
+        if len(self.ids):
+            positions = np.minimum(np.searchsorted(self.ids, refs), len(self.ids) - 1)
+            found = self.ids[positions] == refs
+        else:
+            positions = np.zeros(len(refs), dtype=np.int64)
+            found = np.zeros(len(refs), dtype=bool)
+        coords = self.coords[positions[found]]
+        way_index = way_index[found]
+        
+        counts = np.bincount(way_index, minlength=len(ways_refs))
+        sums = np.column_stack([
+            np.bincount(way_index, weights=coords[:, 0], minlength=len(ways_refs)),
+            np.bincount(way_index, weights=coords[:, 1], minlength=len(ways_refs))
+        ])
+        with np.errstate(invalid='ignore'):
+            centers = sums / counts[:, None]
+        
+        # One conversion to lists, then each way is a slice of it
+        coord_list = coords.tolist()
+        ends = np.cumsum(counts).tolist()
+        starts = [0] + ends[:-1]
+        return centers, [coord_list[start:end] for start, end in zip(starts, ends)]
+
+def apply_way_geometries(items, node_table):
+    """
+    For parsed ways without coordinates, fill in their center (lat/lon) and geometry
+    from the node coordinates found in the same changeset
+    """
+    ways = [item for item in items if not item['lat'] and item['type'] == 'way' and item['nodes']]
+    centers, geometries = node_table.way_geometries([item['nodes'] for item in ways])
+    for item, center, geometry in zip(ways, centers.tolist(), geometries):
+        if geometry:
+            item['lat'], item['lon'] = center
+            item['geometry'] = geometry if len(geometry) > 1 else None
+
+def apply_old_way_geometries(items, node_table):
+    """Fill in the old geometry of modified ways from their old node refs (when more than one node is known)"""
+    ways = [item for item in items if item['type'] == 'way' and item.get('old_nodes')]
+    centers, geometries = node_table.way_geometries([item['old_nodes'] for item in ways])
+    for item, geometry in zip(ways, geometries):
+        if len(geometry) > 1:
+            item['old_geometry'] = geometry
 
 def parse_osm_element(elem, action):
     """Parse OSM element into structured data"""
@@ -2170,6 +4318,7 @@ def parse_osm_element(elem, action):
         'id': elem.get('id'),
         'action': action,
         'version': elem.get('version'),
+        'changeset': elem.get('changeset'),
         'lat': float(elem.get('lat')) if elem.get('lat') else None,
         'lon': float(elem.get('lon')) if elem.get('lon') else None,
         'tags': {},
@@ -2195,223 +4344,263 @@ def parse_osm_element(elem, action):
     
     return element_data
 
-@lru_cache(maxsize=1000)
-def fetch_previous_element_version(element_type, element_id, current_version):
+def iter_osmchange_elements(response, chunk_size=64 * 1024):
     """
-    Fetch the previous version of an element to get its old tags/attributes
-    Used for showing before/after state of modified elements
-    Returns dict with old_tags, old_lat, old_lon, etc. or None
-    CACHED: Uses LRU cache to avoid redundant API calls
+    Stream-parse an osmChange download (requests response opened with stream=True)
+    Yields one parse_osm_element dict per node/way/relation, with 'action' set to
+    created/modified/deleted. Each element is dropped from the tree once yielded so
+    memory stays flat even for bulk imports with tens of thousands of elements
+    """
+    return iter_osmchange_chunks(response.iter_content(chunk_size=chunk_size))
+
+def iter_osmchange_chunks(chunks):
+    """Stream-parse osmChange XML from an iterable of byte chunks (see iter_osmchange_elements)"""
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+    action_elem = None
+    action_key = None
+    depth = 0
+    
+    def drain():
+        nonlocal root, action_elem, action_key, depth
+        for event, elem in parser.read_events():
+            if event == 'start':
+                depth += 1
+                if depth == 1:
+                    root = elem
+                elif depth == 2:
+                    action_key = OSMCHANGE_ACTIONS.get(elem.tag)
+                    action_elem = elem
+                continue
+            
+            depth -= 1
+            if depth == 2 and action_key and elem.tag in ('node', 'way', 'relation'):
+                yield parse_osm_element(elem, action_key)
+                # Drop the processed subtree (its tags, nds and members)
+                action_elem.remove(elem)
+            elif depth == 1:
+                # End of a <create>/<modify>/<delete> block (or anything else at that level)
+                root.remove(elem)
+                action_elem = None
+                action_key = None
+    
+    for chunk in chunks:
+        if chunk:
+            parser.feed(chunk)
+            yield from drain()
+    parser.close()
+    yield from drain()
+
+# Max element refs per multi-fetch request (/nodes?nodes=...), keeps URLs well under server limits
+OSM_MULTIFETCH_CHUNK = 100
+
+def fetch_elements_chunk(element_type, refs, failed=None):
+    """
+    Fetch one chunk of elements with the OSM multi-fetch endpoint
+    e.g. /nodes?nodes=123,456v2 - a ref with a version fetches that exact version
+    refs: list of (element_id, version_or_None) string tuples
+    Returns dict mapping each resolved ref to its parsed element (parse_osm_element
+    shape plus 'visible'). Deleted elements come back with visible=False and no coordinates
+    Refs that don't exist (404/410) are simply missing from the result; refs that couldn't
+    be fetched for another reason (timeout, 5xx, rate limit) are also added to `failed`
+    as (element_type, element_id), so callers can retry them
     """
     try:
-        headers = {'User-Agent': 'ATLAS-Singapore/1.0'}
-        prev_version = int(current_version) - 1
-        
-        if prev_version < 1:
-            return None
-        
-        # Fetch the previous version
-        url = f"https://api.openstreetmap.org/api/0.6/{element_type}/{element_id}/{prev_version}"
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        ids_param = ','.join(f"{element_id}v{version}" if version else str(element_id) for element_id, version in refs)
+        response = osm_get(f"/{element_type}s", params={f"{element_type}s": ids_param})
+        
+        # A single missing id/version fails the whole request - split the chunk to isolate it
+        if response.status_code in (404, 410) and len(refs) > 1:
+            middle = len(refs) // 2
+            results = fetch_elements_chunk(element_type, refs[:middle], failed)
+            results.update(fetch_elements_chunk(element_type, refs[middle:], failed))
+            return results
+        
+        if response.status_code in (404, 410):
+            return {}
+        if response.status_code != 200:
+            print(f"    ✗ Error fetching {len(refs)} {element_type}s: HTTP {response.status_code}")
+            if failed is not None:
+                failed.update((element_type, element_id) for element_id, _ in refs)
+            return {}
         
         root = ET.fromstring(response.content)
-        elem = root.find(f'.//{element_type}')
-        
-        if elem is None:
-            return None
-        
-        # Extract old data
-        old_data = {
-            'old_version': elem.get('version'),
-            'old_lat': float(elem.get('lat')) if elem.get('lat') else None,
-            'old_lon': float(elem.get('lon')) if elem.get('lon') else None,
-            'old_tags': {},
-            'old_nodes': []
-        }
+        by_key = {}
+        for elem in root.findall(element_type):
+            record = parse_osm_element(elem, None)  # Not part of a changeset, so no action
+            record['visible'] = elem.get('visible', 'true') != 'false'
+            by_key[(record['id'], record['version'])] = record
+            by_key[(record['id'], None)] = record
         
-        # Parse old tags
-        for tag in elem.findall('tag'):
-            old_data['old_tags'][tag.get('k')] = tag.get('v')
-        
-        # Parse old nodes (for ways)
-        for nd in elem.findall('nd'):
-            old_data['old_nodes'].append(nd.get('ref'))
-        
-        return old_data
+        return {ref: by_key[ref] for ref in refs if ref in by_key}
         
     except Exception as e:
-        print(f"    ✗ Error fetching previous version for {element_type} {element_id} v{current_version}: {e}")
-        return None
+        print(f"    ✗ Error fetching {len(refs)} {element_type}s: {e}")
+        if failed is not None:
+            failed.update((element_type, element_id) for element_id, _ in refs)
+        return {}
 
-@lru_cache(maxsize=1000)
-def fetch_element_geometry(element_type, element_id, version=None):
+def fetch_elements_batch(element_type, refs, failed=None):
     """
-    Fetch full geometry for a way, relation, or deleted node
-    For deleted elements, must provide version number to fetch the previous version
-    Returns dict with lat/lon (center) AND geometry array (full coordinates) or None
-    CACHED: Uses LRU cache to avoid redundant API calls
+    Resolve many element refs of one type in multi-fetch chunks of OSM_MULTIFETCH_CHUNK
+    refs: iterable of (element_id, version_or_None); duplicates are fetched once
+    Versioned refs are read from the element version store first, and every version
+    fetched is stored, so each element version is downloaded once
+    Returns dict mapping (element_id, version_or_None) -> parsed element
+    failed: optional set collecting transient failures (see fetch_elements_chunk)
     """
+    refs = list(dict.fromkeys((str(element_id), str(version) if version else None) for element_id, version in refs))
+    results = load_element_versions(element_type, [ref for ref in refs if ref[1]])
+    refs = [ref for ref in refs if ref not in results]
+    chunks = [refs[i:i + OSM_MULTIFETCH_CHUNK] for i in range(0, len(refs), OSM_MULTIFETCH_CHUNK)]
+    
+    fetched = {}
+    if len(chunks) == 1:
+        fetched = fetch_elements_chunk(element_type, chunks[0], failed)
+    elif chunks:
+        with ThreadPoolExecutor(max_workers=min(OSM_WORKER_THREADS, len(chunks))) as executor:
+            futures = [submit_osm_task(executor, fetch_elements_chunk, element_type, chunk, failed) for chunk in chunks]
+            for future in as_completed(futures):
+                fetched.update(future.result())
+    
+    if fetched:
+        store_element_versions({(record['id'], record['version']): record for record in fetched.values()}.values())
+    results.update(fetched)
+    return results
+
+def previous_version_ref(version):
+    """Version string of the version before `version`, or None if there is none"""
     try:
-        headers = {'User-Agent': 'ATLAS-Singapore/1.0'}
-        
-        # For deleted elements, fetch the previous version
-        if version is not None:
-            prev_version = int(version) - 1
-            if prev_version < 1:
-                print(f"    WARNING: {element_type} {element_id}: version {version} is too low (prev would be {prev_version})")
-                return None
-            
-            # For nodes, just fetch the previous version directly
-            if element_type == 'node':
-                url = f"https://api.openstreetmap.org/api/0.6/node/{element_id}/{prev_version}"
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                
-                root = ET.fromstring(response.content)
-                node = root.find('.//node')
-                
-                if node is not None:
-                    lat = node.get('lat')
-                    lon = node.get('lon')
-                    if lat and lon:
-                        return {
-                            'lat': float(lat),
-                            'lon': float(lon),
-                            'geometry': None  # Nodes don't have geometry
-                        }
-                return None
-            
-            # For ways: OSM API doesn't support /full for historical versions
-            # So we fetch the way to get node references, then fetch each node
-            print(f"    Fetching {element_type} {element_id} v{prev_version}...")
-            url = f"https://api.openstreetmap.org/api/0.6/{element_type}/{element_id}/{prev_version}"
-            response = requests.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            
-            root = ET.fromstring(response.content)
-            way_elem = root.find('.//way')
-            
-            if way_elem is None:
-                print(f"    ✗ Way {element_id} not found in response")
-                return None
-            
-            # Get node references from the way
-            node_refs = [nd.get('ref') for nd in way_elem.findall('nd')]
-            print(f"    📍 Way has {len(node_refs)} node references")
-            
-            if not node_refs:
-                return None
-            
-            # Fetch each node's coordinates
-            lats = []
-            lons = []
-            geometry = []
-            
-            for node_ref in node_refs:
-                try:
-                    # Try fetching the current node first
-                    node_url = f"https://api.openstreetmap.org/api/0.6/node/{node_ref}"
-                    node_response = requests.get(node_url, headers=headers, timeout=5)
-                    
-                    if node_response.status_code == 200:
-                        node_root = ET.fromstring(node_response.content)
-                        node = node_root.find('.//node')
-                        if node is not None:
-                            lat = node.get('lat')
-                            lon = node.get('lon')
-                            if lat and lon:
-                                lats.append(float(lat))
-                                lons.append(float(lon))
-                                geometry.append([float(lat), float(lon)])
-                    elif node_response.status_code == 410:  # Node was deleted
-                        # Try fetching the node's history to get its last coordinates
-                        try:
-                            history_url = f"https://api.openstreetmap.org/api/0.6/node/{node_ref}/history"
-                            history_resp = requests.get(history_url, headers=headers, timeout=5)
-                            if history_resp.status_code == 200:
-                                hist_root = ET.fromstring(history_resp.content)
-                                # Find the last visible version
-                                visible_nodes = [n for n in hist_root.findall('.//node') if n.get('visible') == 'true']
-                                if visible_nodes:
-                                    last_visible = visible_nodes[-1]  # Last visible version
-                                    lat = last_visible.get('lat')
-                                    lon = last_visible.get('lon')
-                                    if lat and lon:
-                                        lats.append(float(lat))
-                                        lons.append(float(lon))
-                                        geometry.append([float(lat), float(lon)])
-                        except:
-                            pass  # Skip this node if history fetch fails
-                except Exception as e:
-                    print(f"      ✗ Failed to fetch node {node_ref}: {str(e)[:30]}")
-                    continue
-            
-            print(f"    ✓ Successfully fetched {len(geometry)}/{len(node_refs)} nodes")
-        else:
-            # For current elements, fetch the full data
-            if element_type == 'node':
-                # Nodes don't need /full
-                url = f"https://api.openstreetmap.org/api/0.6/{element_type}/{element_id}"
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                
-                root = ET.fromstring(response.content)
-                node = root.find('.//node')
-                
-                if node is not None:
-                    lat = node.get('lat')
-                    lon = node.get('lon')
-                    if lat and lon:
-                        return {
-                            'lat': float(lat),
-                            'lon': float(lon),
-                            'geometry': None
-                        }
-                return None
-            
-            url = f"https://api.openstreetmap.org/api/0.6/{element_type}/{element_id}/full"
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            root = ET.fromstring(response.content)
-            
-            # Collect all node coordinates in order
-            lats = []
-            lons = []
-            geometry = []
-            
-            # Find all nodes in the response
-            for node in root.findall('.//node'):
-                lat = node.get('lat')
-                lon = node.get('lon')
-                if lat and lon:
-                    lats.append(float(lat))
-                    lons.append(float(lon))
-                    geometry.append([float(lat), float(lon)])
-        
-        # Calculate center point and return with full geometry
-        if lats and lons:
-            center_lat = sum(lats) / len(lats)
-            center_lon = sum(lons) / len(lons)
-            return {
-                'lat': center_lat,
-                'lon': center_lon,
-                'geometry': geometry if len(geometry) > 1 else None  # Return array of coordinates
-            }
-        
-        return None
-        
-    except Exception as e:
-        print(f"    ✗ Error fetching geometry for {element_type} {element_id} v{version}: {e}")
+        prev_version = int(version) - 1
+    except (TypeError, ValueError):
         return None
+    return str(prev_version) if prev_version >= 1 else None
+
+def fetch_previous_versions_batch(items, failed=None):
+    """
+    Fetch the previous version of many modified elements using multi-fetch requests
+    items: parsed elements with 'type', 'id' and 'version'
+    Returns dict mapping (type, id) -> {'old_version', 'old_lat', 'old_lon', 'old_tags', 'old_nodes'}
+    failed: optional set collecting the (type, id) of transient failures (see fetch_elements_chunk)
+    """
+    refs_by_type = {}
+    for item in items:
+        prev_version = previous_version_ref(item['version'])
+        if prev_version:
+            refs_by_type.setdefault(item['type'], []).append((item['id'], prev_version))
+    
+    old_versions = {}
+    for element_type, refs in refs_by_type.items():
+        for (element_id, _), record in fetch_elements_batch(element_type, refs, failed).items():
+            old_versions[(element_type, element_id)] = {
+                'old_version': record['version'],
+                'old_lat': record['lat'],
+                'old_lon': record['lon'],
+                'old_tags': record['tags'],
+                'old_nodes': record['nodes']
+            }
+    return old_versions
+
+def fetch_node_coordinates_batch(node_refs, failed=None):
+    """
+    Resolve coordinates for many node ids with multi-fetch requests
+    Nodes that were deleted since are resolved from their last visible version
+    Returns dict mapping node id -> (lat, lon)
+    failed: optional set collecting transient failures (see fetch_elements_chunk)
+    """
+    node_refs = list(dict.fromkeys(str(ref) for ref in node_refs))
+    current = fetch_elements_batch('node', [(ref, None) for ref in node_refs], failed)
+    
+    coords = {}
+    deleted_refs = []
+    for ref in node_refs:
+        record = current.get((ref, None))
+        if record and record['visible'] and record['lat'] is not None:
+            coords[ref] = (record['lat'], record['lon'])
+        elif record:
+            # Node was deleted - the version before the deletion is its last visible one
+            prev_version = previous_version_ref(record['version'])
+            if prev_version:
+                deleted_refs.append((ref, prev_version))
+    
+    if deleted_refs:
+        for (ref, _), record in fetch_elements_batch('node', deleted_refs, failed).items():
+            if record['lat'] is not None:
+                coords[ref] = (record['lat'], record['lon'])
+    
+    return coords
+
+def fetch_deleted_geometries_batch(items, failed=None):
+    """
+    Rebuild the geometry of many deleted elements from their previous versions
+    Nodes take the coordinates of their previous version. Ways take the node refs of
+    their previous version, then all node coordinates are resolved together, so a
+    deleted 200-node way costs a handful of requests instead of 200
+    items: parsed elements with 'type', 'id' and 'version'
+    Returns dict mapping (type, id) -> {'lat', 'lon', 'geometry'}
+    failed: optional set collecting the (type, id) of transient failures, including ways
+    with a node that failed (see fetch_elements_chunk)
+    """
+    refs_by_type = {}
+    for item in items:
+        prev_version = previous_version_ref(item['version'])
+        if prev_version and item['type'] in ('node', 'way'):
+            refs_by_type.setdefault(item['type'], []).append((item['id'], prev_version))
+    
+    geometries = {}
+    for (node_id, _), record in fetch_elements_batch('node', refs_by_type.get('node', []), failed).items():
+        if record['lat'] is not None:
+            geometries[('node', node_id)] = {'lat': record['lat'], 'lon': record['lon'], 'geometry': None}
+    
+    old_ways = fetch_elements_batch('way', refs_by_type.get('way', []), failed)
+    if old_ways:
+        all_node_refs = [ref for record in old_ways.values() for ref in record['nodes']]
+        print(f"    📍 {len(old_ways)} deleted way(s) reference {len(set(all_node_refs))} nodes")
+        node_failed = set()
+        node_coords = fetch_node_coordinates_batch(all_node_refs, node_failed)
+        if failed is not None and node_failed:
+            failed.update(('way', way_id) for (way_id, _), record in old_ways.items()
+                          if any(('node', ref) in node_failed for ref in record['nodes']))
+        node_table = NodeTable.from_rows((ref, lat, lon) for ref, (lat, lon) in node_coords.items())
+        
+        centers, way_geometries = node_table.way_geometries([record['nodes'] for record in old_ways.values()])
+        for (way_id, _), center, coordinates in zip(old_ways, centers.tolist(), way_geometries):
+            if coordinates:
+                geometries[('way', way_id)] = {
+                    'lat': center[0],
+                    'lon': center[1],
+                    'geometry': coordinates if len(coordinates) > 1 else None
+                }
+    
+    return geometries
+
+@app.route('/api/element/<element_type>/<element_id>/<version>')
+@osm_priority(OSM_PRIORITY_INTERACTIVE)
+def get_element_version(element_type, element_id, version):
+    """
+    One version of an element (tags, coordinates, node refs, members)
+    Served from the element version store, fetched from OSM (and stored) only once
+    """
+    if element_type not in ('node', 'way', 'relation') or not element_id.isdigit() or not version.isdigit():
+        return jsonify({'success': False, 'error': 'Invalid element reference'}), 400
+    record = fetch_elements_batch(element_type, [(element_id, version)]).get((element_id, version))
+    if not record:
+        return jsonify({'success': False, 'error': f'{element_type} {element_id} v{version} not found'}), 404
+    return jsonify({'success': True, 'element': record})
 
 @app.route('/api/statistics')
 def get_stats():
     """API endpoint to get statistics"""
     region_id = request.args.get('region', 'singapore')
-    changesets = fetch_osm_changesets(region=region_id)
-    stats = get_statistics(changesets)
+    if region_id not in REGIONS:
+        return jsonify({
+            'success': False,
+            'error': f'Region {region_id} not found'
+        }), 404
+    
+    # Statistics have always covered the 200 most recent changesets
+    window = get_region_window(region_id)
+    stats = get_statistics(window['changesets'][:200], window['columns'].take(slice(0, 200)))
     return jsonify({
         'success': True,
         'statistics': stats,
@@ -2422,89 +4611,37 @@ def get_stats():
 @app.route('/api/analytics')
 def get_analytics():
     """API endpoint to get analytics data for charts"""
+    region_id = request.args.get('region', 'singapore')
+    if region_id not in REGIONS:
+        return jsonify({
+            'success': False,
+            'error': f'Region {region_id} not found'
+        }), 404
+    
     try:
         # Fixed to 24 hours for regular analytics
         hours = 24
-        region_id = request.args.get('region', 'singapore')
         
         print(f"Fetching analytics for last 24 hours (region: {region_id})")
         
-        # Fetch changesets for the time range
-        changesets = fetch_osm_changesets(region=region_id, limit=1000)
+        # Changesets for the time range come from the ingested region window
+        window = get_region_window(region_id)
         
         # Filter by time range
         cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
-        changesets = [cs for cs in changesets if date_parser.parse(cs['created_at']) >= cutoff]
+        recent = window['columns'].created_ts >= int(cutoff.timestamp())
+        columns = window['columns'].take(recent)
+        changesets = [cs for cs, keep in zip(window['changesets'], recent) if keep]
         
         print(f"Found {len(changesets)} changesets in last 24 hours")
         
-        # Hourly buckets for 24h range
-        bucket_hours = 1
+        # Every figure below comes from the same window rows. The hourly rollups aren't used:
+        # the cutoff falls mid-hour, so their oldest bucket would reach past it
+        hour_buckets = sum_by_hour(columns)
         
-        # Group by time buckets for timeline (24h data)
-        timeline_data = {}
-        
-        for cs in changesets:
-            created_at = date_parser.parse(cs['created_at'])
-            # Round down to nearest bucket
-            bucket = created_at.replace(minute=0, second=0, microsecond=0)
-            bucket = bucket - timedelta(hours=bucket.hour % bucket_hours)
-            bucket_key = bucket.strftime('%Y-%m-%d %H:%M')
-            
-            if bucket_key not in timeline_data:
-                timeline_data[bucket_key] = {
-                    'created': 0,
-                    'modified': 0,
-                    'deleted': 0
-                }
-            
-            details = cs.get('details', {})
-            timeline_data[bucket_key]['created'] += details.get('total_created', 0)
-            timeline_data[bucket_key]['modified'] += details.get('total_modified', 0)
-            timeline_data[bucket_key]['deleted'] += details.get('total_deleted', 0)
-        
-        # Fetch all historical changesets for criteria trends (from beginning)
-        print(f"Fetching all historical changesets for criteria trends (region: {region_id})...")
-        # Fetch with higher limit and no time restriction (None = all history)
-        historical_changesets = fetch_osm_changesets(region=region_id, limit=10000, time_range_hours=None)
-        print(f"Found {len(historical_changesets)} historical changesets for criteria trends")
-        
-        # Ensure all historical changesets have validation
-        for cs in historical_changesets:
-            if 'validation' not in cs or not cs.get('validation') or not isinstance(cs.get('validation'), dict):
-                cs['validation'] = validate_changeset(cs)
-        
-        # Group historical changesets by daily buckets for criteria trends
-        criteria_timeline_data = {}
-        
-        for cs in historical_changesets:
-            created_at = date_parser.parse(cs['created_at'])
-            # Round down to start of day (daily buckets)
-            bucket = created_at.replace(hour=0, minute=0, second=0, microsecond=0)
-            bucket_key = bucket.strftime('%Y-%m-%d')
-            
-            if bucket_key not in criteria_timeline_data:
-                criteria_timeline_data[bucket_key] = {
-                    'mass_changes': 0,
-                    'erp': 0,
-                    'oneway': 0,
-                    'access': 0
-                }
-            
-            # Track criteria flags over time
-            validation = cs.get('validation', {})
-            flags = validation.get('flags', [])
-            if 'mass_changes' in flags:
-                criteria_timeline_data[bucket_key]['mass_changes'] += 1
-            if 'erp' in flags:
-                criteria_timeline_data[bucket_key]['erp'] += 1
-            if 'oneway' in flags:
-                criteria_timeline_data[bucket_key]['oneway'] += 1
-            if 'access' in flags:
-                criteria_timeline_data[bucket_key]['access'] += 1
-        
-        # Sort criteria timeline by date
-        sorted_criteria_timeline = sorted(criteria_timeline_data.items())
+        # Criteria trends are the persisted daily series over the history horizon
+        sorted_criteria_timeline = [(bucket['bucket'], bucket) for bucket in get_criteria_trend(region_id)]
+        print(f"Criteria trends: {len(sorted_criteria_timeline)} day(s) since {get_history_start()}")
         
         # Format criteria timeline labels (daily format)
         criteria_formatted_labels = []
@@ -2514,61 +4651,32 @@ def get_analytics():
             # Use abbreviated format to fit more dates on x-axis
             criteria_formatted_labels.append(dt.strftime('%m/%d/%y'))
         
-        # Sort timeline by date
-        sorted_timeline = sorted(timeline_data.items())
+        # Timeline buckets are already sorted by date
+        sorted_timeline = [(bucket['bucket'], bucket) for bucket in hour_buckets]
         
         # Aggregate totals
-        total_created = sum(cs.get('details', {}).get('total_created', 0) for cs in changesets)
-        total_modified = sum(cs.get('details', {}).get('total_modified', 0) for cs in changesets)
-        total_deleted = sum(cs.get('details', {}).get('total_deleted', 0) for cs in changesets)
+        total_created = sum(bucket['created'] for bucket in hour_buckets)
+        total_modified = sum(bucket['modified'] for bucket in hour_buckets)
+        total_deleted = sum(bucket['deleted'] for bucket in hour_buckets)
         
         # Element type breakdown
         element_breakdown = {
-            'created': {'nodes': 0, 'ways': 0, 'relations': 0},
-            'modified': {'nodes': 0, 'ways': 0, 'relations': 0},
-            'deleted': {'nodes': 0, 'ways': 0, 'relations': 0}
+            action: {f'{elem_type}s': sum(bucket[f'{action}_{elem_type}s'] for bucket in hour_buckets) for elem_type in ROLLUP_ELEMENT_TYPES}
+            for action in ROLLUP_ACTIONS
         }
         
-        for cs in changesets:
-            details = cs.get('details', {})
-            for action in ['created', 'modified', 'deleted']:
-                if action in details:
-                    for elem_type in ['node', 'way', 'relation']:
-                        key = elem_type + 's'
-                        element_breakdown[action][key] += details[action].get(elem_type, 0)
-        
-        # Ensure all changesets have validation set (re-validate if missing or invalid)
-        # This is critical - validation must be present and correct for filtering to work
-        for cs in changesets:
-            if 'validation' not in cs or not cs.get('validation') or not isinstance(cs.get('validation'), dict):
-                cs['validation'] = validate_changeset(cs)
-        
         # Get users with changesets needing review
         # IMPORTANT: Only count users who have changesets with status == 'needs_review'
-        users_needing_review = {}
-        total_changesets_checked = 0
-        needs_review_count = 0
+        # (window changesets are always validated - see apply_validation and rescore_region_windows)
+        total_changesets_checked = len(columns)
+        needs_review_count = int(columns.column('needs_review').sum())
+        review_counts = count_by_user(columns, weights=columns.column('needs_review'))
         
-        for cs in changesets:
-            total_changesets_checked += 1
-            
-            # Safely get validation status, ensuring it exists and is valid
-            validation = cs.get('validation', {})
-            if not isinstance(validation, dict):
-                # If validation is not a dict, re-validate
-                cs['validation'] = validate_changeset(cs)
-                validation = cs['validation']
-            
-            validation_status = validation.get('status', 'valid')
-            
-            # CRITICAL: Only include users who have changesets that actually need review
-            # Must be exactly 'needs_review' - not 'valid', not empty, not None
-            if validation_status == 'needs_review':
-                needs_review_count += 1
-                user = cs.get('user', 'Unknown')
-                # Only count valid usernames
-                if user and user != 'Unknown' and user.strip():
-                    users_needing_review[user] = users_needing_review.get(user, 0) + 1
+        # Only count valid usernames
+        for code, user in enumerate(columns.user_names):
+            if not user or user == 'Unknown' or not user.strip():
+                review_counts[code] = 0
+        users_needing_review = np.flatnonzero(review_counts)
         
         # Debug logging to help identify issues
         print(f"Validation check: {total_changesets_checked} changesets checked, {needs_review_count} need review, {len(users_needing_review)} unique users")
@@ -2578,16 +4686,19 @@ def get_analytics():
             print(f"WARNING: Suspiciously high number of users needing review ({len(users_needing_review)}/{len(changesets)} changesets)")
             print(f"   Sample validation statuses: {[cs.get('validation', {}).get('status', 'missing') for cs in changesets[:5]]}")
         
-        # Sort by number of changesets needing review
-        sorted_users = sorted(users_needing_review.items(), key=lambda x: x[1], reverse=True)[:10]
-        contributors_data = [{'user': user, 'changesets': count} for user, count in sorted_users]
+        # Sort by number of changesets needing review (ties in order of appearance)
+        first_review = first_seen_by_user(columns, columns.column('needs_review') > 0)
+        contributors_data = [
+            {'user': columns.user_names[code], 'changesets': int(review_counts[code])}
+            for code in top_k_indices(review_counts, 10, ties=first_review) if review_counts[code] > 0
+        ]
         
         print(f"Users with changesets needing review: {len(users_needing_review)}")
         if contributors_data:
             print(f"Top users needing review: {contributors_data[:5]}")
         
         # Get statistics for validation
-        stats = get_statistics(changesets)
+        stats = get_statistics(changesets, columns)
         
         # Format timeline labels (hourly for 24h)
         formatted_labels = []
@@ -2596,14 +4707,13 @@ def get_analytics():
             formatted_labels.append(dt.strftime('%H:%M'))
         
         # Generate summary statistics
-        unique_contributors = len(set(cs.get('user', 'Unknown') for cs in changesets))
+        unique_contributors = count_unique_users(columns)
         
         # Find most active hour
         hourly_activity = {}
-        for cs in changesets:
-            created_at = date_parser.parse(cs['created_at'])
-            hour_key = created_at.strftime('%H:00')
-            hourly_activity[hour_key] = hourly_activity.get(hour_key, 0) + 1
+        for bucket in hour_buckets:
+            hour_key = bucket['bucket'][11:16]
+            hourly_activity[hour_key] = hourly_activity.get(hour_key, 0) + bucket['changesets']
         
         most_active_hour = max(hourly_activity.items(), key=lambda x: x[1])[0] if hourly_activity else None
         
@@ -2668,21 +4778,19 @@ def get_analytics():
         }), 500
 
 @app.route('/api/profile/<username>')
+@osm_priority(OSM_PRIORITY_INTERACTIVE)
 def get_user_profile(username):
     """Get user profile information"""
     try:
         # First, we need to get the user ID by fetching a changeset from this user
         # We'll search for changesets by this user in Singapore to get their ID
-        changesets_url = "https://api.openstreetmap.org/api/0.6/changesets"
-        headers = {'User-Agent': 'ATLAS-Singapore/1.0'}
-        
         # Get a recent changeset to find user ID
         params = {
             'display_name': username,
             'closed': 'true'
         }
         
-        response = requests.get(changesets_url, params=params, headers=headers, timeout=10)
+        response = osm_get('/changesets', params=params, timeout='list')
         response.raise_for_status()
         
         # Parse to get user ID
@@ -2698,8 +4806,7 @@ def get_user_profile(username):
         display_name = first_changeset.get('user', username)
         
         # Now fetch user details using ID
-        user_url = f"https://api.openstreetmap.org/api/0.6/user/{user_id}"
-        user_response = requests.get(user_url, headers=headers, timeout=10)
+        user_response = osm_get(f"/user/{user_id}")
         user_response.raise_for_status()
         
         # Parse user data
@@ -2742,6 +4849,7 @@ def get_user_profile(username):
 
 @app.route('/api/profile/<username>/region-stats')
 @app.route('/api/profile/<username>/singapore-stats')
+@osm_priority(OSM_PRIORITY_INTERACTIVE)
 def get_user_region_stats(username):
     """Get user's statistics for a specific region (defaults to current region)"""
     region = request.args.get('region', CURRENT_REGION)
@@ -2757,16 +4865,13 @@ def get_user_region_stats(username):
     region_name = get_region_name(region)
     
     try:
-        headers = {'User-Agent': 'ATLAS-Singapore/1.0'}
-        
         # First get user ID by searching for their changesets
-        search_url = "https://api.openstreetmap.org/api/0.6/changesets"
         search_params = {
             'display_name': username,
             'closed': 'true'
         }
         
-        search_response = requests.get(search_url, params=search_params, headers=headers, timeout=10)
+        search_response = osm_get('/changesets', params=search_params, timeout='list')
         search_response.raise_for_status()
         
         search_root = ET.fromstring(search_response.content)
@@ -2779,8 +4884,6 @@ def get_user_region_stats(username):
         user_id = search_changesets[0].get('uid')
         
         # Fetch changesets for this user in the selected region
-        changesets_url = "https://api.openstreetmap.org/api/0.6/changesets"
-        
         end_time = datetime.now(timezone.utc)
         start_time = end_time - timedelta(days=365)
         
@@ -2791,7 +4894,7 @@ def get_user_region_stats(username):
             'time': f"{start_time.isoformat()}Z,{end_time.isoformat()}Z"
         }
         
-        response = requests.get(changesets_url, params=params, headers=headers, timeout=10)
+        response = osm_get('/changesets', params=params, timeout='list')
         response.raise_for_status()
         
         # Parse changesets
@@ -2814,6 +4917,7 @@ def get_user_region_stats(username):
             cs_data = {
                 'id': cs_id,
                 'created_at': created_at,
+                'created_ts': parse_osm_timestamp(created_at),
                 'num_changes': num_changes,
                 'comment': tags.get('comment', 'No comment'),
                 'created_by': tags.get('created_by', 'Unknown'),
@@ -2829,12 +4933,12 @@ def get_user_region_stats(username):
             changesets.append(cs_data)
         
         # Filter to only include changesets that are primarily within the region
-        changesets = [cs for cs in changesets if is_changeset_in_region(cs, region)]
+        changesets = filter_changesets_in_region(changesets, region)
         
         # Fetch detailed statistics for changesets
         print(f"Fetching detailed statistics for {len(changesets)} changesets...")
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_cs = {executor.submit(fetch_changeset_details, cs['id']): cs for cs in changesets}
+        with ThreadPoolExecutor(max_workers=OSM_WORKER_THREADS) as executor:
+            future_to_cs = {submit_osm_task(executor, fetch_changeset_details, cs['id']): cs for cs in changesets}
             
             for future in as_completed(future_to_cs):
                 cs = future_to_cs[future]
@@ -2893,18 +4997,20 @@ def get_user_region_stats(username):
                 log_changeset_needing_review(log_data, validation_flags, 'Auto-detected during user stats fetch')
         
         # Calculate statistics
+        columns = ChangesetColumns.from_changesets(changesets)
         total_changesets = len(changesets)
-        total_changes = sum(cs['num_changes'] for cs in changesets)
+        total_changes = int(columns.num_changes.sum())
         
         # Detailed breakdown
-        total_created = sum(cs.get('details', {}).get('total_created', 0) for cs in changesets)
-        total_modified = sum(cs.get('details', {}).get('total_modified', 0) for cs in changesets)
-        total_deleted = sum(cs.get('details', {}).get('total_deleted', 0) for cs in changesets)
+        total_created = int(columns.column('created').sum())
+        total_modified = int(columns.column('modified').sum())
+        total_deleted = int(columns.column('deleted').sum())
         
         # Validation breakdown
+        needs_review = int(columns.column('needs_review').sum())
         validation_counts = {
-            'valid': sum(1 for cs in changesets if cs.get('validation', {}).get('status') == 'valid'),
-            'needs_review': sum(1 for cs in changesets if cs.get('validation', {}).get('status') == 'needs_review')
+            'valid': total_changesets - needs_review,
+            'needs_review': needs_review
         }
         
         # Editor breakdown
@@ -2914,17 +5020,10 @@ def get_user_region_stats(username):
             editors[editor] = editors.get(editor, 0) + 1
         
         # Activity by month
-        activity_by_month = {}
-        for cs in changesets:
-            try:
-                date = date_parser.parse(cs['created_at'])
-                month_key = date.strftime('%Y-%m')
-                activity_by_month[month_key] = activity_by_month.get(month_key, 0) + 1
-            except:
-                pass
+        activity_by_month = count_by_month(columns)
         
         # Recent changesets (last 10)
-        recent_changesets = sorted(changesets, key=lambda x: x['created_at'], reverse=True)[:10]
+        recent_changesets = sorted(changesets, key=lambda x: x['created_ts'] or 0, reverse=True)[:10]
         
         stats = {
             'total_changesets': total_changesets,
@@ -2972,14 +5071,15 @@ def extract_changeset_id(message):
     return None
 
 
-@lru_cache(maxsize=500)
+changeset_data_cache = TTLCache('changeset_data', max_entries=500, max_bytes=8 * 1024 * 1024, ttl=600)
+
+@ttl_cached(changeset_data_cache)
 def fetch_changeset_data(changeset_id):
     """Fetch changeset data from OSM API
-    CACHED: Uses LRU cache to avoid redundant API calls"""
+    CACHED: for 10 minutes (failures only briefly)"""
     try:
         # Fetch changeset metadata
-        changeset_url = f'https://api.openstreetmap.org/api/0.6/changeset/{changeset_id}'
-        response = requests.get(changeset_url, timeout=10)
+        response = osm_get(f'/changeset/{changeset_id}')
         
         if response.status_code != 200:
             return None
@@ -3013,32 +5113,16 @@ def fetch_changeset_data(changeset_id):
             value = tag.get('v', '')
             data['tags'][key] = value
         
-        # Fetch download data to get actual changes
-        try:
-            download_url = f'https://api.openstreetmap.org/api/0.6/changeset/{changeset_id}/download'
-            download_response = requests.get(download_url, timeout=10)
+        # Get actual changes from the shared changeset analysis (single streamed download)
+        # FILTER: Only counts routing elements (roads)
+        details = fetch_changeset_details(changeset_id)
+        if details:
+            data['created'] = details['total_created']
+            data['modified'] = details['total_modified']
+            data['deleted'] = details['total_deleted']
             
-            if download_response.status_code == 200:
-                download_root = ET.fromstring(download_response.content)
-                
-                # Count different types of changes - FILTER: Only count routing elements (roads)
-                # Look for elements inside create/modify/delete parent tags
-                created = sum(1 for elem in download_root.findall('.//create/*') if is_routing_element(elem))
-                modified = sum(1 for elem in download_root.findall('.//modify/*') if is_routing_element(elem))
-                deleted = sum(1 for elem in download_root.findall('.//delete/*') if is_routing_element(elem))
-                
-                data['created'] = created
-                data['modified'] = modified
-                data['deleted'] = deleted
-                
-                print(f"Changeset {changeset_id}: created={created}, modified={modified}, deleted={deleted} (routing elements only)")
-            else:
-                print(f"Download endpoint returned status {download_response.status_code} for changeset {changeset_id}")
-                data['created'] = 0
-                data['modified'] = 0
-                data['deleted'] = 0
-        except Exception as e:
-            print(f"Error fetching download data for changeset {changeset_id}: {e}")
+            print(f"Changeset {changeset_id}: created={data['created']}, modified={data['modified']}, deleted={data['deleted']} (routing elements only)")
+        else:
             data['created'] = 0
             data['modified'] = 0
             data['deleted'] = 0
@@ -3054,18 +5138,26 @@ def generate_comparison_response(changeset_id):
     """Generate a comparison view for a changeset"""
     try:
         # Fetch comparison data from the existing endpoint logic
-        url = f"https://api.openstreetmap.org/api/0.6/changeset/{changeset_id}/download"
-        response = requests.get(url, timeout=30)
-        
-        if response.status_code != 200:
-            return f"Couldn't fetch changeset #{changeset_id}. It might not exist or be inaccessible."
-        
-        root = ET.fromstring(response.content)
-        
-        # Count elements - FILTER: Only count routing elements (roads)
-        created_count = sum(1 for elem in root.findall('.//create/*') if is_routing_element(elem))
-        modified_count = sum(1 for elem in root.findall('.//modify/*') if is_routing_element(elem))
-        deleted_count = sum(1 for elem in root.findall('.//delete/*') if is_routing_element(elem))
+        # Stream the download once, counting elements and keeping a few samples per action
+        # FILTER: Only count routing elements (roads)
+        counts = {'created': 0, 'modified': 0, 'deleted': 0}
+        samples = {'created': [], 'modified': [], 'deleted': []}
+        sample_limits = {'created': 5, 'modified': 3, 'deleted': 5}
+        with osm_get(f"/changeset/{changeset_id}/download", timeout='download', stream=True) as response:
+            if response.status_code != 200:
+                return f"Couldn't fetch changeset #{changeset_id}. It might not exist or be inaccessible."
+            
+            for element in iter_osmchange_elements(response):
+                if not is_routing_element(element):
+                    continue
+                action = element['action']
+                counts[action] += 1
+                if len(samples[action]) < sample_limits[action]:
+                    samples[action].append(element)
+        
+        created_count = counts['created']
+        modified_count = counts['modified']
+        deleted_count = counts['deleted']
         total = created_count + modified_count + deleted_count
         
         if total == 0:
@@ -3076,8 +5168,7 @@ This changeset is **empty** - no changes were made.
 Try analyzing a changeset with actual changes instead!"""
         
         # Get changeset bounds for map
-        changeset_url = f'https://api.openstreetmap.org/api/0.6/changeset/{changeset_id}'
-        changeset_response = requests.get(changeset_url, timeout=10)
+        changeset_response = osm_get(f'/changeset/{changeset_id}')
         bounds = None
         if changeset_response.status_code == 200:
             changeset_root = ET.fromstring(changeset_response.content)
@@ -3115,113 +5206,87 @@ I'll show you the **side-by-side before and after** changes with interactive map
         # Show created elements (sample) - FILTER: Only show routing elements (roads)
         if created_count > 0:
             response_text += "### **Created Elements**\n\n"
-            create_elem = root.find('create')
-            if create_elem is not None:
-                shown = 0
-                for elem in create_elem:
-                    # Only process routing elements (roads)
-                    if not is_routing_element(elem):
-                        continue
-                        
-                    if shown >= 5:  # Limit to first 5
-                        response_text += f"\n*...and {created_count - shown} more created elements*\n"
-                        break
-                    
-                    elem_type = elem.tag
-                    elem_id = elem.get('id', 'unknown')
-                    tags = {}
-                    for tag in elem.findall('tag'):
-                        tags[tag.get('k', '')] = tag.get('v', '')
-                    
-                    name = tags.get('name', 'Unnamed')
-                    elem_tags = ', '.join([f"`{k}={v}`" for k, v in list(tags.items())[:3]])
-                    
-                    response_text += f"- **{elem_type.capitalize()} #{elem_id}**: {name}\n"
-                    if elem_tags:
-                        response_text += f"  - Tags: {elem_tags}\n"
-                    shown += 1
-                response_text += "\n"
+            for elem in samples['created']:  # Limited to first 5
+                elem_type = elem['type']
+                elem_id = elem['id'] or 'unknown'
+                tags = elem['tags']
+                
+                name = tags.get('name', 'Unnamed')
+                elem_tags = ', '.join([f"`{k}={v}`" for k, v in list(tags.items())[:3]])
+                
+                response_text += f"- **{elem_type.capitalize()} #{elem_id}**: {name}\n"
+                if elem_tags:
+                    response_text += f"  - Tags: {elem_tags}\n"
+            
+            if created_count > len(samples['created']):
+                response_text += f"\n*...and {created_count - len(samples['created'])} more created elements*\n"
+            response_text += "\n"
         
         # Show modified elements with before/after tags - FILTER: Only show routing elements (roads)
         if modified_count > 0:
             response_text += "### **Modified Elements**\n\n"
-            modify_elem = root.find('modify')
-            if modify_elem is not None:
-                shown = 0
-                for elem in modify_elem:
-                    # Only process routing elements (roads)
-                    if not is_routing_element(elem):
-                        continue
-                        
-                    if shown >= 3:  # Limit to first 3 for detailed view
-                        response_text += f"\n*...and {modified_count - shown} more modified elements*\n"
-                        break
-                    
-                    elem_type = elem.tag
-                    elem_id = elem.get('id', 'unknown')
-                    version = elem.get('version', '?')
-                    prev_version = int(version) - 1 if version.isdigit() else None
-                    
-                    # Get current (new) tags
-                    new_tags = {}
-                    for tag in elem.findall('tag'):
-                        new_tags[tag.get('k', '')] = tag.get('v', '')
-                    
-                    name = new_tags.get('name', f'{elem_type} #{elem_id}')
+            # Previous versions come from the element version store, fetched in one batch if missing
+            old_versions = fetch_previous_versions_batch(samples['modified'])
+            shown = 0
+            for elem in samples['modified']:  # Limited to first 3 for detailed view
+                elem_type = elem['type']
+                elem_id = elem['id'] or 'unknown'
+                version = elem['version'] or '?'
+                prev_version = previous_version_ref(version)
+                
+                # Get current (new) tags
+                new_tags = elem['tags']
+                
+                name = new_tags.get('name', f'{elem_type} #{elem_id}')
+                
+                response_text += f"#### **{elem_type.capitalize()} #{elem_id}**: {name}\n\n"
+                
+                # Compare with the previous version (looked up for all samples above)
+                old = old_versions.get((elem_type, elem['id']))
+                if prev_version and old:
+                    old_tags = old['old_tags']
                     
-                    response_text += f"#### **{elem_type.capitalize()} #{elem_id}**: {name}\n\n"
+                    # Compare tags
+                    all_keys = set(old_tags.keys()) | set(new_tags.keys())
                     
-                    # Try to fetch previous version for comparison
-                    if prev_version:
-                        try:
-                            prev_url = f"https://api.openstreetmap.org/api/0.6/{elem_type}/{elem_id}/{prev_version}"
-                            prev_response = requests.get(prev_url, timeout=5)
-                            if prev_response.status_code == 200:
-                                prev_root = ET.fromstring(prev_response.content)
-                                prev_elem = prev_root.find(f'.//{elem_type}')
-                                if prev_elem is not None:
-                                    old_tags = {}
-                                    for tag in prev_elem.findall('tag'):
-                                        old_tags[tag.get('k', '')] = tag.get('v', '')
-                                    
-                                    # Compare tags
-                                    all_keys = set(old_tags.keys()) | set(new_tags.keys())
-                                    
-                                    if all_keys:
-                                        response_text += "<table class='atlas-comparison-table'>\n"
-                                        response_text += "<thead><tr><th>Tag</th><th>Before</th><th>After</th></tr></thead>\n"
-                                        response_text += "<tbody>\n"
-                                        
-                                        for key in sorted(all_keys):
-                                            old_val = old_tags.get(key, '')
-                                            new_val = new_tags.get(key, '')
-                                            
-                                            if old_val != new_val:
-                                                if not old_val:
-                                                    # Added tag
-                                                    response_text += f"<tr class='atlas-added'><td><code>{key}</code></td><td><em>none</em></td><td><code>{new_val}</code></td></tr>\n"
-                                                elif not new_val:
-                                                    # Removed tag
-                                                    response_text += f"<tr class='atlas-removed'><td><code>{key}</code></td><td><code>{old_val}</code></td><td><em>removed</em></td></tr>\n"
-                                                else:
-                                                    # Modified tag
-                                                    response_text += f"<tr class='atlas-modified'><td><code>{key}</code></td><td><code>{old_val}</code></td><td><code>{new_val}</code></td></tr>\n"
-                                        
-                                        response_text += "</tbody></table>\n\n"
-                                    else:
-                                        response_text += "*No tag changes detected*\n\n"
-                        except:
-                            response_text += f"*Version {prev_version} → {version} (old tags unavailable)*\n\n"
+                    if all_keys:
+                        response_text += "<table class='atlas-comparison-table'>\n"
+                        response_text += "<thead><tr><th>Tag</th><th>Before</th><th>After</th></tr></thead>\n"
+                        response_text += "<tbody>\n"
+                        
+                        for key in sorted(all_keys):
+                            old_val = old_tags.get(key, '')
+                            new_val = new_tags.get(key, '')
+                            
+                            if old_val != new_val:
+                                if not old_val:
+                                    # Added tag
+                                    response_text += f"<tr class='atlas-added'><td><code>{key}</code></td><td><em>none</em></td><td><code>{new_val}</code></td></tr>\n"
+                                elif not new_val:
+                                    # Removed tag
+                                    response_text += f"<tr class='atlas-removed'><td><code>{key}</code></td><td><code>{old_val}</code></td><td><em>removed</em></td></tr>\n"
+                                else:
+                                    # Modified tag
+                                    response_text += f"<tr class='atlas-modified'><td><code>{key}</code></td><td><code>{old_val}</code></td><td><code>{new_val}</code></td></tr>\n"
+                        
+                        response_text += "</tbody></table>\n\n"
                     else:
-                        # Just show current tags
-                        tag_list = ', '.join([f"`{k}={v}`" for k, v in list(new_tags.items())[:5]])
-                        response_text += f"**Current tags**: {tag_list}\n\n"
-                    
-                    shown += 1
+                        response_text += "*No tag changes detected*\n\n"
+                elif prev_version:
+                    response_text += f"*Version {prev_version} → {version} (old tags unavailable)*\n\n"
+                else:
+                    # Just show current tags
+                    tag_list = ', '.join([f"`{k}={v}`" for k, v in list(new_tags.items())[:5]])
+                    response_text += f"**Current tags**: {tag_list}\n\n"
                 
-                # Add legend after first table
-                if shown == 1:
-                    response_text += """
+                shown += 1
+            
+            if modified_count > shown:
+                response_text += f"\n*...and {modified_count - shown} more modified elements*\n"
+            
+            # Add legend after first table
+            if shown == 1:
+                response_text += """
 <div style="display: flex; gap: 16px; font-size: 0.8rem; margin: 8px 0; padding: 8px; background: #f8f9fa; border-radius: 6px;">
   <span style="color: #22c55e;">● Added tags</span>
   <span style="color: #f97316;">● Modified tags</span>
@@ -3229,37 +5294,26 @@ I'll show you the **side-by-side before and after** changes with interactive map
 </div>
 
 """
-                response_text += "\n"
+            response_text += "\n"
         
         # Show deleted elements (sample) - FILTER: Only show routing elements (roads)
         if deleted_count > 0:
             response_text += "### **Deleted Elements**\n\n"
-            delete_elem = root.find('delete')
-            if delete_elem is not None:
-                shown = 0
-                for elem in delete_elem:
-                    # Only process routing elements (roads)
-                    if not is_routing_element(elem):
-                        continue
-                        
-                    if shown >= 5:  # Limit to first 5
-                        response_text += f"\n*...and {deleted_count - shown} more deleted elements*\n"
-                        break
-                    
-                    elem_type = elem.tag
-                    elem_id = elem.get('id', 'unknown')
-                    tags = {}
-                    for tag in elem.findall('tag'):
-                        tags[tag.get('k', '')] = tag.get('v', '')
-                    
-                    name = tags.get('name', 'Unnamed')
-                    elem_tags = ', '.join([f"`{k}={v}`" for k, v in list(tags.items())[:3]])
-                    
-                    response_text += f"- **{elem_type.capitalize()} #{elem_id}**: {name}\n"
-                    if elem_tags:
-                        response_text += f"  - Had tags: {elem_tags}\n"
-                    shown += 1
-                response_text += "\n"
+            for elem in samples['deleted']:  # Limited to first 5
+                elem_type = elem['type']
+                elem_id = elem['id'] or 'unknown'
+                tags = elem['tags']
+                
+                name = tags.get('name', 'Unnamed')
+                elem_tags = ', '.join([f"`{k}={v}`" for k, v in list(tags.items())[:3]])
+                
+                response_text += f"- **{elem_type.capitalize()} #{elem_id}**: {name}\n"
+                if elem_tags:
+                    response_text += f"  - Had tags: {elem_tags}\n"
+            
+            if deleted_count > len(samples['deleted']):
+                response_text += f"\n*...and {deleted_count - len(samples['deleted'])} more deleted elements*\n"
+            response_text += "\n"
         
         # Add links for full comparison
         response_text += """---
@@ -3420,6 +5474,7 @@ This changeset appears to be **empty** - it was opened but no changes were uploa
 
 
 @app.route('/api/atlas-ai/chat', methods=['POST'])
+@osm_priority(OSM_PRIORITY_INTERACTIVE)
 def atlas_ai_chat():
     """Handle Atlas AI chat requests"""
     try:
@@ -3751,7 +5806,53 @@ What would you like to know more about?"""
 # Settings file path
 SETTINGS_FILE = '.atlas_settings.json'
 
+# Settings are consulted for every changeset validated, so the parsed file is kept as a
+# frozen snapshot and only re-read when save_settings writes it or its mtime changes
+settings_snapshot = None  # (file mtime, frozen settings)
+settings_snapshot_lock = threading.Lock()
+
+def freeze_settings(value):
+    """Read-only view of a settings value (dicts become mappingproxies, lists tuples)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze_settings(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_settings(item) for item in value)
+    return value
+
+def thaw_settings(value):
+    """Plain, mutable copy of a frozen settings value"""
+    if isinstance(value, MappingProxyType):
+        return {key: thaw_settings(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw_settings(item) for item in value]
+    return value
+
+def get_settings_mtime():
+    """Modification time of the settings file, or None if it doesn't exist"""
+    try:
+        return os.stat(SETTINGS_FILE).st_mtime_ns
+    except OSError:
+        return None
+
+def get_settings_snapshot():
+    """
+    Current settings as a frozen (read-only) snapshot - cheap enough to call per changeset
+    Use load_settings() for a copy that can be modified
+    """
+    global settings_snapshot
+    mtime = get_settings_mtime()
+    snapshot = settings_snapshot
+    if snapshot is None or snapshot[0] != mtime:
+        with settings_snapshot_lock:
+            snapshot = (mtime, freeze_settings(read_settings_file()))
+            settings_snapshot = snapshot
+    return snapshot[1]
+
 def load_settings():
+    """Load settings (a mutable copy of the current snapshot)"""
+    return thaw_settings(get_settings_snapshot())
+
+def read_settings_file():
     """Load settings from JSON file"""
     default_settings = {
         'validation': {
@@ -3785,17 +5886,20 @@ def load_settings():
 
 def save_settings(settings):
     """Save settings to JSON file"""
+    global settings_snapshot
     try:
         with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
             json.dump(settings, f, indent=2)
+        # Invalidate even if the mtime didn't visibly change (coarse filesystem timestamps)
+        settings_snapshot = None
         return True
     except Exception as e:
         print(f"ERROR: Error saving settings: {e}")
         return False
 
-def get_validation_threshold():
-    """Get the current validation threshold from settings or environment"""
-    settings = load_settings()
+def get_validation_threshold(settings=None):
+    """Get the current validation threshold from settings or environment (a snapshot can be passed in)"""
+    settings = settings or get_settings_snapshot()
     # Environment variable takes precedence if set (support both old and new names)
     env_threshold = os.environ.get('MASS_CHANGES_THRESHOLD') or os.environ.get('MASS_DELETION_THRESHOLD')
     if env_threshold:
@@ -3848,6 +5952,18 @@ def save_settings_endpoint():
                 for key, value in criteria.items():
                     if not isinstance(value, bool):
                         return jsonify({'error': f'Criterion {key} must be a boolean value'}), 400
+            
+            # Validate custom tag rules (see BUILTIN_VALIDATION_RULES for the fields)
+            if 'custom_rules' in data['validation']:
+                custom_rules = data['validation']['custom_rules']
+                if not isinstance(custom_rules, list):
+                    return jsonify({'error': 'Custom rules must be a list'}), 400
+                used_names = set(RESERVED_RULE_NAMES)
+                for rule in custom_rules:
+                    error = custom_rule_error(rule, used_names)
+                    if error:
+                        return jsonify({'error': error}), 400
+                    used_names.add(rule['name'])
         
         if 'slack' in data:
             webhook_url = data['slack'].get('webhook_url', '')
@@ -3890,10 +6006,15 @@ def save_settings_endpoint():
             global VALIDATION_THRESHOLDS
             VALIDATION_THRESHOLDS['mass_changes_threshold'] = get_validation_threshold()
             
+            # Apply the new threshold/criteria/trusted users to the changesets already loaded
+            # (in the background - it waits for any ingestion pass in progress)
+            request_rescore()
+            
             return jsonify({
                 'success': True,
                 'message': 'Settings saved successfully',
-                'settings': current_settings
+                'settings': current_settings,
+                'rescoring': True
             })
         else:
             return jsonify({'error': 'Failed to save settings'}), 500
@@ -3901,6 +6022,17 @@ def save_settings_endpoint():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/metrics')
+def get_metrics():
+    """Cache and OSM request scheduler counters for monitoring"""
+    return jsonify({
+        'caches': {name: cache.stats() for name, cache in CACHES.items()},
+        'osm_scheduler': osm_scheduler.stats(),
+        'comparison_queue': comparison_queue.qsize(),
+        'comparison_jobs': len(comparison_jobs),
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    })
+
 # Health check endpoint for uptime monitoring
 @app.route('/api/health')
 def health_check():
@@ -2408,6 +2408,7 @@ document.addEventListener('keydown', function(event) {
 let beforeMap = null;
 let afterMap = null;
 let comparisonData = null;
+let comparisonStreamController = null;
 let mapsAreSynced = true;
 
 // Layer groups for filtering
@@ -2429,6 +2430,111 @@ function updateComparisonProgress(progress, text, details = '') {
     document.getElementById('loadingDetails').textContent = details || 'Initializing...';
 }
 
+// Read the NDJSON comparison stream, calling onUpdate(data, counts) after each network chunk.
+// Created elements arrive first, modified/deleted ones as their old versions and geometry resolve
+async function streamChangesetComparison(changesetId, controller, onUpdate) {
+    // Abort only if the server goes quiet for 3 minutes - large changesets keep streaming
+    let timeoutId = setTimeout(() => controller.abort(), 180000);
+    const data = { created: [], modified: [], deleted: [], metadata: null };
+    let counts = null;
+    
+    try {
+        const response = await fetch(`/api/changeset/${changesetId}/comparison/stream`, {
+            signal: controller.signal
+        });
+        if (!response.ok || !response.body) {
+            throw new Error(`Failed to fetch comparison data (HTTP ${response.status})`);
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            clearTimeout(timeoutId);
+            timeoutId = setTimeout(() => controller.abort(), 180000);
+            
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                const record = JSON.parse(line);
+                if (record.type === 'summary') {
+                    counts = record.counts;
+                } else if (record.type === 'element') {
+                    data[record.action].push(record.element);
+                } else if (record.type === 'done') {
+                    data.metadata = record.metadata;
+                } else if (record.type === 'error') {
+                    if (record.error_type === 'timeout') {
+                        throw new Error('Request timeout - changeset is too large. Try again or contact support.');
+                    }
+                    throw new Error(record.error || 'Failed to fetch comparison data');
+                }
+            }
+            
+            if (counts) {
+                onUpdate(data, counts);
+            }
+        }
+    } catch (error) {
+        if (error.name === 'AbortError' && !controller.closedByUser) {
+            throw new Error('Request timeout - changeset is too large. Processing may take longer than expected.');
+        }
+        throw error;
+    } finally {
+        clearTimeout(timeoutId);
+    }
+    
+    if (!data.metadata) {
+        throw new Error('Comparison data ended unexpectedly');
+    }
+    return data;
+}
+
+// Page through the comparison job (/comparison?cursor=) until every element has its old version,
+// polling while the job is still resolving (at most 150 polls, 5 minutes). Returns the full comparison
+async function loadComparisonJob(changesetId, controller) {
+    const data = { created: [], modified: [], deleted: [], metadata: null };
+    const maxPolls = 150;
+    let polls = 0;
+    let cursor = 0;
+    
+    while (true) {
+        const response = await fetch(`/api/changeset/${changesetId}/comparison?cursor=${cursor}`, {
+            signal: controller.signal
+        });
+        const page = await response.json();
+        if (!page.success || page.status === 'failed') {
+            throw new Error(page.error || 'Comparison job failed');
+        }
+        
+        page.elements.forEach(record => data[record.action].push(record.element));
+        
+        const progress = document.querySelector('.comparison-job-progress');
+        if (progress && page.total) {
+            progress.textContent = `${page.resolved} of ${page.total} elements processed`;
+        }
+        
+        if (page.next_cursor === null) {
+            data.metadata = page.metadata;
+            return data;
+        }
+        if (page.next_cursor === cursor) {
+            polls++;
+            if (polls >= maxPolls) {
+                throw new Error('Comparison job is taking too long - reopen the changeset later');
+            }
+            await new Promise(resolve => setTimeout(resolve, 2000));
+        }
+        cursor = page.next_cursor;
+    }
+}
+
 // Open comparison modal
 async function showChangesetComparison(changesetId) {
     try {
@@ -2445,71 +2551,85 @@ async function showChangesetComparison(changesetId) {
         // Start progress
         updateComparisonProgress(10, 'Loading changeset...', 'Fetching changeset data from OpenStreetMap API');
         
-        // Fetch comparison data with progress updates
-        // Use longer timeout for large changesets
-        const controller = new AbortController();
-        const timeoutId = setTimeout(() => controller.abort(), 180000); // 3 minutes timeout
-        
-        let response;
-        try {
-            response = await fetch(`/api/changeset/${changesetId}/comparison`, {
-                signal: controller.signal
-            });
-            clearTimeout(timeoutId);
-        } catch (error) {
-            clearTimeout(timeoutId);
-            if (error.name === 'AbortError') {
-                throw new Error('Request timeout - changeset is too large. Processing may take longer than expected.');
-            }
-            throw error;
+        if (comparisonStreamController) {
+            comparisonStreamController.closedByUser = true;
+            comparisonStreamController.abort();
         }
+        const controller = new AbortController();
+        comparisonStreamController = controller;
         
-        updateComparisonProgress(30, 'Processing data...', 'Parsing changeset XML');
-        
-        const data = await response.json();
-        
-        if (!data.success) {
-            if (data.error_type === 'timeout') {
-                throw new Error('Request timeout - changeset is too large. Try again or contact support.');
+        // Render as soon as the first elements arrive, then refresh at most once a second
+        let lastRender = 0;
+        const renderComparison = (final) => {
+            if (!final && Date.now() - lastRender < 1000) return;
+            lastRender = Date.now();
+            
+            // Update stats
+            document.getElementById('createdCount').textContent = comparisonData.created.length;
+            document.getElementById('modifiedCount').textContent = comparisonData.modified.length;
+            document.getElementById('deletedCount').textContent = comparisonData.deleted.length;
+            
+            renderDiffView();
+            renderTimeline();
+            
+            if (!beforeMap) {
+                // Hide loading, show content
+                document.getElementById('comparisonLoadingBar').style.display = 'none';
+                document.getElementById('sideByMapsView').style.display = 'block';
+                initializeComparisonMaps();
+                setTimeout(() => {
+                    if (beforeMap) beforeMap.invalidateSize();
+                    if (afterMap) afterMap.invalidateSize();
+                }, 200);
+            } else {
+                refreshComparisonMaps();
             }
-            throw new Error(data.error || 'Failed to fetch comparison data');
-        }
-        
-        updateComparisonProgress(60, 'Analyzing changes...', 'Calculating element geometries');
+        };
+        
+        const data = await streamChangesetComparison(changesetId, controller, (partial, counts) => {
+            comparisonData = partial;
+            const total = counts.created + counts.modified + counts.deleted;
+            const received = partial.created.length + partial.modified.length + partial.deleted.length;
+            updateComparisonProgress(10 + Math.round(80 * received / Math.max(total, 1)), 'Loading changes...',
+                `${received} of ${total} elements resolved`);
+            renderComparison(false);
+        });
         
-        comparisonData = data.comparison;
+        if (controller.closedByUser) return;
+        comparisonData = data;
         
         // Show warning for large changesets with partial data
         if (comparisonData.metadata && comparisonData.metadata.is_large_changeset) {
             showLargeChangesetWarning(comparisonData.metadata);
         }
         
-        updateComparisonProgress(80, 'Preparing visualization...', 'Setting up maps and views');
-        
-        // Update stats
-        document.getElementById('createdCount').textContent = comparisonData.created.length;
-        document.getElementById('modifiedCount').textContent = comparisonData.modified.length;
-        document.getElementById('deletedCount').textContent = comparisonData.deleted.length;
-        
-        // Render diff view
-        renderDiffView();
-        
-        // Render timeline
-        renderTimeline();
-        
-        updateComparisonProgress(90, 'Almost done...', 'Rendering map layers');
-        
-        // Hide loading, show content
-        document.getElementById('comparisonLoadingBar').style.display = 'none';
-        document.getElementById('sideByMapsView').style.display = 'block';
-        
-        // Initialize side-by-side maps
-        setTimeout(() => {
-            initializeComparisonMaps();
-            updateComparisonProgress(100, 'Complete!', '');
-        }, 200);
+        renderComparison(true);
+        updateComparisonProgress(100, 'Complete!', '');
+        
+        // Old versions beyond the first 500 come from a background comparison job
+        if (comparisonData.metadata && comparisonData.metadata.comparison_job) {
+            try {
+                const fullData = await loadComparisonJob(changesetId, controller);
+                if (controller.closedByUser) return;
+                comparisonData = fullData;
+                if (comparisonData.metadata.is_large_changeset) {
+                    showLargeChangesetWarning(comparisonData.metadata);
+                } else {
+                    const existingWarning = document.querySelector('.large-changeset-warning');
+                    if (existingWarning) existingWarning.remove();
+                }
+                renderComparison(true);
+            } catch (error) {
+                if (error.name === 'AbortError') return;
+                console.error('Error loading comparison job:', error);
+                const progress = document.querySelector('.comparison-job-progress');
+                if (progress) progress.textContent = `failed: ${error.message}`;
+            }
+        }
+        comparisonStreamController = null;
         
     } catch (error) {
+        if (error.name === 'AbortError') return;  // Modal was closed or another changeset opened
         console.error('Error loading comparison:', error);
         
         // Show user-friendly error message
@@ -2547,9 +2667,11 @@ function showLargeChangesetWarning(metadata) {
     
     let warningText = '<strong>WARNING: Large Changeset Detected</strong><br>';
     
-    if (metadata.total_modified > 500) {
+    if (metadata.comparison_job) {
         warningText += `<p style="margin: 8px 0 0 0;">Showing old version data for ${metadata.modified_with_old_data} of ${metadata.total_modified} modified elements ` +
-                      `(processing limited to first 500 for performance).</p>`;
+                      `while the rest are fetched in the background (<span class="comparison-job-progress">starting...</span>).</p>`;
+    } else if (metadata.modified_with_old_data < metadata.total_modified) {
+        warningText += `<p style="margin: 8px 0 0 0;">Showing old version data for ${metadata.modified_with_old_data} of ${metadata.total_modified} modified elements.</p>`;
     }
     
     if (metadata.total_deleted > 200) {
@@ -2570,7 +2692,8 @@ function showLargeChangesetWarning(metadata) {
         }
     }
     
-    // Auto-hide after 10 seconds
+    // Auto-hide after 10 seconds (kept while the comparison job reports progress)
+    if (metadata.comparison_job) return;
     setTimeout(() => {
         if (warning.parentNode) {
             warning.style.transition = 'opacity 0.5s';
@@ -2646,6 +2769,19 @@ function initializeComparisonMaps() {
     renderAfterState();
 }
 
+// Redraw both maps with the elements received so far
+function refreshComparisonMaps() {
+    Object.values(beforeLayers).forEach(layer => layer && layer.clearLayers());
+    Object.values(afterLayers).forEach(layer => layer && layer.clearLayers());
+    
+    document.getElementById('createdCountFilter').textContent = comparisonData.created.length;
+    document.getElementById('modifiedCountFilter').textContent = comparisonData.modified.length;
+    document.getElementById('deletedCountFilter').textContent = comparisonData.deleted.length;
+    
+    renderBeforeState();
+    renderAfterState();
+}
+
 function syncMapMovements() {
     beforeMap.on('move', function() {
         if (mapsAreSynced && afterMap) {
@@ -3014,6 +3150,13 @@ function toggleComparisonFilter(filterType) {
 function closeComparisonModal() {
     document.getElementById('comparisonModal').style.display = 'none';
     
+    // Stop a comparison that is still streaming
+    if (comparisonStreamController) {
+        comparisonStreamController.closedByUser = true;
+        comparisonStreamController.abort();
+        comparisonStreamController = null;
+    }
+    
     // Reset loading progress bar
     document.getElementById('comparisonLoadingBar').style.display = 'none';
     updateComparisonProgress(0, 'Loading changeset...', 'Initializing...');
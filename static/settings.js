@@ -17,6 +17,9 @@ let currentSettings = {
     trusted_users: ['kenken234']
 };
 
+// How long after saving to reload the dashboard (the server re-scores changesets in the background)
+const RESCORE_REFRESH_DELAY_MS = 2000;
+
 // Load settings when page loads
 async function loadSettings() {
     try {
@@ -213,6 +216,11 @@ async function saveSettings() {
             currentSettings = data.settings || settings;
             // Reload settings to get the full merged settings from server
             loadSettings();
+            // The server re-scores the loaded changesets with the new settings in the background -
+            // refresh the dashboard once it has had time to finish
+            if (data.rescoring && typeof loadData === 'function') {
+                setTimeout(loadData, RESCORE_REFRESH_DELAY_MS);
+            }
             // Save webhook URL to localStorage for persistence
             if (settings.slack && settings.slack.webhook_url) {
                 localStorage.setItem('slackWebhookUrl', settings.slack.webhook_url);
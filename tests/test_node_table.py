@@ -0,0 +1,55 @@
+"""NodeTable lookups used to rebuild way geometry"""
+import math
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault('ATLAS_INGEST_ENABLED', 'false')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+def test_way_geometries_keep_ref_order_and_average_the_center():
+    table = app.NodeTable.from_rows([('30', 1.3, 103.9), ('10', 1.1, 103.7), ('20', 1.2, 103.8)])
+
+    centers, geometries = table.way_geometries([['10', '20', '30'], ['30', '10']])
+
+    assert geometries == [[[1.1, 103.7], [1.2, 103.8], [1.3, 103.9]], [[1.3, 103.9], [1.1, 103.7]]]
+    assert centers[0].tolist() == pytest.approx([1.2, 103.8])
+    assert centers[1].tolist() == pytest.approx([1.2, 103.8])
+
+
+def test_way_geometries_skip_missing_nodes():
+    table = app.NodeTable.from_rows([('10', 1.0, 103.0), ('30', 3.0, 105.0)])
+
+    centers, geometries = table.way_geometries([['5', '10', '20', '30', '40'], ['20', '99'], []])
+
+    assert geometries == [[[1.0, 103.0], [3.0, 105.0]], [], []]
+    assert centers[0].tolist() == [2.0, 104.0]
+    # Ways without a single known node have a NaN center
+    assert all(math.isnan(value) for value in centers[1])
+    assert all(math.isnan(value) for value in centers[2])
+
+
+def test_way_geometries_with_an_empty_table():
+    centers, geometries = app.NodeTable.from_rows([]).way_geometries([['1', '2']])
+
+    assert geometries == [[]]
+    assert centers.shape == (1, 2)
+
+
+def test_way_geometries_without_ways():
+    centers, geometries = app.NodeTable.from_rows([('1', 1.0, 1.0)]).way_geometries([])
+
+    assert geometries == []
+    assert centers.shape == (0, 2)
+
+
+def test_from_rows_keeps_the_last_coordinates_of_a_repeated_node():
+    table = app.NodeTable.from_rows([('7', 1.0, 2.0), ('3', 5.0, 6.0), ('7', 3.0, 4.0)])
+
+    assert len(table) == 2
+    assert table.to_rows() == [[3, 5.0, 6.0], [7, 3.0, 4.0]]
+    assert app.NodeTable.from_rows(table.to_rows()).to_rows() == table.to_rows()
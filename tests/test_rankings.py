@@ -0,0 +1,49 @@
+"""Vectorized rankings over changeset columns (top_k_indices, count_by_user)"""
+import os
+import sys
+
+import numpy as np
+
+os.environ.setdefault('ATLAS_INGEST_ENABLED', 'false')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+def test_top_k_indices_largest_first():
+    values = np.array([3, 9, 1, 7, 5])
+
+    assert app.top_k_indices(values, 3).tolist() == [1, 3, 4]
+
+
+def test_top_k_indices_breaks_ties_in_index_order():
+    values = np.array([2, 5, 5, 1, 5, 2])
+
+    assert app.top_k_indices(values, 2).tolist() == [1, 2]
+    # Ties at the k-th value are all candidates, only the first ones are kept
+    assert app.top_k_indices(values, 4).tolist() == [1, 2, 4, 0]
+
+
+def test_top_k_indices_breaks_ties_by_the_ties_array():
+    values = np.array([4, 4, 4, 1])
+    first_seen = np.array([7, 2, 5, 0])
+
+    assert app.top_k_indices(values, 2, ties=first_seen).tolist() == [1, 2]
+
+
+def test_top_k_indices_with_k_larger_than_n():
+    values = np.array([1, 3, 2])
+
+    assert app.top_k_indices(values, 10).tolist() == [1, 2, 0]
+    assert app.top_k_indices(np.array([], dtype=np.int64), 5).tolist() == []
+
+
+def test_top_contributors_rank_users_by_changesets():
+    changesets = [{'id': str(i), 'user': user} for i, user in enumerate(['b', 'a', 'a', 'c', 'b', 'a'])]
+    columns = app.ChangesetColumns.from_changesets(changesets)
+
+    counts = app.count_by_user(columns)
+    first_seen = app.first_seen_by_user(columns, np.ones(len(columns), dtype=bool))
+    ranking = [(columns.user_names[code], int(counts[code])) for code in app.top_k_indices(counts, 2, ties=first_seen)]
+
+    assert ranking == [('a', 3), ('b', 2)]
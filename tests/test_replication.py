@@ -0,0 +1,118 @@
+"""Offline replication ingestion against the fixture files in fixtures/replication"""
+import gzip
+import os
+import shutil
+import sys
+
+import pytest
+
+os.environ.setdefault('ATLAS_INGEST_ENABLED', 'false')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'replication')
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Empty changeset store in a temporary file, with the OSM API unreachable"""
+    def no_network(*args, **kwargs):
+        raise AssertionError('replication ingestion must not call the OSM API')
+
+    monkeypatch.setattr(app, 'CHANGESET_DB_FILE', str(tmp_path / 'changesets.db'))
+    monkeypatch.setattr(app._db_local, 'conn', None, raising=False)
+    monkeypatch.setattr(app.osm_session, 'get', no_network)
+    yield
+    app._db_local.conn.close()
+
+
+def write_gzip(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(content)
+
+
+def test_ingest_replication_clips_and_analyzes_changesets(store):
+    counts = app.ingest_replication(FIXTURE_DIR, ['singapore'])
+
+    assert counts == {'singapore': 1}
+    changesets = app.load_region_changesets('singapore')
+    assert [cs['id'] for cs in changesets] == ['1001']
+    changeset = changesets[0]
+    assert changeset['user'] == 'mapper_sg'
+    # Only routing elements (the highway way) are counted
+    assert changeset['details']['created'] == {'node': 0, 'way': 1, 'relation': 0}
+    assert changeset['details']['total_modified'] == 0
+    assert changeset['num_changes'] == 1
+    assert 'validation' in changeset
+
+
+def test_ingest_replication_stores_a_cursor_per_feed(store):
+    assert app.load_replication_state(FIXTURE_DIR, app.REPLICATION_FEED_DIFFS) is None
+
+    app.ingest_replication(FIXTURE_DIR, ['singapore'])
+
+    assert app.load_replication_state(FIXTURE_DIR, app.REPLICATION_FEED_DIFFS) == {
+        'sequence': 1, 'timestamp': '2026-10-10T00:01:00Z'
+    }
+    assert app.load_replication_state(FIXTURE_DIR, app.REPLICATION_FEED_CHANGESETS) == {
+        'sequence': 1, 'timestamp': '2026-10-09T23:58:00Z'
+    }
+
+
+def test_second_ingest_reads_no_files(store, monkeypatch):
+    app.ingest_replication(FIXTURE_DIR, ['singapore'])
+
+    opened = []
+    open_replication_file = app.open_replication_file
+
+    def recording_open(path):
+        opened.append(path)
+        return open_replication_file(path)
+
+    monkeypatch.setattr(app, 'open_replication_file', recording_open)
+
+    assert app.ingest_replication(FIXTURE_DIR, ['singapore']) == {'singapore': 0}
+    assert opened == []
+    assert [cs['id'] for cs in app.load_region_changesets('singapore')] == ['1001']
+
+
+def test_changeset_closing_after_its_diffs_keeps_their_analysis(store, tmp_path):
+    directory = str(tmp_path / 'replication')
+    shutil.copytree(FIXTURE_DIR, directory)
+    # Changeset 1003 is still open in changeset file 1 and its way arrives in diff 2
+    write_gzip(os.path.join(directory, 'minute', '000', '000', '002.osc.gz'), (
+        '<osmChange version="0.6"><create>'
+        '<way id="7002" version="1" changeset="1003"><nd ref="5001"/><nd ref="5002"/><tag k="highway" v="residential"/></way>'
+        '</create></osmChange>'
+    ))
+    with open(os.path.join(directory, 'state.txt'), 'w', encoding='utf-8') as f:
+        f.write('sequenceNumber=2\ntimestamp=2026-10-10T00\\:02\\:00Z\n')
+
+    app.ingest_replication(directory, ['singapore'])
+    assert [cs['id'] for cs in app.load_region_changesets('singapore')] == ['1001']
+
+    # It closes in the next changeset file, after its diff was ingested
+    write_gzip(os.path.join(directory, 'changesets', '000', '000', '002.osm.gz'), (
+        '<osm version="0.6">'
+        '<changeset id="1003" created_at="2026-10-09T23:55:00Z" closed_at="2026-10-10T00:05:00Z" open="false"'
+        ' user="mapper_sg" uid="11" min_lat="1.3000000" min_lon="103.8000000" max_lat="1.3100000"'
+        ' max_lon="103.8100000" num_changes="1"/>'
+        '</osm>'
+    ))
+
+    assert app.ingest_replication(directory, ['singapore']) == {'singapore': 1}
+    changeset = next(cs for cs in app.load_region_changesets('singapore') if cs['id'] == '1003')
+    assert changeset['details']['created'] == {'node': 0, 'way': 1, 'relation': 0}
+    assert app.load_replication_pending() == {}
+
+
+def test_diffs_after_state_txt_are_left_for_the_next_run(store, tmp_path):
+    directory = str(tmp_path / 'replication')
+    shutil.copytree(FIXTURE_DIR, directory)
+    write_gzip(os.path.join(directory, 'minute', '000', '000', '002.osc.gz'), '<osmChange version="0.6">')
+
+    app.ingest_replication(directory, ['singapore'])
+
+    assert app.load_replication_state(directory, app.REPLICATION_FEED_DIFFS)['sequence'] == 1
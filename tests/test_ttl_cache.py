@@ -0,0 +1,114 @@
+"""TTLCache expiry, eviction and the ttl_cached decorator"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault('ATLAS_INGEST_ENABLED', 'false')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Manual monotonic clock (advance by adding to clock['now']), and no global cache registration"""
+    now = {'now': 1000.0}
+    monkeypatch.setattr(app.time, 'monotonic', lambda: now['now'])
+    monkeypatch.setattr(app, 'CACHES', {})
+    return now
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = app.TTLCache('test', ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=30)
+
+    clock['now'] += 9
+    assert cache.lookup('a') == (True, 1)
+
+    clock['now'] += 2
+    assert cache.lookup('a') == (False, None)
+    assert 'a' not in cache
+    assert cache.get('b') == 2
+    assert cache.stats()['expirations'] == 1
+
+
+def test_none_is_cached_only_for_the_negative_ttl(clock):
+    cache = app.TTLCache('test', negative_ttl=5)
+    cache.set('missing', None)
+
+    assert cache.lookup('missing') == (True, None)
+    clock['now'] += 6
+    assert cache.lookup('missing') == (False, None)
+
+    # Without a ttl, values only leave by eviction
+    cache.set('kept', 'value')
+    clock['now'] += 10 ** 6
+    assert cache.get('kept') == 'value'
+
+
+def test_zero_ttl_is_not_stored(clock):
+    cache = app.TTLCache('test', negative_ttl=0)
+    cache.set('missing', None)
+    cache.set('a', 1, ttl=0)
+
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted_first(clock):
+    cache = app.TTLCache('test', max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert 'a' in cache and 'c' in cache
+    assert 'b' not in cache
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entries_are_evicted_to_stay_under_max_bytes(clock):
+    cache = app.TTLCache('test', max_entries=100, max_bytes=30)
+    cache.set('a', 'x' * 10)
+    cache.set('b', 'y' * 10)
+    assert cache.stats()['bytes'] == 24
+
+    cache.set('c', 'z' * 10)
+
+    assert 'a' not in cache
+    assert cache.stats()['bytes'] == 24
+    # Replacing a value updates the size instead of adding to it
+    cache.set('c', 'z')
+    assert cache.stats()['bytes'] == 15
+
+
+def test_stats_count_hits_and_misses(clock):
+    cache = app.TTLCache('test')
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('a')
+    cache.get('b')
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (2, 1, 0.667)
+
+
+def test_ttl_cached_memoizes_by_arguments(clock):
+    calls = []
+
+    @app.ttl_cached(app.TTLCache('test', ttl=60))
+    def lookup(key):
+        calls.append(key)
+        return None if key == 'missing' else key.upper()
+
+    assert lookup('a') == 'A'
+    assert lookup('a') == 'A'
+    assert lookup('missing') is None
+    assert lookup('missing') is None
+    assert calls == ['a', 'missing']
+
+    clock['now'] += 61
+    lookup('a')
+    lookup('missing')
+    assert calls == ['a', 'missing', 'a', 'missing']
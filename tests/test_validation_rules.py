@@ -0,0 +1,104 @@
+"""Compiled tag rule table (compile_validation_rules) and custom rules from settings"""
+import os
+import sys
+
+os.environ.setdefault('ATLAS_INGEST_ENABLED', 'false')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+def settings_with_rules(custom_rules):
+    return app.freeze_settings({'validation': {'criteria': {}, 'custom_rules': custom_rules}})
+
+
+def test_malformed_custom_rules_are_skipped():
+    settings = settings_with_rules([
+        {'name': 'bridge', 'tag_keys': ['bridge']},
+        {'name': 'old_format', 'tag_key': 'tunnel'},
+        {'tag_keys': ['layer']},
+        'not a rule',
+        {'name': 'erp', 'tag_keys': ['name']},
+        {'name': 'bad_reason', 'tag_keys': ['ford'], 'reason': '{0.__class__}'},
+    ])
+
+    compiled = app.get_validation_rules(settings)
+
+    assert [rule['name'] for rule in compiled['custom_rules']] == ['bridge']
+    assert [rule['name'] for rule in compiled['rules']] == ['erp', 'oneway', 'access', 'bridge']
+    assert app.get_validation_criteria(settings) == {
+        'mass_changes': True, 'erp': True, 'oneway': True, 'access': True, 'bridge': True
+    }
+
+
+def test_custom_rules_that_are_not_a_list_are_ignored():
+    settings = settings_with_rules({'name': 'bridge', 'tag_keys': ['bridge']})
+
+    assert app.get_validation_rules(settings)['custom_rules'] == []
+    assert 'bridge' not in app.get_validation_criteria(settings)
+
+
+def element(element_type, **tags):
+    return {'type': element_type, 'tags': tags}
+
+
+def test_builtin_rules_match_through_the_dispatch_table():
+    compiled = app.compile_validation_rules(app.BUILTIN_VALIDATION_RULES)
+
+    assert app.match_validation_rules(element('node', name='ERP'), compiled, False) == {'erp'}
+    # erp matches case exactly, oneway and access don't
+    assert app.match_validation_rules(element('node', name='erp'), compiled, False) == set()
+    assert app.match_validation_rules(element('way', Oneway='YES', highway='primary'), compiled, True) == {'oneway'}
+    assert app.match_validation_rules(element('way', oneway='no'), compiled, True) == set()
+    # Routing-only rules ignore elements that aren't roads
+    assert app.match_validation_rules(element('way', oneway='yes', access='no'), compiled, False) == set()
+    # An element counts once per rule however many of its tags match
+    assert app.match_validation_rules(element('way', access='no', foot='yes', oneway='1'), compiled, True) == {'access', 'oneway'}
+
+
+def test_custom_rule_element_types_and_values():
+    compiled = app.compile_validation_rules(app.BUILTIN_VALIDATION_RULES + [
+        {'name': 'barrier', 'tag_keys': ['barrier'], 'values': ['Gate', 'bollard'], 'element_types': ['node']}
+    ])
+
+    assert app.match_validation_rules(element('node', barrier='gate'), compiled, False) == {'barrier'}
+    assert app.match_validation_rules(element('node', barrier='wall'), compiled, False) == set()
+    assert app.match_validation_rules(element('way', barrier='gate'), compiled, True) == set()
+
+
+def test_signature_tracks_rule_definitions_but_not_reasons():
+    bridge = {'name': 'bridge', 'tag_keys': ['bridge']}
+    with_bridge = app.compile_validation_rules(app.BUILTIN_VALIDATION_RULES + [bridge])
+
+    assert with_bridge['signature'] != app.BUILTIN_RULES_SIGNATURE
+    assert app.compile_validation_rules(app.BUILTIN_VALIDATION_RULES + [dict(bridge)])['signature'] == with_bridge['signature']
+    reworded = dict(bridge, reason='Bridge edit: {count}')
+    assert app.compile_validation_rules(app.BUILTIN_VALIDATION_RULES + [reworded])['signature'] == with_bridge['signature']
+    narrowed = dict(bridge, element_types=['way'])
+    assert app.compile_validation_rules(app.BUILTIN_VALIDATION_RULES + [narrowed])['signature'] != with_bridge['signature']
+
+
+def test_rule_changes_make_stored_analyses_stale(monkeypatch):
+    builtin_only = settings_with_rules([])
+    with_bridge = settings_with_rules([{'name': 'bridge', 'tag_keys': ['bridge']}])
+
+    monkeypatch.setattr(app, 'get_settings_snapshot', lambda: builtin_only)
+    analysis = app.analyze_osmchange([])
+    # Analyses stored before rules_signature existed were made with the built-in rules
+    legacy = {key: value for key, value in analysis.items() if key != 'rules_signature'}
+    assert app.is_analysis_current(analysis)
+    assert app.is_analysis_current(legacy)
+
+    monkeypatch.setattr(app, 'get_settings_snapshot', lambda: with_bridge)
+    assert not app.is_analysis_current(analysis)
+    assert not app.is_analysis_current(legacy)
+    assert app.is_analysis_current(app.analyze_osmchange([]))
+
+
+def test_rules_are_compiled_once_per_settings_snapshot():
+    settings = settings_with_rules([{'name': 'bridge', 'tag_keys': ['bridge']}])
+
+    compiled = app.get_validation_rules(settings)
+
+    assert app.get_validation_rules(settings) is compiled
+    assert app.get_validation_rules(settings_with_rules([{'name': 'bridge', 'tag_keys': ['bridge']}])) is not compiled